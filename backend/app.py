@@ -1,16 +1,46 @@
 # Main Flask application 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
+import io
 import os
+import json
+import threading
 import time
 import uuid
+import zipfile
 from werkzeug.utils import secure_filename
 import numpy as np
 
 # Import model modules
-from models.image_detector import ImageDetector
-from models.video_detector import VideoDetector
-from models.audio_detector import AudioDetector
+from models.registry import registry
+from models.image_detector import RESIZABLE_BACKENDS
+from utils.batching import QueueFullError
+from utils.result_cache import ResultCache, hash_stream
+from utils.jobs import JobStore, JobRunner
+from utils.uploads import UploadStore, UploadAnalyzer, UploadError, UploadLimitError, TRANSIENT_ERRORS
+from utils.pipeline import StageTimer
+from utils.metrics import Metrics
+from utils.scanner import BatchScanner
+from utils.embedding_store import EmbeddingStore
+from utils.load_control import EFFORT_SETTINGS, LoadController, effort_levels
+from utils.memory_files import memory_file
+from detectors import (make_decode_pool, make_face_locator, make_image_detector,
+                       make_video_detector, make_audio_detector, face_params, video_adaptive_options)
+from config import (PRELOAD_MODELS, BATCHING_ENABLED, BATCH_MAX_SIZE,
+                    BATCH_MAX_WAIT_MS, BATCH_QUEUE_SIZE,
+                    IMAGE_MODEL_PATH, AUDIO_MODEL_PATH, IMAGE_BASE_WEIGHTS, QUANTIZATION,
+                    AUDIO_WINDOWED, AUDIO_DECODER, AUDIO_RESAMPLER, AUDIO_FEATURES,
+                    CACHE_ENABLED, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_TTL,
+                    CACHE_SQLITE_PATH, MODEL_VERSION, IN_MEMORY_UPLOADS,
+                    JOBS_FOLDER, JOBS_DB_PATH, JOB_WORKERS, JOB_POLL_INTERVAL,
+                    JOB_STALE_SECONDS, VIDEO_ADAPTIVE, METRICS_ENABLED,
+                    METRICS_DB_PATH, METRICS_FLUSH_INTERVAL, BATCH_UPLOAD_MAX_FILES,
+                    BATCH_UPLOAD_MAX_BYTES, BATCH_UPLOAD_WORKERS, PREFORK_SERVER,
+                    EMBEDDINGS_FOLDER, LOAD_CONTROL, LOAD_LEVELS, LOAD_IMAGE_TARGET,
+                    LOAD_VIDEO_TARGET, LOAD_AUDIO_TARGET, LOAD_HEADROOM,
+                    LOAD_MIN_FRAMES_PER_SECOND, LOAD_MIN_FRAMES, LOAD_MIN_AUDIO_WINDOWS,
+                    LOAD_MIN_RESOLUTION, UPLOADS_FOLDER, UPLOADS_DB_PATH, UPLOAD_CHUNK_SIZE,
+                    UPLOAD_MAX_SIZE, UPLOAD_DISK_QUOTA, UPLOAD_TTL, UPLOAD_ANALYSIS_WORKERS)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -18,7 +48,7 @@ CORS(app)  # Enable CORS for all routes
 # Configure upload folder
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
-ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov'}
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
 ALLOWED_AUDIO_EXTENSIONS = {'wav', 'mp3'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -27,18 +57,477 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max upload
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Initialize models
-image_detector = ImageDetector()
-video_detector = VideoDetector()
-audio_detector = AudioDetector()
+# Request, stage and batch metrics for GET /api/metrics, shared by all workers through METRICS_DB_PATH
+metrics = None
+if METRICS_ENABLED:
+    metrics = Metrics(db_path=METRICS_DB_PATH or None, flush_interval=METRICS_FLUSH_INTERVAL)
+    metrics.describe('requests_total', 'counter', "API requests by endpoint and HTTP status")
+    metrics.describe('request_errors_total', 'counter', "API requests that failed with a 5xx status")
+    metrics.describe('request_duration_seconds', 'summary', "API request latency")
+    metrics.describe('stage_duration_seconds', 'summary', "Seconds spent per request in each processing stage")
+    metrics.describe('cache_lookups_total', 'counter', "Result cache lookups by kind and result")
+    metrics.describe('inference_batch_size', 'summary', "Rows per model forward pass")
+    metrics.describe('warm_up_seconds', 'summary', "Seconds a worker spent restoring models and warming them up")
+    metrics.describe('effort_level_total', 'counter', "Managed detection requests by endpoint and effort level")
+
+# Decode/preprocess workers shared by all detectors, overlapped with inference
+decode_pool = make_decode_pool()
+
+# Optional face-crop stage in front of the image model
+face_locator = make_face_locator()
+
+# Initialize models (networks are built once per process, on first use)
+image_detector = make_image_detector(face_locator=face_locator, metrics=metrics)
+video_detector = make_video_detector(image_detector, decode_pool=decode_pool, face_locator=face_locator)
+audio_detector = make_audio_detector(decode_pool=decode_pool, metrics=metrics)
+
+# Coalesce concurrent requests (video frames go through image_detector's batcher)
+if BATCHING_ENABLED:
+    for detector in (image_detector, audio_detector):
+        detector.enable_batching(
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+            max_queue_size=BATCH_QUEUE_SIZE
+        )
+
+# Effort levels from the serving settings (level 0) down to the LOAD_MIN_* ones; requests run at
+# the highest level predicted to fit their budget, or with LOAD_CONTROL on their kind's target
+load_controller = LoadController(
+    effort_levels(LOAD_LEVELS, full={
+        'frames_per_second': video_detector.frames_per_second,
+        'max_frames': video_detector.max_frames,
+        'audio_windows': audio_detector.max_windows,
+        'resolution': image_detector.img_size[0]
+    }, minimum={
+        'frames_per_second': LOAD_MIN_FRAMES_PER_SECOND,
+        'max_frames': LOAD_MIN_FRAMES,
+        'audio_windows': LOAD_MIN_AUDIO_WINDOWS,
+        # Exported backends have a fixed input size
+        'resolution': (LOAD_MIN_RESOLUTION if image_detector.backend_name in RESIZABLE_BACKENDS
+                       else image_detector.img_size[0])
+    }),
+    targets={'image': LOAD_IMAGE_TARGET, 'video': LOAD_VIDEO_TARGET, 'audio': LOAD_AUDIO_TARGET,
+             'audio_windowed': LOAD_AUDIO_TARGET} if LOAD_CONTROL else None,
+    headroom=LOAD_HEADROOM
+)
+
+# Background video jobs get their own frame scorer: it shares the network through the
+# registry but bypasses the request batcher, so image/audio requests never queue behind videos
+job_video_detector = make_video_detector(make_image_detector(metrics=metrics), decode_pool=decode_pool,
+                                         face_locator=face_locator)
+# Chunked audio uploads likewise score their windows outside the request batcher
+job_audio_detector = make_audio_detector(decode_pool=decode_pool, metrics=metrics)
+
+def model_version():
+    """Identify the models behind a result, so cached results never outlive them"""
+    parts = [MODEL_VERSION, image_detector.backend_name, audio_detector.backend_name, QUANTIZATION,
+             str(IMAGE_BASE_WEIGHTS)]
+    for path in (IMAGE_MODEL_PATH, AUDIO_MODEL_PATH):
+        parts.append(str(os.path.getmtime(path)) if os.path.exists(path) else 'base')
+    return ':'.join(parts)
+
+# Cache results by upload content so repeat uploads skip inference
+result_cache = None
+if CACHE_ENABLED:
+    result_cache = ResultCache(
+        max_entries=CACHE_MAX_ENTRIES,
+        max_bytes=CACHE_MAX_BYTES,
+        ttl=CACHE_TTL,
+        sqlite_path=CACHE_SQLITE_PATH or None,
+        model_version=model_version()
+    )
+
+# Backbone embeddings computed by POST /api/embeddings, kept for re-scoring with new heads
+embedding_store = EmbeddingStore(EMBEDDINGS_FOLDER) if EMBEDDINGS_FOLDER else None
+
+def cache_lookup(kind, file, params, timer):
+    """Hash the upload and look it up; returns (key, cached response or None)"""
+    if result_cache is None:
+        return None, None
+    with timer.stage('cache_lookup'):
+        key, size = result_cache.make_key(kind, file.stream, params)
+        cached = result_cache.get(key, nbytes=size)
+    if cached is not None and 'load_ticket' in g:
+        # Says nothing about the cost of detection
+        g.load_ticket['cached'] = True
+    if metrics is not None:
+        metrics.inc('cache_lookups_total', {'kind': kind, 'result': 'miss' if cached is None else 'hit'})
+    return key, cached
+
+def cache_store(key, response):
+    if key is not None:
+        result_cache.put(key, response)
+
+def with_timings(response, timings):
+    """Keep a request's stage timings for /api/metrics; include them in the response if ?timings=true"""
+    g.timings = timings
+    if is_true(request.values.get('timings')):
+        response['timings'] = timings
+    return response
+
+def request_budget():
+    """
+    Latency budget of the request from ?budget_ms=, in seconds, or None
+    
+    Raises:
+        ValueError: If budget_ms is not a positive number
+    """
+    value = request.values.get('budget_ms')
+    if value is None or value == '':
+        return None
+    try:
+        budget = float(value)
+    except ValueError:
+        budget = 0
+    if not budget > 0:
+        raise ValueError("budget_ms must be a positive number")
+    return budget / 1000
+
+def begin_effort(kind):
+    """
+    Admit a detection request to the load controller and choose its effort level
+    
+    Args:
+        kind (str): Request kind, see utils.load_control.relative_cost
+        
+    Returns:
+        dict: Effort to report in the response, or None when the request has neither a
+            budget nor a target and runs at full effort
+    
+    Raises:
+        ValueError: If budget_ms is not a positive number
+    """
+    budget = request_budget()
+    # Video, audio and batch work grows with the upload, an image's hardly does
+    work = 1.0 if kind == 'image' else max(request.content_length or 0, 1) / 1e6
+    g.load_ticket = load_controller.begin(kind, work=work, budget=budget)
+    g.load_ticket['builds'] = registry.builds
+    if g.load_ticket['budget'] is None:
+        return None
+    effort = load_controller.effort(g.load_ticket)
+    if metrics is not None:
+        metrics.inc('effort_level_total', {'endpoint': request.endpoint, 'level': str(effort['level'])})
+    return effort
+
+def effort_detectors(effort):
+    """Image, video and audio detectors running at an effort level; the shared ones at full effort"""
+    if effort is None or effort['level'] == 0:
+        return image_detector, video_detector, audio_detector
+    image = image_detector.at_resolution(effort['resolution'])
+    video = video_detector.with_settings(image_detector=image, frames_per_second=effort['frames_per_second'],
+                                         max_frames=effort['max_frames'])
+    return image, video, audio_detector.with_settings(max_windows=effort['audio_windows'])
+
+def effort_params(effort):
+    """Cache key parameters of an effort level; full effort keeps the usual keys"""
+    if effort is None or effort['level'] == 0:
+        return {}
+    return {'effort': {key: effort[key] for key in EFFORT_SETTINGS}}
+
+def with_effort(response, effort):
+    if effort is not None:
+        response['effort'] = effort
+    return response
+
+def run_detection(file, detect_bytes, detect_path, timer):
+    """
+    Run detection on an upload in memory, using UPLOAD_FOLDER only as a fallback
+    
+    Args:
+        file (FileStorage): The uploaded file
+        detect_bytes (callable): Detector entry point taking the upload bytes
+        detect_path (callable): Detector entry point taking a file path
+        timer (StageTimer): Accumulates 'upload_read', 'upload_save' and 'cleanup' seconds
+        
+    Returns:
+        dict: Detector result
+    """
+    with timer.stage('upload_read'):
+        data = file.read()
+    if IN_MEMORY_UPLOADS:
+        try:
+            return detect_bytes(data)
+        except QueueFullError:
+            raise
+        except Exception as e:
+            print(f"Warning: in-memory detection failed, retrying from disk: {str(e)}")
+    
+    filename = secure_filename(file.filename)
+    unique_filename = f"{str(uuid.uuid4())}_{filename}"
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+    with timer.stage('upload_save'):
+        with open(filepath, 'wb') as f:
+            f.write(data)
+    
+    try:
+        return detect_path(filepath)
+    finally:
+        # Clean up
+        with timer.stage('cleanup'):
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+def run_video_job(job, progress):
+    """Job handler: score a queued video, reporting frames as they are scored"""
+    result = job_video_detector.detect(job['media_path'], progress=progress,
+                                       adaptive=job['params'].get('adaptive'))
+    if metrics is not None:
+        metrics.observe_timings('stage_duration_seconds', result['timings'], {'endpoint': 'video_job'})
+    # Per-frame results are already stored as progress; keep only the summary
+    summary = {
+        'result': 'fake' if result['is_fake'] else 'real',
+        'confidence': float(result['confidence']),
+        'fake_frame_ratio': result['fake_frame_ratio'],
+        'frames_analyzed': result['frames_analyzed']
+    }
+    for key in ('frames_scored', 'frames_available', 'stop_reason', 'frames_reused'):
+        if key in result:
+            summary[key] = result[key]
+    return summary
+
+# Persistent job queue; unfinished jobs are picked up again after a restart
+job_store = JobStore(JOBS_DB_PATH)
+job_runner = JobRunner(job_store, {'video': run_video_job}, workers=JOB_WORKERS,
+                       poll_interval=JOB_POLL_INTERVAL, stale_after=JOB_STALE_SECONDS)
+
+def analyze_upload(upload, state, complete):
+    """
+    Upload analyzer handler: score what has arrived of a chunked upload
+    
+    Video frames and audio windows go through the background job detectors, so
+    interactive requests never queue behind them. Once the upload is complete,
+    returns the response of the matching /api/detect/* endpoint.
+    """
+    path = upload['path']
+    params = upload['params']
+    if upload['kind'] == 'video':
+        if not complete:
+            job_video_detector.score_received(path, state)
+            return None
+        result = job_video_detector.detect_received(path, state)
+        response = {
+            'result': 'fake' if result['is_fake'] else 'real',
+            'confidence': float(result['confidence']),
+            'frame_analysis': result['frame_analysis'],
+            'frames_scored_before_finalize': result['frames_scored_before_finalize']
+        }
+    elif params['windowed']:
+        if not complete:
+            job_audio_detector.score_received(path, state)
+            return None
+        result = job_audio_detector.detect_received(path, state, return_spectrogram=params['spectrogram'])
+        response = {
+            'result': 'fake' if result['is_fake'] else 'real',
+            'confidence': float(result['confidence']),
+            'windows_analyzed': result['windows_analyzed'],
+            'windows_available': result['windows_available'],
+            'window_analysis': result['window_analysis'],
+            'windows_scored_before_finalize': result['windows_scored_before_finalize']
+        }
+    else:
+        # Only the first 5 seconds are scored, in one go once the upload is complete
+        if not complete:
+            return None
+        result = job_audio_detector.detect(path, return_spectrogram=params['spectrogram'], windowed=False)
+        response = {'result': 'fake' if result['is_fake'] else 'real', 'confidence': float(result['confidence'])}
+    if params.get('spectrogram') and 'spectrogram' in result:
+        response['spectrogram'] = f"data:image/png;base64,{result['spectrogram']}"
+    response['timings'] = result['timings']
+    return response
+
+# Chunked uploads; their files, progress and verdicts are shared by all workers on the host
+upload_store = UploadStore(UPLOADS_DB_PATH, UPLOADS_FOLDER, max_size=UPLOAD_MAX_SIZE,
+                           quota=UPLOAD_DISK_QUOTA, ttl=UPLOAD_TTL)
+upload_analyzer = UploadAnalyzer(upload_store, {'video': analyze_upload, 'audio': analyze_upload},
+                                 workers=UPLOAD_ANALYSIS_WORKERS)
+
+def upload_response(upload):
+    """Public view of a chunked upload: offset to resume from, analysis progress and, when done, the result"""
+    response = {
+        'upload_id': upload['id'],
+        'kind': upload['kind'],
+        'status': upload['status'],
+        'offset': upload['received'],
+        'size': upload['size']
+    }
+    if upload['status'] == 'receiving':
+        state = upload['state']
+        response['chunk_size'] = UPLOAD_CHUNK_SIZE
+        response['analyzed'] = ({'frames': len(state.get('frames', {}))} if upload['kind'] == 'video'
+                                else {'windows': len(state.get('windows', {}))})
+    elif upload['status'] == 'done':
+        response.update({key: value for key, value in upload['result'].items() if key != 'timings'})
+    else:
+        response['error'] = upload['error']
+    return response
+
+def job_response(job, frame_analysis=True):
+    """Public view of a job: status, progress, partial frame analysis and, when done, the result"""
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': {'frames_done': job['frames_done'], 'frames_total': job['frames_total']}
+    }
+    if frame_analysis:
+        response['frame_analysis'] = dict(job_store.frames(job['id']))
+    if job['status'] == 'done':
+        response.update(job['result'])
+    elif job['status'] == 'failed':
+        response['error'] = job['error']
+    return response
+
+# Readiness (GET /api/ready): set once this process has built its models and run one inference
+ready = threading.Event()
+warm_up_state = {'pid': None, 'error': None}
+warm_up_lock = threading.Lock()
+
+def warm_up():
+    """Build the serving models and run one inference through each, then report ready"""
+    start_time = time.perf_counter()
+    for detector in (image_detector, audio_detector):
+        detector.warm_up()
+    if LOAD_CONTROL:
+        # Reduced-size networks too, so the first request shed under load does not build one
+        for size in sorted({level['resolution'] for level in load_controller.levels[1:]}):
+            image_detector.at_resolution(size).warm_up()
+    ready.set()
+    if metrics is not None:
+        metrics.observe('warm_up_seconds', time.perf_counter() - start_time)
+
+def start_warm_up():
+    """Warm up on a background thread, once per process (e.g. in each gunicorn worker after the fork)"""
+    with warm_up_lock:
+        if warm_up_state['pid'] == os.getpid():
+            return
+        warm_up_state['pid'] = os.getpid()
+    
+    def run():
+        try:
+            warm_up()
+        except Exception as e:
+            warm_up_state['error'] = str(e)
+            print(f"Warning: warm-up failed: {str(e)}")
+    
+    threading.Thread(target=run, name='warm-up', daemon=True).start()
+
+# A prefork master must not run TensorFlow or start threads; gunicorn.conf.py warms up each worker
+if not PREFORK_SERVER:
+    if PRELOAD_MODELS:
+        warm_up()
+    job_runner.start()
+
+@app.before_request
+def start_job_workers():
+    # Threads do not survive a fork (e.g. gunicorn --preload); no-op once running in this process
+    job_runner.start()
+
+@app.before_request
+def start_request_timer():
+    g.start_time = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    """Count the request and record its latency and stage timings"""
+    if metrics is None or request.endpoint is None or 'start_time' not in g:
+        return response
+    labels = {'endpoint': request.endpoint}
+    metrics.inc('requests_total', {**labels, 'status': str(response.status_code)})
+    if response.status_code >= 500:
+        metrics.inc('request_errors_total', labels)
+    metrics.observe('request_duration_seconds', time.perf_counter() - g.start_time, labels)
+    if 'timings' in g:
+        metrics.observe_timings('stage_duration_seconds', g.timings, labels)
+    return response
+
+@app.after_request
+def end_load_ticket(response):
+    """Release the request's load ticket; successful detections update the latency estimates"""
+    ticket = g.pop('load_ticket', None)
+    if ticket is not None:
+        # Requests that waited for a model to be built are not representative either
+        load_controller.end(ticket, record=(response.status_code == 200 and not ticket.get('cached')
+                                            and registry.builds == ticket['builds']))
+    return response
+
+@app.teardown_request
+def release_load_ticket(exc):
+    # after_request handlers are skipped when a view raises
+    ticket = g.pop('load_ticket', None)
+    if ticket is not None:
+        load_controller.end(ticket, record=False)
 
 def allowed_file(filename, allowed_extensions):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
+def is_true(value):
+    return str(value).lower() in ('1', 'true', 'yes')
+
+def batch_items(files):
+    """
+    (filename, bytes) for every file of a batch upload, expanding .zip archives
+    
+    Raises:
+        ValueError: If the batch exceeds BATCH_UPLOAD_MAX_FILES or BATCH_UPLOAD_MAX_BYTES, or a zip is invalid
+    """
+    items = []
+    total_bytes = 0
+    for file in files:
+        data = file.read()
+        if not file.filename.lower().endswith('.zip'):
+            members = [(file.filename, len(data), lambda data=data: data)]
+        else:
+            try:
+                archive = zipfile.ZipFile(io.BytesIO(data))
+            except zipfile.BadZipFile:
+                raise ValueError(f"Invalid zip archive: {file.filename}")
+            # Sizes come from the central directory, so limits are checked before anything is inflated
+            members = [(info.filename, info.file_size, lambda info=info, archive=archive: archive.read(info))
+                       for info in archive.infolist()
+                       if not info.is_dir() and not info.filename.startswith('__MACOSX/')]
+        
+        for filename, size, read in members:
+            total_bytes += size
+            if len(items) >= BATCH_UPLOAD_MAX_FILES:
+                raise ValueError(f"Too many files, at most {BATCH_UPLOAD_MAX_FILES} per batch")
+            if total_bytes > BATCH_UPLOAD_MAX_BYTES:
+                raise ValueError(f"Batch too large, at most {BATCH_UPLOAD_MAX_BYTES} bytes uncompressed")
+            items.append((filename, read()))
+    return items
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'ok', 'message': 'FDPA API is running'})
 
+@app.route('/api/ready', methods=['GET'])
+def readiness():
+    # The first probe starts warm-up if nothing else has (e.g. PRELOAD_MODELS off, no gunicorn.conf.py)
+    start_warm_up()
+    if ready.is_set():
+        return jsonify({'status': 'ready'})
+    if warm_up_state['error']:
+        return jsonify({'status': 'failed', 'error': warm_up_state['error']}), 503
+    return jsonify({'status': 'starting'}), 503
+
+@app.route('/api/models', methods=['GET'])
+def model_stats():
+    return jsonify(registry.stats())
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics_text():
+    if metrics is None:
+        return jsonify({'enabled': False}), 404
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/load', methods=['GET'])
+def load_stats():
+    return jsonify({'load_control': LOAD_CONTROL, **load_controller.stats()})
+
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    if result_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **result_cache.stats()})
+
 @app.route('/api/detect/image', methods=['POST'])
 def detect_image():
     if 'file' not in request.files:
@@ -49,29 +538,42 @@ def detect_image():
         return jsonify({'error': 'No selected file'}), 400
     
     if file and allowed_file(file.filename, ALLOWED_IMAGE_EXTENSIONS):
-        filename = secure_filename(file.filename)
-        unique_filename = f"{str(uuid.uuid4())}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        # Effort level fitting the request's latency budget, e.g. ?budget_ms=500
+        try:
+            effort = begin_effort('image')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        detector, _, _ = effort_detectors(effort)
+        
+        # Serve repeat uploads from the result cache
+        start_time = time.time()
+        timer = StageTimer()
+        cache_key, cached = cache_lookup('image', file, {**face_params, **effort_params(effort)}, timer)
+        if cached is not None:
+            return jsonify(with_timings(with_effort(
+                {**cached, 'cached': True, 'processing_time': time.time() - start_time}, effort
+            ), timer.as_dict()))
         
         try:
             # Process the image
             start_time = time.time()
-            result = image_detector.detect(filepath)
+            result = run_detection(file, detector.detect_bytes, detector.detect, timer)
             processing_time = time.time() - start_time
             
-            # Clean up
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            
-            return jsonify({
+            response = {
                 'result': 'fake' if result['is_fake'] else 'real',
-                'confidence': float(result['confidence']),
-                'processing_time': processing_time
-            })
+                'confidence': float(result['confidence'])
+            }
+            if 'faces' in result:
+                response['faces'] = result['faces']
+                response['face_fallback'] = result['face_fallback']
+            cache_store(cache_key, response)
+            return jsonify(with_timings(with_effort(
+                {**response, 'cached': False, 'processing_time': processing_time}, effort
+            ), {**timer.as_dict(), **result['timings']}))
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 503
         except Exception as e:
-            if os.path.exists(filepath):
-                os.remove(filepath)
             return jsonify({'error': str(e)}), 500
     
     return jsonify({'error': 'File type not allowed'}), 400
@@ -85,35 +587,215 @@ def detect_video():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     
+    # Early exit once the verdict is settled, e.g. ?adaptive=true (defaults to VIDEO_ADAPTIVE)
+    adaptive = is_true(request.values.get('adaptive', VIDEO_ADAPTIVE))
+    
     if file and allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
-        filename = secure_filename(file.filename)
-        unique_filename = f"{str(uuid.uuid4())}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        # Effort level fitting the request's latency budget, e.g. ?budget_ms=500
+        try:
+            effort = begin_effort('video')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        _, detector, _ = effort_detectors(effort)
+        
+        # Serve repeat uploads from the result cache
+        start_time = time.time()
+        timer = StageTimer()
+        cache_key, cached = cache_lookup('video', file, {
+            'frames_per_second': video_detector.frames_per_second,
+            'threshold': video_detector.threshold,
+            'max_frames': video_detector.max_frames,
+            'sampling_strategy': video_detector.sampling_strategy,
+            'dedup_threshold': video_detector.dedup_threshold,
+            **face_params,
+            **({**video_adaptive_options, 'adaptive': True} if adaptive else {}),
+            **effort_params(effort)
+        }, timer)
+        if cached is not None:
+            return jsonify(with_timings(with_effort(
+                {**cached, 'cached': True, 'processing_time': time.time() - start_time}, effort
+            ), timer.as_dict()))
         
         try:
             # Process the video
             start_time = time.time()
-            result = video_detector.detect(filepath)
+            suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+            result = run_detection(
+                file,
+                lambda data: detector.detect_bytes(data, suffix=suffix, adaptive=adaptive),
+                lambda path: detector.detect(path, adaptive=adaptive),
+                timer
+            )
             processing_time = time.time() - start_time
             
-            # Clean up
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            
-            return jsonify({
+            response = {
                 'result': 'fake' if result['is_fake'] else 'real',
                 'confidence': float(result['confidence']),
-                'frame_analysis': result.get('frame_analysis', {}),
-                'processing_time': processing_time
-            })
+                'frame_analysis': result.get('frame_analysis', {})
+            }
+            if adaptive:
+                response['frames_scored'] = result['frames_scored']
+                response['frames_available'] = result['frames_available']
+                response['stop_reason'] = result['stop_reason']
+            if 'frames_reused' in result:
+                response['frames_reused'] = result['frames_reused']
+            cache_store(cache_key, response)
+            return jsonify(with_timings(with_effort(
+                {**response, 'cached': False, 'processing_time': processing_time}, effort
+            ), {**timer.as_dict(), **result['timings']}))
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 503
         except Exception as e:
-            if os.path.exists(filepath):
-                os.remove(filepath)
             return jsonify({'error': str(e)}), 500
     
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/api/jobs/video', methods=['POST'])
+def create_video_job():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if file and allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
+        # The upload stays in JOBS_FOLDER until the job finishes, so it survives restarts
+        filename = secure_filename(file.filename)
+        filepath = os.path.join(JOBS_FOLDER, f"{str(uuid.uuid4())}_{filename}")
+        file.save(filepath)
+        
+        # Early exit, e.g. ?adaptive=true (defaults to VIDEO_ADAPTIVE)
+        adaptive = is_true(request.values.get('adaptive', VIDEO_ADAPTIVE))
+        job_id = job_store.create('video', filepath, {'filename': filename, 'adaptive': adaptive})
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+    
+    return jsonify({'error': 'File type not allowed'}), 400
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_response(job))
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-sent events: one 'frame' event per scored frame, then 'done' or 'failed'"""
+    if job_store.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def stream():
+        sent = 0
+        while True:
+            job = job_store.get(job_id)
+            for name, frame in job_store.frames(job_id, start=sent):
+                sent += 1
+                event = {'frame': name, **frame, 'frames_done': sent, 'frames_total': job['frames_total']}
+                yield f"event: frame\ndata: {json.dumps(event)}\n\n"
+            
+            if job['status'] in ('done', 'failed'):
+                yield f"event: {job['status']}\ndata: {json.dumps(job_response(job, frame_analysis=False))}\n\n"
+                return
+            time.sleep(JOB_POLL_INTERVAL)
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload():
+    """
+    Start a chunked upload, e.g. ?filename=talk.mkv&size=734003200
+    
+    Chunks then go to PATCH /api/uploads/<id>?offset=<bytes received> as the raw
+    request body; after a dropped connection, GET /api/uploads/<id> gives the
+    offset to resume from. Frames and audio windows are scored as they arrive,
+    so POST /api/uploads/<id>/finalize only has the tail left to analyze.
+    """
+    filename = secure_filename(request.values.get('filename', ''))
+    if allowed_file(filename, ALLOWED_VIDEO_EXTENSIONS):
+        kind = 'video'
+    elif allowed_file(filename, ALLOWED_AUDIO_EXTENSIONS):
+        kind = 'audio'
+    else:
+        return jsonify({'error': 'File type not allowed'}), 400
+    
+    try:
+        size = int(request.values.get('size', ''))
+        if size <= 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'size must be a positive number of bytes'}), 400
+    
+    # Windowed audio by default: large files are what chunked uploads are for
+    params = {
+        'windowed': is_true(request.values.get('windowed', True)),
+        'spectrogram': is_true(request.values.get('spectrogram'))
+    }
+    try:
+        upload = upload_store.create(kind, filename, size, params)
+    except UploadLimitError as e:
+        return jsonify({'error': str(e)}), 413 if size > UPLOAD_MAX_SIZE else 507
+    return jsonify(upload_response(upload)), 201
+
+@app.route('/api/uploads', methods=['GET'])
+def upload_stats():
+    return jsonify(upload_store.stats())
+
+@app.route('/api/uploads/<upload_id>', methods=['PATCH'])
+def append_upload(upload_id):
+    try:
+        offset = int(request.args.get('offset', ''))
+    except ValueError:
+        return jsonify({'error': 'offset must be the number of bytes already sent'}), 400
+    if request.content_length is not None and request.content_length > UPLOAD_CHUNK_SIZE:
+        return jsonify({'error': f"Chunk too large, at most {UPLOAD_CHUNK_SIZE} bytes"}), 413
+    
+    data = request.get_data(cache=False)
+    try:
+        upload = upload_store.append(upload_id, offset, data)
+    except UploadError as e:
+        upload = upload_store.get(upload_id)
+        return jsonify({'error': str(e), 'offset': upload['received'] if upload else None}), 409
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    
+    upload_analyzer.notify(upload_id)
+    return jsonify(upload_response(upload))
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    upload = upload_store.get(upload_id)
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify(upload_response(upload))
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def delete_upload(upload_id):
+    if not upload_store.delete(upload_id):
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify({'upload_id': upload_id, 'status': 'deleted'})
+
+@app.route('/api/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    start_time = time.time()
+    try:
+        upload = upload_analyzer.finalize(upload_id)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), 409
+    except TRANSIENT_ERRORS as e:
+        # Nothing was recorded; the client retries finalize
+        return jsonify({'error': str(e)}), 503
+    if upload is None:
+        return jsonify({'error': 'Upload not found'}), 404
+    if upload['status'] == 'failed':
+        return jsonify(upload_response(upload)), 500
+    
+    return jsonify(with_timings(
+        {**upload_response(upload), 'processing_time': time.time() - start_time},
+        upload['result'].get('timings', {})
+    ))
+
 @app.route('/api/detect/audio', methods=['POST'])
 def detect_audio():
     if 'file' not in request.files:
@@ -123,33 +805,166 @@ def detect_audio():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
     
+    # Opt-in spectrogram visualization, e.g. ?spectrogram=true
+    return_spectrogram = is_true(request.values.get('spectrogram'))
+    # Whole-file sliding-window analysis, e.g. ?windowed=true (defaults to AUDIO_WINDOWED)
+    windowed = is_true(request.values.get('windowed', AUDIO_WINDOWED))
+    
     if file and allowed_file(file.filename, ALLOWED_AUDIO_EXTENSIONS):
-        filename = secure_filename(file.filename)
-        unique_filename = f"{str(uuid.uuid4())}_{filename}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        # Effort level fitting the request's latency budget, e.g. ?budget_ms=500
+        try:
+            effort = begin_effort('audio_windowed' if windowed else 'audio')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        _, _, detector = effort_detectors(effort)
+        
+        # Serve repeat uploads from the result cache
+        start_time = time.time()
+        timer = StageTimer()
+        cache_key, cached = cache_lookup('audio', file, {
+            'duration': audio_detector.duration,
+            'windowed': windowed,
+            'spectrogram': return_spectrogram,
+            'max_windows': audio_detector.max_windows,
+            'window_hop': audio_detector.window_hop,
+            'window_aggregate': audio_detector.window_aggregate,
+            'decoder': AUDIO_DECODER,
+            'resampler': AUDIO_RESAMPLER,
+            'features': AUDIO_FEATURES,
+            **effort_params(effort)
+        }, timer)
+        if cached is not None:
+            return jsonify(with_timings(with_effort(
+                {**cached, 'cached': True, 'processing_time': time.time() - start_time}, effort
+            ), timer.as_dict()))
         
         try:
             # Process the audio
             start_time = time.time()
-            result = audio_detector.detect(filepath)
+            result = run_detection(
+                file,
+                lambda data: detector.detect_bytes(data, return_spectrogram=return_spectrogram, windowed=windowed),
+                lambda path: detector.detect(path, return_spectrogram=return_spectrogram, windowed=windowed),
+                timer
+            )
             processing_time = time.time() - start_time
             
-            # Clean up
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            
-            return jsonify({
+            response = {
                 'result': 'fake' if result['is_fake'] else 'real',
-                'confidence': float(result['confidence']),
-                'processing_time': processing_time
-            })
+                'confidence': float(result['confidence'])
+            }
+            if windowed:
+                response['windows_analyzed'] = result['windows_analyzed']
+                response['windows_available'] = result['windows_available']
+                response['window_analysis'] = result['window_analysis']
+            if return_spectrogram:
+                response['spectrogram'] = f"data:image/png;base64,{result['spectrogram']}"
+            cache_store(cache_key, response)
+            return jsonify(with_timings(with_effort(
+                {**response, 'cached': False, 'processing_time': processing_time}, effort
+            ), {**timer.as_dict(), **result['timings']}))
+        except QueueFullError as e:
+            return jsonify({'error': str(e)}), 503
         except Exception as e:
-            if os.path.exists(filepath):
-                os.remove(filepath)
             return jsonify({'error': str(e)}), 500
     
     return jsonify({'error': 'File type not allowed'}), 400
 
+@app.route('/api/detect/batch', methods=['POST'])
+def detect_batch():
+    # Several 'file' parts, each a media file or a .zip of media files
+    files = [file for file in request.files.getlist('file') if file.filename != '']
+    if not files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    start_time = time.time()
+    timer = StageTimer()
+    try:
+        # Batches are managed only with an explicit ?budget_ms=, since their size varies so much
+        effort = begin_effort('batch')
+        with timer.stage('upload_read'):
+            items = batch_items(files)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Same options as the single-file endpoints; per-frame/window/face results with ?details=true
+    scanner = BatchScanner(
+        *effort_detectors(effort),
+        {'image': ALLOWED_IMAGE_EXTENSIONS, 'video': ALLOWED_VIDEO_EXTENSIONS, 'audio': ALLOWED_AUDIO_EXTENSIONS},
+        workers=BATCH_UPLOAD_WORKERS,
+        batch_size=BATCH_MAX_SIZE,
+        video_options={'adaptive': is_true(request.values.get('adaptive', VIDEO_ADAPTIVE))},
+        audio_options={'windowed': is_true(request.values.get('windowed', AUDIO_WINDOWED))},
+        details=is_true(request.values.get('details'))
+    )
+    try:
+        with timer.stage('detection'):
+            results = scanner.scan_all(items)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    response = {
+        'results': results,
+        'files': len(results),
+        'errors': sum('error' in result for result in results),
+        'processing_time': time.time() - start_time
+    }
+    return jsonify(with_timings(with_effort(response, effort), timer.as_dict()))
+
+@app.route('/api/embeddings', methods=['POST'])
+def create_embeddings():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+    
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+    
+    if allowed_file(file.filename, ALLOWED_IMAGE_EXTENSIONS):
+        kind = 'image'
+    elif allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
+        kind = 'video'
+    else:
+        return jsonify({'error': 'File type not allowed'}), 400
+    
+    try:
+        start_time = time.time()
+        content_hash, _ = hash_stream(file.stream)
+        data = file.read()
+        if kind == 'image':
+            timestamps, embeddings = np.zeros(1), image_detector.embed_bytes(data)[np.newaxis]
+        else:
+            with memory_file(data, suffix='.' + file.filename.rsplit('.', 1)[1].lower()) as video_path:
+                timestamps, embeddings = video_detector.embed(video_path)
+        if embedding_store is not None:
+            embedding_store.put(content_hash, timestamps, embeddings, kind=kind)
+        
+        return jsonify({
+            'content_hash': content_hash,
+            'kind': kind,
+            'dim': embeddings.shape[1],
+            'timestamps': timestamps.tolist(),
+            'embeddings': embeddings.tolist(),
+            'stored': embedding_store is not None,
+            'processing_time': time.time() - start_time
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/embeddings/<content_hash>', methods=['GET'])
+def get_embeddings(content_hash):
+    if embedding_store is None:
+        return jsonify({'error': 'Embedding store is disabled'}), 404
+    kind, timestamps, embeddings = embedding_store.get(content_hash)
+    if kind is None:
+        return jsonify({'error': 'Embeddings not found'}), 404
+    return jsonify({
+        'content_hash': content_hash,
+        'kind': kind,
+        'dim': embeddings.shape[1],
+        'timestamps': timestamps.tolist(),
+        'embeddings': embeddings.astype(np.float32).tolist()
+    })
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Compare full-scan and adaptive (early-exit) video detection
+
+Scores synthetic videos of several lengths both ways (random weights) and
+reports latency, frames scored and whether the verdicts agree.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_adaptive [--lengths 30 120 300] [--min-frames 8]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.bench_frame_sampling import make_video
+from models.image_detector import ImageDetector
+from models.video_detector import VideoDetector
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[30, 120, 300], help="Video lengths in seconds")
+    parser.add_argument('--min-frames', type=int, default=8)
+    parser.add_argument('--max-frames', type=int, default=None)
+    parser.add_argument('--step', type=int, default=8)
+    args = parser.parse_args()
+    
+    detector = VideoDetector(
+        image_detector=ImageDetector(base_weights=None),
+        adaptive_min_frames=args.min_frames,
+        adaptive_max_frames=args.max_frames,
+        adaptive_step=args.step
+    )
+    
+    temp_dir = tempfile.mkdtemp()
+    try:
+        print(f"{'seconds':>8}{'full s':>9}{'frames':>8}{'adaptive s':>12}{'frames':>8}{'speedup':>9}  {'stop':<10}agree")
+        for seconds in args.lengths:
+            path = os.path.join(temp_dir, f"{seconds}s.mp4")
+            make_video(path, seconds, 30, 640, 360)
+            detector.detect(path, adaptive=True)  # build the model and warm caches
+            
+            start_time = time.perf_counter()
+            full = detector.detect(path, adaptive=False)
+            full_time = time.perf_counter() - start_time
+            
+            start_time = time.perf_counter()
+            adaptive = detector.detect(path, adaptive=True)
+            adaptive_time = time.perf_counter() - start_time
+            
+            agree = 'yes' if full['is_fake'] == adaptive['is_fake'] else 'NO'
+            print(f"{seconds:>8}{full_time:>9.2f}{full['frames_analyzed']:>8}{adaptive_time:>12.2f}"
+                  f"{adaptive['frames_scored']:>8}{full_time / adaptive_time:>8.1f}x  {adaptive['stop_reason']:<10}{agree}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare audio decode/resample/spectrogram paths against the original create_spectrogram
+
+Each configuration is timed on synthetic audio files and its model input is
+checked against the librosa reference within a numeric tolerance.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_audio_loading [--repeat 5] [--tolerance 0.02]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from models.audio_detector import AudioDetector
+from utils.preprocessing import AudioLoader
+
+# (name, seconds, sample rate, channels, format)
+AUDIO_SPECS = [
+    ('10s_44k_stereo', 10, 44100, 2, 'WAV'),
+    ('60s_48k_mono', 60, 48000, 1, 'WAV'),
+    ('10s_22k_mono', 10, 22050, 1, 'WAV'),
+    ('30s_44k_stereo', 30, 44100, 2, 'MP3'),
+]
+
+# (decoder, resampler, spectrogram backend); the first is the reference
+CONFIGS = [
+    ('librosa', 'soxr_hq', 'librosa'),
+    ('soundfile', 'soxr_hq', 'librosa'),
+    ('soundfile', 'soxr_hq', 'numpy'),
+    ('soundfile', 'soxr_qq', 'numpy'),
+    ('soundfile', 'polyphase', 'numpy'),
+]
+
+def make_audio(path, seconds, sample_rate, channels, fmt):
+    """
+    Write a synthetic chirp-plus-noise file
+    
+    Returns:
+        bool: False if libsndfile cannot write this format
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * sample_rate) / sample_rate
+    y = 0.4 * np.sin(2 * np.pi * (200 + 300 * t) * t) + 0.05 * rng.standard_normal(len(t))
+    data = np.stack([y] * channels, axis=1).astype(np.float32)
+    try:
+        sf.write(path, data, sample_rate, format=fmt)
+    except Exception:
+        return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.02,
+                        help="Max abs difference of the normalized model input")
+    args = parser.parse_args()
+    
+    temp_dir = tempfile.mkdtemp()
+    failed = False
+    try:
+        print(f"{'audio':<16}{'decoder':<11}{'resampler':<11}{'features':<10}{'ms':>9}{'speedup':>9}{'max diff':>11}")
+        for name, seconds, sample_rate, channels, fmt in AUDIO_SPECS:
+            path = os.path.join(temp_dir, f"{name}.{fmt.lower()}")
+            if not make_audio(path, seconds, sample_rate, channels, fmt):
+                print(f"{name:<16}skipped: libsndfile cannot write {fmt}")
+                continue
+            
+            reference, reference_ms = None, None
+            for decoder, res_type, features in CONFIGS:
+                detector = AudioDetector(
+                    audio_loader=AudioLoader(decoder=decoder, res_type=res_type),
+                    feature_backend=features
+                )
+                detector.create_spectrogram(path)  # warm caches and JIT
+                start_time = time.perf_counter()
+                for _ in range(args.repeat):
+                    spectrogram = detector.create_spectrogram(path)
+                elapsed_ms = (time.perf_counter() - start_time) / args.repeat * 1000
+                
+                if reference is None:
+                    reference, reference_ms = spectrogram, elapsed_ms
+                diff = float(np.max(np.abs(spectrogram - reference)))
+                status = '' if diff <= args.tolerance else '  FAIL'
+                failed = failed or bool(status)
+                print(f"{name:<16}{decoder:<11}{res_type:<11}{features:<10}{elapsed_ms:>9.2f}"
+                      f"{reference_ms / elapsed_ms:>8.1f}x{diff:>11.2e}{status}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    if failed:
+        print(f"Some configurations exceed the tolerance of {args.tolerance}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare latency of each inference backend and check score parity against Keras
+
+Models use random weights, so no network access or weight files are needed.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_backends [--runs 20] [--tolerance 1e-4] [--backends keras function tflite]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from models.backends import BACKENDS
+from models.image_detector import ImageDetector
+from models.audio_detector import AudioDetector
+
+def time_calls(fn, runs, warmup=3):
+    """
+    Time repeated calls of fn
+    
+    Returns:
+        tuple: (p50, p99) latency in milliseconds
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+def make_detector(kind, backend, export_dir, num_threads):
+    """
+    Build a detector with random weights for the given backend
+    """
+    suffix = '.tflite' if backend == 'tflite' else f"_{backend}"
+    options = {'export_path': os.path.join(export_dir, f"{kind}{suffix}"), 'num_threads': num_threads}
+    if kind == 'image':
+        return ImageDetector(backend=backend, backend_options=options, base_weights=None)
+    return AudioDetector(backend=backend, backend_options=options)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--tolerance', type=float, default=1e-4)
+    parser.add_argument('--threads', type=int, default=os.cpu_count())
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    inputs = {
+        'image': rng.uniform(0, 255, (16, 224, 224, 3)).astype(np.float32),
+        'audio': rng.uniform(0, 1, (16, 128, 216, 1)).astype(np.float32),
+    }
+    
+    export_dir = tempfile.mkdtemp()
+    parity_ok = True
+    try:
+        print(f"{'model':<8}{'backend':<12}{'b1 p50':>10}{'b1 p99':>10}{'b16 p50':>10}{'b16 p99':>10}{'max diff':>12}")
+        for kind, batch in inputs.items():
+            reference = make_detector(kind, 'keras', export_dir, args.threads).backend.predict(batch)
+            
+            for backend_name in args.backends:
+                backend = make_detector(kind, backend_name, export_dir, args.threads).backend
+                single = time_calls(lambda: backend.predict(batch[:1]), args.runs)
+                full = time_calls(lambda: backend.predict(batch, batch_size=16), args.runs)
+                
+                diff = float(np.max(np.abs(backend.predict(batch) - reference)))
+                status = '' if diff <= args.tolerance else '  FAIL'
+                parity_ok = parity_ok and not status
+                print(f"{kind:<8}{backend_name:<12}{single[0]:>10.2f}{single[1]:>10.2f}"
+                      f"{full[0]:>10.2f}{full[1]:>10.2f}{diff:>12.2e}{status}")
+    finally:
+        shutil.rmtree(export_dir, ignore_errors=True)
+    
+    if not parity_ok:
+        print(f"Score parity check failed (tolerance {args.tolerance})")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
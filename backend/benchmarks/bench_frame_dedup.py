@@ -0,0 +1,97 @@
+"""
+Measure compute saved and score drift from temporal frame deduplication
+
+Scores a synthetic near-static video (a fixed scene with sensor noise and a
+few scene cuts) and a synthetic high-motion video with and without
+deduplication (random weights), and reports frames reused, wall time and how
+far the reused frames' scores are from their own.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_frame_dedup [--seconds 60] [--fps 2] [--thresholds 0.01 0.02 0.05] [--repeat 3]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import cv2
+
+from benchmarks.bench_pipeline import run
+from models.image_detector import ImageDetector
+from models.video_detector import VideoDetector
+
+def make_scene_video(path, seconds, fps, width, height, motion, cuts=3):
+    """
+    Write a synthetic video of smooth scenes with sensor noise
+    
+    Args:
+        path (str): Output path (.mp4)
+        seconds (int): Clip length
+        fps (int): Frame rate
+        width (int): Frame width
+        height (int): Frame height
+        motion (bool): Pan the scene and move a shape quickly; otherwise the camera is still
+        cuts (int): Scene changes over the clip
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    total = seconds * fps
+    a = b = c = 0.0
+    for i in range(total):
+        if i % max(1, total // (cuts + 1)) == 0:
+            a, b, c = rng.uniform(0.005, 0.03, 3)
+        shift = 6.0 * i if motion else 0.0
+        frame = np.stack([127 + 100 * np.sin(a * (x + shift) + b * y), 127 + 100 * np.cos(b * (x + shift)),
+                          127 + 100 * np.sin(c * y + 0.05 * shift)], axis=2)
+        frame += rng.normal(0, 3, frame.shape)
+        frame = np.clip(frame, 0, 255).astype(np.uint8)
+        if motion:
+            cv2.circle(frame, (i * 23 % width, height // 2), height // 4, (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=60)
+    parser.add_argument('--fps', type=float, default=2, help="Frames sampled per second of video")
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.01, 0.02, 0.05])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    image_detector = ImageDetector(base_weights=None)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        videos = {
+            'static': os.path.join(temp_dir, 'static.mp4'),
+            'motion': os.path.join(temp_dir, 'motion.mp4'),
+        }
+        make_scene_video(videos['static'], args.seconds, 30, 640, 360, motion=False)
+        make_scene_video(videos['motion'], args.seconds, 30, 640, 360, motion=True)
+        
+        print(f"{'video':<8}{'threshold':>10}{'frames':>8}{'reused':>8}{'seconds':>9}{'saved':>8}"
+              f"{'max diff':>10}{'mean diff':>11}  agree")
+        for name, path in videos.items():
+            full_detector = VideoDetector(frames_per_second=args.fps, image_detector=image_detector)
+            full_detector.detect(path)  # build the model and warm caches
+            full_time, full = run(lambda: full_detector.detect(path), args.repeat)
+            reference = np.array([entry['confidence'] for entry in full['frame_analysis'].values()])
+            print(f"{name:<8}{'off':>10}{full['frames_analyzed']:>8}{0:>8}{full_time:>9.2f}{'':>8}{'':>10}{'':>11}")
+            
+            for threshold in args.thresholds:
+                detector = VideoDetector(frames_per_second=args.fps, image_detector=image_detector,
+                                         dedup_threshold=threshold)
+                elapsed, result = run(lambda: detector.detect(path), args.repeat)
+                
+                scores = np.array([entry['confidence'] for entry in result['frame_analysis'].values()])
+                diff = np.abs(scores - reference)
+                saved = 1 - elapsed / full_time
+                agree = 'yes' if result['is_fake'] == full['is_fake'] else 'NO'
+                print(f"{name:<8}{threshold:>10.3f}{result['frames_analyzed']:>8}{result['frames_reused']:>8}"
+                      f"{elapsed:>9.2f}{saved:>7.0%} {diff.max():>10.2e}{diff.mean():>11.2e}  {agree}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
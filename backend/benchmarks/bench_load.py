@@ -0,0 +1,220 @@
+"""
+Load test: p99 latency and throughput of /api/detect/video under a traffic spike, with and without load control
+
+Each scenario starts the API in its own server process (random weights, no
+result cache), sends --calibrate sequential requests so the load controller
+learns the clip's cost, then replays the same Poisson arrival sequence at
+--overload times the full-effort capacity for --seconds. Scenarios:
+
+    off     every request at full effort (LOAD_CONTROL=False)
+    target  LOAD_CONTROL=True with LOAD_VIDEO_TARGET set to the budget
+    budget  LOAD_CONTROL=False, each request sending ?budget_ms=
+
+The budget defaults to --budget-factor times the full-effort latency measured
+in the first scenario. Requests still running after --timeout seconds count as
+timed out.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_load [--seconds 60] [--overload 1.5] [--scenarios off target budget]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from benchmarks.bench_suite import multipart_body
+from benchmarks.synthetic import make_clip
+
+SCENARIOS = ('off', 'target', 'budget')
+
+def serve():
+    """
+    Entry point of a server subprocess: warm up, print the port, serve until killed
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import app as api
+    
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+    
+    api.warm_up()
+    # Per-request budgets can pick any level even without LOAD_CONTROL; build those networks now too
+    for size in sorted({level['resolution'] for level in api.load_controller.levels[1:]}):
+        api.image_detector.at_resolution(size).warm_up()
+    server = make_server('127.0.0.1', 0, api.app, threaded=True, request_handler=QuietHandler)
+    print(server.server_port, flush=True)
+    server.serve_forever()
+
+def start_server(env):
+    """
+    Start a server subprocess and wait for its port
+    
+    Returns:
+        tuple: (process, base URL)
+    """
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_load', '--serve'], env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    # The app prints model loading messages first
+    for line in process.stdout:
+        if line.strip().isdigit():
+            return process, f"http://127.0.0.1:{line.strip()}"
+    raise SystemExit(f"Server failed to start (exit code {process.wait()})")
+
+def post(url, body, content_type, timeout):
+    """
+    One request
+    
+    Returns:
+        dict: latency (seconds), status (None if timed out) and the effort level reported
+    """
+    request = urllib.request.Request(url, data=body, method='POST', headers={'Content-Type': content_type})
+    start_time = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = json.loads(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        result, status = {}, e.code
+    except (TimeoutError, urllib.error.URLError):
+        result, status = {}, None
+    return {'latency': time.perf_counter() - start_time, 'status': status,
+            'level': (result.get('effort') or {}).get('level', 0)}
+
+def open_loop(url, body, content_type, arrivals, timeout):
+    """
+    Send one request per arrival time (seconds from now), each on its own thread
+    
+    Returns:
+        tuple: (request results in arrival order, seconds until the last one finished)
+    """
+    results = [None] * len(arrivals)
+    
+    def send(i):
+        results[i] = post(url, body, content_type, timeout)
+    
+    threads = []
+    start_time = time.perf_counter()
+    for i, arrival in enumerate(arrivals):
+        delay = start_time + arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        thread = threading.Thread(target=send, args=(i,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start_time
+
+def summarize(results, seconds, timeout):
+    """
+    p50/p99 latency (timed-out requests count as timeout), goodput and effort levels of a run
+    """
+    latencies = [result['latency'] if result['status'] is not None else timeout for result in results]
+    ok = [result for result in results if result['status'] == 200]
+    levels = {}
+    for result in ok:
+        levels[result['level']] = levels.get(result['level'], 0) + 1
+    return {
+        'requests': len(results),
+        'ok': len(ok),
+        'timed_out': sum(result['status'] is None for result in results),
+        'p50_s': float(np.percentile(latencies, 50)),
+        'p99_s': float(np.percentile(latencies, 99)),
+        'throughput_rps': len(ok) / seconds,
+        'levels': dict(sorted(levels.items()))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--seconds', type=float, default=60, help="Length of the spike")
+    parser.add_argument('--overload', type=float, default=1.5, help="Arrival rate / full-effort capacity")
+    parser.add_argument('--calibrate', type=int, default=8, help="Sequential requests before the spike")
+    parser.add_argument('--budget-ms', type=float, default=None, help="Latency budget (default: measured)")
+    parser.add_argument('--budget-factor', type=float, default=4.0)
+    parser.add_argument('--timeout', type=float, default=None, help="Client timeout (default: 5 x budget)")
+    parser.add_argument('--clip-seconds', type=int, default=20)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve()
+        return
+    
+    temp_dir = tempfile.mkdtemp()
+    try:
+        clip = os.path.join(temp_dir, 'clip.mp4')
+        make_clip(clip, 'motion', args.clip_seconds, 30, 640, 360)
+        with open(clip, 'rb') as f:
+            body, content_type = multipart_body('clip.mp4', f.read())
+        base_env = {
+            **os.environ,
+            'IMAGE_BASE_WEIGHTS': 'none',
+            'MODEL_ARTIFACTS': 'False',
+            'CACHE_ENABLED': 'False',
+            'PRELOAD_MODELS': 'False',
+            'JOB_WORKERS': '0',
+            'JOBS_DB_PATH': os.path.join(temp_dir, 'jobs.sqlite3'),
+            'METRICS_DB_PATH': ''
+        }
+        
+        budget = args.budget_ms / 1000 if args.budget_ms else None
+        service_time = None
+        rows = {}
+        for scenario in args.scenarios:
+            if scenario != 'off' and budget is None:
+                raise SystemExit(f"The {scenario} scenario needs --budget-ms or an earlier 'off' scenario")
+            env = dict(base_env)
+            query = ''
+            if scenario == 'target':
+                env.update(LOAD_CONTROL='True', LOAD_VIDEO_TARGET=str(budget))
+            elif scenario == 'budget':
+                query = f"?budget_ms={budget * 1000:.0f}"
+            process = None
+            try:
+                process, base_url = start_server(env)
+                url = base_url + '/api/detect/video' + query
+                
+                # Learn the clip's cost; the first scenario also measures full-effort latency
+                latencies = [post(url, body, content_type, 600)['latency'] for _ in range(args.calibrate)]
+                if service_time is None:
+                    service_time = float(np.median(latencies[1:] or latencies))
+                    budget = budget or args.budget_factor * service_time
+                    print(f"full-effort latency {service_time:.2f}s, budget {budget:.2f}s, "
+                          f"arrivals {args.overload / service_time:.2f}/s", file=sys.stderr)
+                timeout = args.timeout or 5 * budget
+                
+                rng = random.Random(0)
+                arrivals, t = [], rng.expovariate(args.overload / service_time)
+                while t < args.seconds:
+                    arrivals.append(t)
+                    t += rng.expovariate(args.overload / service_time)
+                results, elapsed = open_loop(url, body, content_type, arrivals, timeout)
+                rows[scenario] = summarize(results, elapsed, timeout)
+            finally:
+                if process is not None:
+                    process.kill()
+                    process.wait()
+        
+        print(f"{'scenario':<10}{'requests':>9}{'ok':>6}{'timed out':>11}{'p50 s':>8}{'p99 s':>8}{'ok/s':>7}  levels")
+        for scenario, row in rows.items():
+            levels = ' '.join(f"{level}:{count}" for level, count in row['levels'].items())
+            print(f"{scenario:<10}{row['requests']:>9}{row['ok']:>6}{row['timed_out']:>11}{row['p50_s']:>8.2f}"
+                  f"{row['p99_s']:>8.2f}{row['throughput_rps']:>7.2f}  {levels}")
+        print(f"budget {budget:.2f}s; arrival rate {args.overload:.1f}x full-effort capacity; "
+              f"timed-out requests count as {timeout:.1f}s")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
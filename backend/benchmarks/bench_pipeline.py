@@ -0,0 +1,106 @@
+"""
+Compare serial decode/preprocess with the pipelined decode pool
+
+Scores a synthetic video and a synthetic audio file end to end (random
+weights), checks that every configuration matches the serial scores and
+prints wall time plus the per-stage timings reported by the detectors.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pipeline [--seconds 120] [--fps 2] [--workers 1 4 8]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+from benchmarks.bench_frame_sampling import make_video
+from models.audio_detector import AudioDetector
+from models.image_detector import ImageDetector
+from models.video_detector import VideoDetector
+from utils.pipeline import DecodePool, EXECUTORS
+
+def make_audio(path, seconds, sample_rate=44100):
+    """
+    Write a synthetic stereo chirp-plus-noise WAV file
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * sample_rate) / sample_rate
+    y = 0.4 * np.sin(2 * np.pi * (200 + 30 * t) * t) + 0.05 * rng.standard_normal(len(t))
+    sf.write(path, np.stack([y, y], axis=1).astype(np.float32), sample_rate)
+
+def run(detect, repeat):
+    """
+    Best-of-repeat wall time and the last result
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = detect()
+        best = min(best, time.perf_counter() - start_time)
+    return best, result
+
+def format_timings(timings):
+    return ' '.join(f"{name}={seconds:.2f}" for name, seconds in timings.items() if name != 'total')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=120, help="Length of the synthetic video and audio")
+    parser.add_argument('--fps', type=float, default=2, help="Frames sampled per second of video")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--executors', nargs='+', default=list(EXECUTORS), choices=EXECUTORS)
+    parser.add_argument('--repeat', type=int, default=2)
+    parser.add_argument('--tolerance', type=float, default=1e-5)
+    args = parser.parse_args()
+    
+    temp_dir = tempfile.mkdtemp()
+    failed = False
+    try:
+        video_path = os.path.join(temp_dir, 'video.mp4')
+        audio_path = os.path.join(temp_dir, 'audio.wav')
+        make_video(video_path, args.seconds, 30, 1280, 720)
+        make_audio(audio_path, args.seconds)
+        
+        image_detector = ImageDetector(base_weights=None)
+        configs = [('serial', 0)] + [(executor, workers) for executor in args.executors for workers in args.workers]
+        
+        print(f"{'input':<7}{'executor':<10}{'workers':>8}{'seconds':>9}{'speedup':>9}{'max diff':>11}  stages")
+        for kind in ('video', 'audio'):
+            reference, reference_time = None, None
+            for executor, workers in configs:
+                pool = DecodePool(workers=workers, executor=executor) if workers else None
+                if kind == 'video':
+                    detector = VideoDetector(frames_per_second=args.fps, image_detector=image_detector,
+                                             decode_pool=pool)
+                    detect = lambda: detector.detect(video_path)
+                    key = 'frame_analysis'
+                else:
+                    if executor == 'process':
+                        continue  # audio stages always run on threads
+                    detector = AudioDetector(feature_backend='numpy', decode_pool=pool)
+                    detect = lambda: detector.detect(audio_path, windowed=True)
+                    key = 'window_analysis'
+                
+                detect()  # build the model and warm caches
+                elapsed, result = run(detect, args.repeat)
+                scores = np.array([entry['confidence'] for entry in result[key].values()])
+                if reference is None:
+                    reference, reference_time = scores, elapsed
+                diff = float(np.max(np.abs(scores - reference))) if len(scores) == len(reference) else float('inf')
+                status = '' if diff <= args.tolerance else '  FAIL'
+                failed = failed or bool(status)
+                print(f"{kind:<7}{executor:<10}{workers:>8}{elapsed:>9.2f}{reference_time / elapsed:>8.1f}x"
+                      f"{diff:>11.2e}  {format_timings(result['timings'])}{status}")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    if failed:
+        print(f"Some configurations differ from the serial scores by more than {args.tolerance}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure re-scoring stored embeddings against re-running the backbone
+
+Fills an EmbeddingStore with synthetic float16 embeddings, re-scores all of
+them with the classification head (random weights) and compares the rate with
+full image inference, extrapolated to an archive of --archive-frames frames.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_rescore [--embeddings 200000] [--archive-frames 10000000]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from models.embeddings import rescore
+from models.image_detector import ImageDetector, EMBEDDING_DIM
+from models.video_detector import VideoDetector
+from utils.embedding_store import EmbeddingStore
+
+def format_duration(seconds):
+    for unit, size in (('days', 86400), ('hours', 3600), ('minutes', 60)):
+        if seconds >= size:
+            return f"{seconds / size:.1f} {unit}"
+    return f"{seconds:.1f} seconds"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--embeddings', type=int, default=200000, help="Frames in the synthetic store")
+    parser.add_argument('--frames-per-video', type=int, default=100)
+    parser.add_argument('--images', type=int, default=64, help="Images for the full-inference rate")
+    parser.add_argument('--batch-rows', type=int, default=65536)
+    parser.add_argument('--archive-frames', type=int, default=10000000)
+    args = parser.parse_args()
+    
+    image_detector = ImageDetector(base_weights=None)
+    video_detector = VideoDetector(image_detector=image_detector)
+    rng = np.random.default_rng(0)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        store = EmbeddingStore(temp_dir)
+        start_time = time.perf_counter()
+        for start in range(0, args.embeddings, args.frames_per_video):
+            n = min(args.frames_per_video, args.embeddings - start)
+            # Pooled swish activations: small, mostly positive values
+            embeddings = np.abs(rng.normal(0, 0.3, (n, EMBEDDING_DIM))).astype(np.float16)
+            store.put(f"video{start}", np.arange(n, dtype=np.float64), embeddings, kind='video')
+        write_time = time.perf_counter() - start_time
+        size_mb = os.path.getsize(store.data_path) / 1e6
+        print(f"store: {args.embeddings} embeddings, {size_mb:.0f} MB, written in {write_time:.1f}s")
+        
+        image_detector.score_embeddings(np.zeros((1, EMBEDDING_DIM), dtype=np.float32))  # build the head
+        start_time = time.perf_counter()
+        videos = sum(1 for _ in rescore(store, image_detector, video_detector, batch_rows=args.batch_rows))
+        rescore_rate = args.embeddings / (time.perf_counter() - start_time)
+        
+        batch = rng.uniform(-1, 1, (args.images, 224, 224, 3)).astype(np.float32)
+        image_detector.detect_batch(batch[:8])  # build the model
+        start_time = time.perf_counter()
+        image_detector.detect_batch(batch)
+        full_rate = args.images / (time.perf_counter() - start_time)
+        
+        print(f"re-score: {rescore_rate:,.0f} embeddings/s ({videos} videos)")
+        print(f"full inference: {full_rate:,.1f} frames/s")
+        print(f"archive of {args.archive_frames:,} frames: "
+              f"re-score {format_duration(args.archive_frames / rescore_rate)}, "
+              f"full inference {format_duration(args.archive_frames / full_rate)} "
+              f"({rescore_rate / full_rate:,.0f}x)")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Measure worker startup time: rebuilt vs restored models, fresh vs preloaded workers
+
+Starts --workers API workers the way gunicorn would and reports, per worker,
+the seconds spent importing the app, restoring or building the models and
+running the warm-up inference (the point /api/ready turns ready), plus its
+proportional and private memory. Modes:
+
+    build     fresh interpreters, models assembled in code (MODEL_ARTIFACTS=False)
+    artifact  fresh interpreters, models restored from the artifact cache
+    preload   one interpreter imports the app, then forks the workers (gunicorn preload_app)
+
+Uses random backbone weights by default, since ImageNet weights need network
+access or a Keras download cache (--base-weights imagenet).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_startup [--workers 2] [--modes build artifact preload]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+MODES = ('build', 'artifact', 'preload')
+
+def memory_mb():
+    """
+    Proportional (shared pages split between processes) and private resident memory, in MB
+    """
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    values[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    except OSError:
+        return None, None
+    return values.get('Pss'), values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+
+def warm_up_worker(app_module, started, imported):
+    """
+    Warm up an imported app and describe the worker's startup
+    """
+    app_module.warm_up()
+    ready = time.perf_counter()
+    pss, private = memory_mb()
+    return {'import': imported - started, 'warm_up': ready - imported, 'ready': ready - started,
+            'pss_mb': pss, 'private_mb': private}
+
+def report(values):
+    """
+    Print one JSON line in a single write, so lines from forked workers never interleave
+    """
+    sys.stdout.flush()
+    os.write(sys.stdout.fileno(), (json.dumps(values) + '\n').encode())
+
+def child(mode, workers):
+    """
+    Entry point of a benchmark subprocess; prints one JSON line per worker
+    """
+    started = time.perf_counter()
+    if mode != 'preload':
+        import app
+        report(warm_up_worker(app, started, time.perf_counter()))
+        return
+    
+    import app
+    imported = time.perf_counter()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            forked = time.perf_counter()
+            try:
+                report(warm_up_worker(app, forked, forked))
+            finally:
+                os._exit(0)
+        pids.append(pid)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    report({'master_import': imported - started})
+
+def run_mode(mode, workers, env):
+    """
+    Start the workers for a mode and collect their reports
+    
+    Returns:
+        tuple: (seconds until every worker was ready, worker reports, master import seconds or None)
+    """
+    command = [sys.executable, '-m', 'benchmarks.bench_startup', '--child', mode]
+    start_time = time.perf_counter()
+    if mode == 'preload':
+        processes = [subprocess.Popen(command + ['--workers', str(workers)], env=env,
+                                      stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)]
+    else:
+        processes = [subprocess.Popen(command, env=env, stdout=subprocess.PIPE,
+                                      stderr=subprocess.DEVNULL, text=True) for _ in range(workers)]
+    lines = []
+    for process in processes:
+        out, _ = process.communicate()
+        if process.returncode:
+            raise SystemExit(f"{mode} worker failed with exit code {process.returncode}")
+        lines.extend(json.loads(line) for line in out.splitlines() if line.startswith('{'))
+    elapsed = time.perf_counter() - start_time
+    
+    master = [line['master_import'] for line in lines if 'master_import' in line]
+    return elapsed, [line for line in lines if 'ready' in line], master[0] if master else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--base-weights', default='none', help="'none' (random) or 'imagenet'")
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.workers)
+        return
+    
+    temp_dir = tempfile.mkdtemp()
+    try:
+        env = {
+            **os.environ,
+            'IMAGE_BASE_WEIGHTS': args.base_weights,
+            'ARTIFACTS_FOLDER': os.path.join(temp_dir, 'artifacts'),
+            'JOBS_DB_PATH': os.path.join(temp_dir, 'jobs.sqlite3'),
+            'JOB_WORKERS': '0',
+            'METRICS_DB_PATH': '',
+            'CACHE_ENABLED': 'False',
+            'PRELOAD_MODELS': 'False'
+        }
+        # Write the artifacts once, as `python -m models.artifacts` would before a deployment
+        subprocess.run([sys.executable, '-m', 'models.artifacts'], env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+        print(f"{'mode':<10}{'all ready':>10}{'import':>8}{'warm-up':>9}{'ready':>8}{'PSS MB':>8}{'private MB':>12}")
+        for mode in args.modes:
+            mode_env = {**env, 'MODEL_ARTIFACTS': str(mode != 'build'), 'PREFORK_SERVER': str(mode == 'preload')}
+            elapsed, reports, master_import = run_mode(mode, args.workers, mode_env)
+            mean = {key: sum(worker[key] or 0 for worker in reports) / len(reports)
+                    for key in ('import', 'warm_up', 'ready', 'pss_mb', 'private_mb')}
+            print(f"{mode:<10}{elapsed:>9.1f}s{mean['import']:>7.1f}s{mean['warm_up']:>8.1f}s{mean['ready']:>7.1f}s"
+                  f"{mean['pss_mb']:>8.0f}{mean['private_mb']:>12.0f}")
+            if master_import is not None:
+                print(f"{'':<10}(master import {master_import:.1f}s, once for all workers)")
+        print("import/warm-up/ready/memory are per-worker means; preload workers start timing at the fork")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Offline benchmark suite for the detectors and the HTTP API
+
+Generates synthetic images, videos and audio, then measures
+ImageDetector.detect, VideoDetector.detect, AudioDetector.detect and the
+/api/detect/* endpoints with random weights: latency percentiles, throughput
+at several concurrency levels and peak RSS. Endpoint latency goes through the
+Flask test client; endpoint throughput through a local HTTP server driven by
+a threaded load generator.
+
+Results are written as JSON (stdout by default; the progress table goes to
+stderr). With --baseline, every case is compared with a stored result file
+and the run exits with status 1 if any metric regressed beyond --tolerance.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_suite [--quick] [--only image api.] [--output results.json]
+    python -m benchmarks.bench_suite --baseline baseline.json [--tolerance 0.15]
+    python -m benchmarks.bench_suite --compare results.json baseline.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# (kind, width, height)
+IMAGE_SPECS = [('random', 224, 224), ('structured', 640, 480), ('random', 1920, 1080)]
+# (kind, seconds, fps, width, height)
+VIDEO_SPECS = [('motion', 5, 30, 640, 360), ('noise', 10, 24, 1280, 720), ('static', 30, 30, 320, 240)]
+# (extension, seconds, windowed)
+AUDIO_SPECS = [('wav', 5, False), ('mp3', 10, False), ('wav', 30, True)]
+
+QUICK_IMAGE_SPECS = IMAGE_SPECS[:2]
+QUICK_VIDEO_SPECS = [('motion', 3, 30, 320, 240)]
+QUICK_AUDIO_SPECS = [('wav', 5, False), ('wav', 10, True)]
+
+# Metrics compared against a baseline, and whether larger is better
+COMPARED = {'p50_ms': False, 'p95_ms': False, 'throughput_rps': True, 'peak_rss_mb': False}
+
+def current_rss():
+    """
+    Resident set size of this process in bytes
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        import resource
+        # Peak rather than current where /proc is unavailable (kilobytes on Linux, bytes on macOS)
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+class PeakRss:
+    def __init__(self, interval=0.005):
+        """
+        Sample this process's RSS on a background thread and keep the peak
+        """
+        self.interval = interval
+        self.start = 0
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def __enter__(self):
+        self.start = self.peak = current_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+def measure(call, runs, concurrency, load_call=None, warmup=1):
+    """
+    Latency, throughput and peak RSS of one benchmark case
+    
+    Args:
+        call (callable): One request, timed sequentially for the latency distribution
+        runs (int): Sequential calls, and calls per worker at each concurrency level
+        concurrency (list): Concurrent callers for the throughput runs
+        load_call (callable, optional): Call used for the throughput runs; defaults to call
+        warmup (int): Untimed calls first (model build, caches)
+        
+    Returns:
+        dict: Latency percentiles in ms, throughput per concurrency level and RSS in MB
+    """
+    load_call = load_call or call
+    for _ in range(warmup):
+        call()
+    
+    with PeakRss() as rss:
+        samples = []
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start_time) * 1000)
+        
+        throughput = {}
+        for workers in concurrency:
+            calls = runs * workers
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                start_time = time.perf_counter()
+                for future in [pool.submit(load_call) for _ in range(calls)]:
+                    future.result()
+                throughput[str(workers)] = calls / (time.perf_counter() - start_time)
+    
+    return {
+        'runs': runs,
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p95_ms': float(np.percentile(samples, 95)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'mean_ms': float(np.mean(samples)),
+        'throughput_rps': throughput,
+        'peak_rss_mb': rss.peak / 2 ** 20,
+        'rss_growth_mb': (rss.peak - rss.start) / 2 ** 20
+    }
+
+def make_inputs(temp_dir, quick):
+    """
+    Generate every synthetic input
+    
+    Returns:
+        dict: 'image', 'video' and 'audio' lists of (case name, path, options)
+    """
+    # Imported here (like the detectors) so --compare runs without TensorFlow
+    from benchmarks.synthetic import make_clip, make_image, make_speech_like
+    
+    inputs = {'image': [], 'video': [], 'audio': []}
+    for kind, width, height in (QUICK_IMAGE_SPECS if quick else IMAGE_SPECS):
+        name = f"{kind}_{width}x{height}"
+        path = os.path.join(temp_dir, f"{name}.jpg")
+        make_image(path, kind, width, height)
+        inputs['image'].append((name, path, {}))
+    
+    for kind, seconds, fps, width, height in (QUICK_VIDEO_SPECS if quick else VIDEO_SPECS):
+        name = f"{kind}_{seconds}s_{fps}fps_{height}p"
+        path = os.path.join(temp_dir, f"{name}.mp4")
+        make_clip(path, kind, seconds, fps, width, height)
+        inputs['video'].append((name, path, {}))
+    
+    for extension, seconds, windowed in (QUICK_AUDIO_SPECS if quick else AUDIO_SPECS):
+        name = f"{extension}_{seconds}s" + ('_windowed' if windowed else '')
+        path = os.path.join(temp_dir, f"{name}.{extension}")
+        make_speech_like(path, seconds)
+        inputs['audio'].append((name, path, {'windowed': windowed}))
+    return inputs
+
+def detector_cases(inputs):
+    """
+    (case name, call) for each detector and input
+    """
+    from models.audio_detector import AudioDetector
+    from models.image_detector import ImageDetector
+    from models.video_detector import VideoDetector
+    
+    image_detector = ImageDetector(base_weights=None)
+    video_detector = VideoDetector(image_detector=image_detector)
+    audio_detector = AudioDetector()
+    
+    cases = []
+    for name, path, _ in inputs['image']:
+        cases.append((f"image.{name}", lambda path=path: image_detector.detect(path)))
+    for name, path, _ in inputs['video']:
+        cases.append((f"video.{name}", lambda path=path: video_detector.detect(path)))
+    for name, path, options in inputs['audio']:
+        cases.append((f"audio.{name}", lambda path=path, options=options: audio_detector.detect(path, **options)))
+    return cases
+
+def multipart_body(filename, data):
+    """
+    Encode one file as a multipart/form-data body under the 'file' field
+    
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    boundary = uuid.uuid4().hex
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n').encode()
+    return head + data + f'\r\n--{boundary}--\r\n'.encode(), f'multipart/form-data; boundary={boundary}'
+
+def api_cases(inputs, temp_dir):
+    """
+    (case name, test client call, HTTP call) for each endpoint, on the first input of each kind
+    
+    Configures the app for offline runs (random weights, no result cache, no job
+    workers, per-process metrics) before importing it.
+    """
+    os.environ.setdefault('IMAGE_BASE_WEIGHTS', 'none')
+    os.environ.setdefault('CACHE_ENABLED', 'False')
+    os.environ.setdefault('PRELOAD_MODELS', 'False')
+    os.environ.setdefault('JOB_WORKERS', '0')
+    os.environ.setdefault('JOBS_DB_PATH', os.path.join(temp_dir, 'jobs.sqlite3'))
+    os.environ.setdefault('METRICS_DB_PATH', '')
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import app as api
+    
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+    
+    client = api.app.test_client()
+    server = make_server('127.0.0.1', 0, api.app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    
+    def client_call(url, filename, data):
+        def call():
+            response = client.post(url, data={'file': (io.BytesIO(data), filename)},
+                                   content_type='multipart/form-data')
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} returned {response.status_code}: {response.get_data(as_text=True)}")
+        return call
+    
+    def http_call(url, filename, data):
+        def call():
+            body, content_type = multipart_body(filename, data)
+            request = urllib.request.Request(base_url + url, data=body, method='POST',
+                                             headers={'Content-Type': content_type})
+            with urllib.request.urlopen(request, timeout=600) as response:
+                response.read()
+        return call
+    
+    cases = []
+    for kind in ('image', 'video', 'audio'):
+        name, path, _ = inputs[kind][0]
+        with open(path, 'rb') as f:
+            data = f.read()
+        url = f"/api/detect/{kind}"
+        filename = os.path.basename(path)
+        cases.append((f"api.{kind}.{name}", client_call(url, filename, data), http_call(url, filename, data)))
+    return cases, server
+
+def environment():
+    """
+    Where the results came from, stored with them
+    """
+    import tensorflow as tf
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'tensorflow': tf.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """
+    Flag metrics that got worse than the baseline by more than tolerance
+    
+    Args:
+        current (dict): Results of this run
+        baseline (dict): Stored results
+        tolerance (float): Allowed relative change, e.g. 0.15
+        min_delta_ms (float): Latency changes below this many milliseconds are never flagged
+        
+    Returns:
+        list: (case, metric, baseline value, current value, relative change, regressed) rows
+    """
+    rows = []
+    for case, result in current['cases'].items():
+        reference = baseline['cases'].get(case)
+        if reference is None:
+            continue
+        for metric, higher_is_better in COMPARED.items():
+            if metric == 'throughput_rps':
+                pairs = [(f"throughput_rps@{workers}", value, reference[metric].get(workers))
+                         for workers, value in result[metric].items()]
+            else:
+                pairs = [(metric, result[metric], reference.get(metric))]
+            for label, value, old in pairs:
+                if old is None or not old:
+                    continue
+                change = (value - old) / old
+                worse = -change if higher_is_better else change
+                regressed = worse > tolerance
+                if metric.endswith('_ms') and abs(value - old) < min_delta_ms:
+                    regressed = False
+                rows.append((case, label, old, value, change, regressed))
+    return rows
+
+def print_comparison(rows):
+    print(f"{'case':<34}{'metric':<20}{'baseline':>11}{'current':>11}{'change':>9}", file=sys.stderr)
+    for case, label, old, value, change, regressed in rows:
+        flag = '  REGRESSION' if regressed else ''
+        print(f"{case:<34}{label:<20}{old:>11.2f}{value:>11.2f}{change:>+8.0%} {flag}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help="Fewer and smaller inputs, fewer runs")
+    parser.add_argument('--runs', type=int, default=None, help="Sequential runs per case (default 10, 3 with --quick)")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=None,
+                        help="Concurrent callers for throughput (default 1 4, 1 2 with --quick)")
+    parser.add_argument('--only', nargs='+', default=None,
+                        help="Run cases whose name starts with any of these prefixes, e.g. image video. api.")
+    parser.add_argument('--output', default='-', help="JSON results file ('-' for stdout)")
+    parser.add_argument('--baseline', default=None, help="Stored results to compare against")
+    parser.add_argument('--compare', nargs=2, metavar=('RESULTS', 'BASELINE'),
+                        help="Only compare two stored result files")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed relative regression")
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help="Ignore latency changes below this")
+    args = parser.parse_args()
+    
+    if args.compare:
+        with open(args.compare[0]) as f:
+            current = json.load(f)
+        with open(args.compare[1]) as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.tolerance, args.min_delta_ms)
+        print_comparison(rows)
+        sys.exit(1 if any(row[-1] for row in rows) else 0)
+    
+    runs = args.runs or (3 if args.quick else 10)
+    concurrency = args.concurrency or ([1, 2] if args.quick else [1, 4])
+    selected = lambda name: args.only is None or any(name.startswith(prefix) for prefix in args.only)
+    
+    temp_dir = tempfile.mkdtemp()
+    server = None
+    try:
+        inputs = make_inputs(temp_dir, args.quick)
+        cases = [(name, call, None) for name, call in detector_cases(inputs) if selected(name)]
+        if any(selected(f"api.{kind}") for kind in ('image', 'video', 'audio')):
+            api, server = api_cases(inputs, temp_dir)
+            cases += [case for case in api if selected(case[0])]
+        
+        results = {'environment': environment(), 'settings': {'runs': runs, 'concurrency': concurrency,
+                                                              'quick': args.quick}, 'cases': {}}
+        print(f"{'case':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  {'req/s by concurrency':<24}{'peak MB':>9}",
+              file=sys.stderr)
+        for name, call, load_call in cases:
+            result = measure(call, runs, concurrency, load_call=load_call)
+            results['cases'][name] = result
+            throughput = ' '.join(f"{workers}:{rps:.2f}" for workers, rps in result['throughput_rps'].items())
+            print(f"{name:<34}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}  "
+                  f"{throughput:<24}{result['peak_rss_mb']:>9.0f}", file=sys.stderr)
+    finally:
+        if server is not None:
+            server.shutdown()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        print_comparison(rows)
+        if any(row[-1] for row in rows):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
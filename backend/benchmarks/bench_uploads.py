@@ -0,0 +1,113 @@
+"""
+Time from the last uploaded byte to the verdict: chunked uploads analyzed on arrival vs analysis after upload
+
+Sends synthetic media through the chunked upload API (random weights) at a
+simulated link speed, one chunk at a time, and measures how long finalize takes
+once the last chunk is acknowledged. The baseline is the same analysis started
+only when the whole file is there, which is what a one-shot upload gets. A
+conventional MP4, whose index is written last, cannot be analyzed before it is
+complete; streamable containers (here MKV) and WAV can.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_uploads [--video-seconds 120] [--audio-seconds 600] [--mbps 20]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.synthetic import make_clip, make_speech_like
+
+def chunked_upload(client, path, chunk_size, mbps):
+    """
+    Upload a file in chunks paced to mbps, then finalize
+    
+    Returns:
+        dict: upload_seconds, finalize_seconds (after the last chunk), and the finalize response
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    response = client.post('/api/uploads', data={'filename': os.path.basename(path), 'size': len(data)})
+    if response.status_code != 201:
+        raise RuntimeError(f"Upload rejected: {response.get_json()}")
+    upload_id = response.get_json()['upload_id']
+    
+    start_time = time.perf_counter()
+    for offset in range(0, len(data), chunk_size):
+        chunk = data[offset:offset + chunk_size]
+        response = client.patch(f"/api/uploads/{upload_id}?offset={offset}", data=chunk,
+                                content_type='application/octet-stream')
+        if response.status_code != 200:
+            raise RuntimeError(f"Chunk rejected: {response.get_json()}")
+        # Pace to the link speed; the server analyzes in the background meanwhile
+        delay = start_time + (offset + len(chunk)) * 8 / (mbps * 1e6) - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    upload_seconds = time.perf_counter() - start_time
+    
+    start_time = time.perf_counter()
+    response = client.post(f"/api/uploads/{upload_id}/finalize")
+    finalize_seconds = time.perf_counter() - start_time
+    if response.status_code != 200:
+        raise RuntimeError(f"Finalize failed: {response.get_json()}")
+    return {'upload_seconds': upload_seconds, 'finalize_seconds': finalize_seconds, 'result': response.get_json()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--video-seconds', type=int, default=120)
+    parser.add_argument('--audio-seconds', type=int, default=600)
+    parser.add_argument('--mbps', type=float, default=20, help="Simulated upload speed in megabits per second")
+    parser.add_argument('--chunk-mb', type=float, default=2)
+    args = parser.parse_args()
+    
+    temp_dir = tempfile.mkdtemp()
+    try:
+        # Offline app: random weights, no result cache or job workers, uploads in the temp dir
+        os.environ.setdefault('IMAGE_BASE_WEIGHTS', 'none')
+        os.environ.setdefault('MODEL_ARTIFACTS', 'False')
+        os.environ.setdefault('CACHE_ENABLED', 'False')
+        os.environ.setdefault('PRELOAD_MODELS', 'False')
+        os.environ.setdefault('JOB_WORKERS', '0')
+        os.environ.setdefault('JOBS_DB_PATH', os.path.join(temp_dir, 'jobs.sqlite3'))
+        os.environ.setdefault('METRICS_DB_PATH', '')
+        os.environ.setdefault('UPLOADS_FOLDER', os.path.join(temp_dir, 'uploads'))
+        import app as api
+        
+        inputs = []
+        for ext in ('mkv', 'mp4'):
+            path = os.path.join(temp_dir, f"clip.{ext}")
+            make_clip(path, 'motion', args.video_seconds, 30, 640, 360)
+            inputs.append((f"video {ext}", path, lambda path: api.job_video_detector.detect(path)))
+        path = os.path.join(temp_dir, 'speech.wav')
+        make_speech_like(path, args.audio_seconds, sample_rate=22050)
+        # Uploads score every window, so the baseline does too
+        windowed = api.job_audio_detector.with_settings(max_windows=None)
+        inputs.append(("audio wav", path, lambda path: windowed.detect(path, windowed=True)))
+        
+        client = api.app.test_client()
+        api.job_video_detector.image_detector.warm_up()
+        api.audio_detector.warm_up()
+        
+        print(f"{'input':<11}{'MB':>7}{'upload s':>10}{'before finalize':>16}{'after last byte s':>19}"
+              f"{'baseline s':>12}{'agree':>7}")
+        for name, path, analyze in inputs:
+            run = chunked_upload(client, path, int(args.chunk_mb * 1024 * 1024), args.mbps)
+            result = run['result']
+            if 'frames_scored_before_finalize' in result:
+                early = f"{result['frames_scored_before_finalize']}/{len(result['frame_analysis'])}"
+            else:
+                early = f"{result['windows_scored_before_finalize']}/{result['windows_analyzed']}"
+            
+            start_time = time.perf_counter()
+            baseline = analyze(path)
+            baseline_seconds = time.perf_counter() - start_time
+            agree = abs(baseline['confidence'] - result['confidence']) < 1e-4
+            print(f"{name:<11}{os.path.getsize(path) / 1e6:>7.1f}{run['upload_seconds']:>10.1f}{early:>16}"
+                  f"{run['finalize_seconds']:>19.2f}{baseline_seconds:>12.2f}{str(agree):>7}")
+        print(f"link {args.mbps:g} Mbit/s, chunks of {args.chunk_mb:g} MB")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
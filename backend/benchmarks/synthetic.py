@@ -0,0 +1,91 @@
+"""
+Synthetic benchmark inputs, generated locally so benchmarks need no datasets or network
+
+Images are random noise or smooth structured scenes, videos are written with
+cv2.VideoWriter and audio is a voiced, harmonic signal written through
+libsndfile (WAV, FLAC, OGG or MP3, picked from the file extension).
+"""
+import numpy as np
+import cv2
+import soundfile as sf
+
+from benchmarks.bench_frame_dedup import make_scene_video
+from benchmarks.bench_frame_sampling import make_video
+
+IMAGE_KINDS = ('random', 'structured')
+VIDEO_KINDS = ('noise', 'static', 'motion')
+
+def image_array(kind, width, height, seed=0):
+    """
+    Synthetic BGR image
+    
+    Args:
+        kind (str): 'random' (uniform noise) or 'structured' (smooth gradients and shapes)
+        width (int): Image width
+        height (int): Image height
+        seed (int): Random seed
+        
+    Returns:
+        numpy.ndarray: Image of shape (height, width, 3), uint8
+    """
+    if kind not in IMAGE_KINDS:
+        raise ValueError(f"Unknown image kind: {kind}")
+    rng = np.random.default_rng(seed)
+    if kind == 'random':
+        return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    a, b, c = rng.uniform(2, 8, 3) * np.pi / max(width, height)
+    img = np.stack([127 + 100 * np.sin(a * x + b * y), 127 + 100 * np.cos(b * x),
+                    127 + 100 * np.sin(c * y)], axis=2)
+    img = np.clip(img + rng.normal(0, 4, img.shape), 0, 255).astype(np.uint8)
+    for _ in range(4):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = tuple(int(v) for v in rng.integers(0, 256, 3))
+        cv2.circle(img, center, int(rng.integers(min(width, height) // 16, min(width, height) // 4)), color, -1)
+    return img
+
+def make_image(path, kind, width, height, seed=0):
+    """
+    Write a synthetic image; the format follows the extension (.jpg, .png)
+    """
+    cv2.imwrite(path, image_array(kind, width, height, seed))
+
+def make_clip(path, kind, seconds, fps, width, height):
+    """
+    Write a synthetic video clip
+    
+    Args:
+        path (str): Output path (.mp4)
+        kind (str): 'noise' (scrolling noise), 'static' (still scenes) or 'motion' (panning scenes)
+        seconds (int): Clip length
+        fps (int): Frame rate
+        width (int): Frame width
+        height (int): Frame height
+    """
+    if kind not in VIDEO_KINDS:
+        raise ValueError(f"Unknown video kind: {kind}")
+    if kind == 'noise':
+        make_video(path, seconds, fps, width, height)
+    else:
+        make_scene_video(path, seconds, fps, width, height, motion=kind == 'motion')
+
+def make_speech_like(path, seconds, sample_rate=44100, seed=0):
+    """
+    Write a mono voiced signal: a gliding fundamental with harmonics, syllable-rate
+    amplitude modulation and background noise
+    
+    Args:
+        path (str): Output path; the format follows the extension (.wav, .flac, .ogg, .mp3)
+        seconds (float): Duration
+        sample_rate (int): Sample rate
+        seed (int): Random seed
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    y = 0.2 * voice * envelope + 0.02 * rng.standard_normal(len(t))
+    sf.write(path, y.astype(np.float32), sample_rate)
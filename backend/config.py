@@ -17,14 +17,157 @@ os.makedirs(MODELS_FOLDER, exist_ok=True)
 IMAGE_MODEL_PATH = os.path.join(MODELS_FOLDER, 'image_detector.h5')
 VIDEO_MODEL_PATH = os.path.join(MODELS_FOLDER, 'video_detector.h5')
 AUDIO_MODEL_PATH = os.path.join(MODELS_FOLDER, 'audio_detector.h5')
+# EfficientNetB0 weights under the image head: 'imagenet' (downloaded once by Keras) or 'none' for
+# random initialization, e.g. for offline benchmarks
+IMAGE_BASE_WEIGHTS = os.environ.get('IMAGE_BASE_WEIGHTS', 'imagenet')
+IMAGE_BASE_WEIGHTS = None if IMAGE_BASE_WEIGHTS.lower() == 'none' else IMAGE_BASE_WEIGHTS
+
+# Inference backend: keras, function, xla, savedmodel or tflite (see models/backends.py)
+# Exported backends reuse artifacts already in EXPORT_FOLDER; delete them after changing weights
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+INFERENCE_THREADS = int(os.environ.get('INFERENCE_THREADS', os.cpu_count() or 1))
+EXPORT_FOLDER = os.path.join(MODELS_FOLDER, 'exported')
+
+# Post-training quantization: none, dynamic, float16 or int8 (build with python -m models.quantization)
+# When set, detectors load the quantized model through the tflite backend
+QUANTIZATION = os.environ.get('QUANTIZATION', 'none')
+IMAGE_QUANTIZED_MODEL_PATH = os.path.join(MODELS_FOLDER, f'image_detector_{QUANTIZATION}.tflite')
+AUDIO_QUANTIZED_MODEL_PATH = os.path.join(MODELS_FOLDER, f'audio_detector_{QUANTIZATION}.tflite')
 
 # API settings
 API_HOST = os.environ.get('API_HOST', '0.0.0.0')
 API_PORT = int(os.environ.get('API_PORT', 5000))
 DEBUG = os.environ.get('DEBUG', 'True').lower() == 'true'
 
+# Model loading: build all networks at startup instead of on first request
+PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', 'False').lower() == 'true'
+
+# Assembled models (architecture + ImageNet backbone + fine-tuned weights) are cached in
+# ARTIFACTS_FOLDER and restored without rebuilding or network access; python -m models.artifacts
+# builds them ahead of a deployment, otherwise the first worker writes them
+MODEL_ARTIFACTS = os.environ.get('MODEL_ARTIFACTS', 'True').lower() == 'true'
+ARTIFACTS_FOLDER = os.environ.get('ARTIFACTS_FOLDER', os.path.join(MODELS_FOLDER, 'artifacts'))
+
+# Set by gunicorn.conf.py when the master imports the app before forking workers (preload_app).
+# TensorFlow hangs in a child forked after it has built a model, so nothing may run TensorFlow or
+# start threads at import; each worker warms up after the fork instead
+PREFORK_SERVER = os.environ.get('PREFORK_SERVER', 'False').lower() == 'true'
+
+# Micro-batching: coalesce concurrent requests into one forward pass
+# (only helps when a worker serves requests on several threads, e.g. gunicorn --threads)
+BATCHING_ENABLED = os.environ.get('BATCHING_ENABLED', 'False').lower() == 'true'
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 32))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 5))
+BATCH_QUEUE_SIZE = int(os.environ.get('BATCH_QUEUE_SIZE', 256))
+
+# Audio analysis: score whole files in sliding 5-second windows instead of the first 5 seconds
+# (can also be requested per call with windowed=true)
+AUDIO_WINDOWED = os.environ.get('AUDIO_WINDOWED', 'False').lower() == 'true'
+AUDIO_MAX_WINDOWS = int(os.environ.get('AUDIO_MAX_WINDOWS', 64))
+
+# Audio decode and features (see utils/preprocessing.py; benchmarks/bench_audio_loading.py checks drift)
+AUDIO_DECODER = os.environ.get('AUDIO_DECODER', 'soundfile')
+AUDIO_RESAMPLER = os.environ.get('AUDIO_RESAMPLER', 'soxr_hq')
+AUDIO_FEATURES = os.environ.get('AUDIO_FEATURES', 'librosa')
+
+# Decode/preprocess pipeline: PIPELINE_WORKERS threads (or worker processes) decode and
+# preprocess video chunks and audio blocks ahead of inference; 0 decodes serially on the request thread
+# Buffered work is bounded by PIPELINE_WORKERS * PIPELINE_PREFETCH chunks per request
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', min(4, os.cpu_count() or 1)))
+PIPELINE_EXECUTOR = os.environ.get('PIPELINE_EXECUTOR', 'thread')
+PIPELINE_PREFETCH = int(os.environ.get('PIPELINE_PREFETCH', 2))
+
+# Adaptive video mode: score frames coarse-to-fine and stop once a sequential test settles the
+# verdict (can also be requested per call with adaptive=true)
+VIDEO_ADAPTIVE = os.environ.get('VIDEO_ADAPTIVE', 'False').lower() == 'true'
+VIDEO_MIN_FRAMES = int(os.environ.get('VIDEO_MIN_FRAMES', 8))
+VIDEO_MAX_FRAMES = int(os.environ.get('VIDEO_MAX_FRAMES', 0))  # 0 = no budget cap
+VIDEO_ADAPTIVE_STEP = int(os.environ.get('VIDEO_ADAPTIVE_STEP', 8))
+VIDEO_SPRT_DELTA = float(os.environ.get('VIDEO_SPRT_DELTA', 0.1))
+VIDEO_SPRT_ALPHA = float(os.environ.get('VIDEO_SPRT_ALPHA', 0.01))
+VIDEO_SPRT_BETA = float(os.environ.get('VIDEO_SPRT_BETA', 0.01))
+
+# Temporal deduplication: sampled frames whose 16x16 grayscale thumbnail differs from the last
+# scored frame's by at most VIDEO_DEDUP_THRESHOLD (mean absolute difference, 0-1) reuse its result
+VIDEO_DEDUP = os.environ.get('VIDEO_DEDUP', 'False').lower() == 'true'
+VIDEO_DEDUP_THRESHOLD = float(os.environ.get('VIDEO_DEDUP_THRESHOLD', 0.02))
+
+# Face-crop stage: score faces found by an OpenCV Haar cascade instead of whole images/frames
+# (frames without faces are scored whole); video faces are tracked between detections
+FACE_CROP = os.environ.get('FACE_CROP', 'False').lower() == 'true'
+FACE_CASCADE = os.environ.get('FACE_CASCADE', 'haarcascade_frontalface_default.xml')
+FACE_MARGIN = float(os.environ.get('FACE_MARGIN', 0.3))
+FACE_MAX_FACES = int(os.environ.get('FACE_MAX_FACES', 4))
+FACE_REDETECT_EVERY = int(os.environ.get('FACE_REDETECT_EVERY', 5))
+
+# Result cache keyed by upload content hash, model version and detector parameters
+# CACHE_SQLITE_PATH adds a tier shared by all workers on the host (empty to disable)
+CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'True').lower() == 'true'
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+CACHE_TTL = float(os.environ.get('CACHE_TTL', 24 * 3600))
+CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH', '')
+MODEL_VERSION = os.environ.get('MODEL_VERSION', '1')
+
+# Background video jobs (POST /api/jobs/video): SQLite-backed queue, JOB_WORKERS threads per process
+# Jobs score frames on their own detector instance, so they never wait in the request batcher
+JOBS_FOLDER = os.path.join(PROJECT_ROOT, 'jobs')
+JOBS_DB_PATH = os.environ.get('JOBS_DB_PATH', os.path.join(JOBS_FOLDER, 'jobs.sqlite3'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 0.5))
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 300))
+os.makedirs(JOBS_FOLDER, exist_ok=True)
+
+# Metrics (GET /api/metrics, Prometheus text format); METRICS_DB_PATH is a SQLite file that
+# aggregates every worker on the host (empty keeps per-process metrics)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+METRICS_DB_PATH = os.environ.get('METRICS_DB_PATH', os.path.join(PROJECT_ROOT, 'metrics.sqlite3'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1.0))
+
+# Multi-file detection (POST /api/detect/batch): files per request, zip members included, their
+# total uncompressed size, and files scored concurrently (images are batched across files)
+BATCH_UPLOAD_MAX_FILES = int(os.environ.get('BATCH_UPLOAD_MAX_FILES', 256))
+BATCH_UPLOAD_MAX_BYTES = int(os.environ.get('BATCH_UPLOAD_MAX_BYTES', 256 * 1024 * 1024))
+BATCH_UPLOAD_WORKERS = int(os.environ.get('BATCH_UPLOAD_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Load control: each /api/detect/* request runs at an effort level (frame rate, frame cap, audio
+# windows, image input size) chosen so its predicted latency fits its budget (?budget_ms=) or, with
+# LOAD_CONTROL on, the target for its kind; predictions follow requests in flight and recent latency
+# (see utils/load_control.py). Level 0 is full effort, level LOAD_LEVELS - 1 the LOAD_MIN_* settings
+LOAD_CONTROL = os.environ.get('LOAD_CONTROL', 'False').lower() == 'true'
+LOAD_LEVELS = int(os.environ.get('LOAD_LEVELS', 4))
+LOAD_IMAGE_TARGET = float(os.environ.get('LOAD_IMAGE_TARGET', 1.0))  # seconds
+LOAD_VIDEO_TARGET = float(os.environ.get('LOAD_VIDEO_TARGET', 10.0))
+LOAD_AUDIO_TARGET = float(os.environ.get('LOAD_AUDIO_TARGET', 2.0))
+LOAD_HEADROOM = float(os.environ.get('LOAD_HEADROOM', 0.5))  # share of the budget the mean may use
+LOAD_MIN_FRAMES_PER_SECOND = float(os.environ.get('LOAD_MIN_FRAMES_PER_SECOND', 0.25))
+LOAD_MIN_FRAMES = int(os.environ.get('LOAD_MIN_FRAMES', 16))
+LOAD_MIN_AUDIO_WINDOWS = int(os.environ.get('LOAD_MIN_AUDIO_WINDOWS', 8))
+LOAD_MIN_RESOLUTION = int(os.environ.get('LOAD_MIN_RESOLUTION', 160))
+
+# Backbone embeddings (POST /api/embeddings, python -m models.embeddings): 1280-d pooled features
+# kept as float16 in EMBEDDINGS_FOLDER, so a new head or threshold re-scores media without the
+# backbone; empty keeps the API from storing them
+EMBEDDINGS_FOLDER = os.environ.get('EMBEDDINGS_FOLDER', '')
+
+# Chunked, resumable uploads (POST /api/uploads) for media above MAX_CONTENT_LENGTH: chunks of at most
+# UPLOAD_CHUNK_SIZE are analyzed as they arrive by UPLOAD_ANALYSIS_WORKERS threads per process. Each
+# upload reserves its declared size (at most UPLOAD_MAX_SIZE) against UPLOAD_DISK_QUOTA until it is
+# finalized, aborted, or expires UPLOAD_TTL seconds after its last chunk
+UPLOADS_FOLDER = os.environ.get('UPLOADS_FOLDER', os.path.join(UPLOAD_FOLDER, 'chunked'))
+UPLOADS_DB_PATH = os.environ.get('UPLOADS_DB_PATH', os.path.join(UPLOADS_FOLDER, 'uploads.sqlite3'))
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 4 * 1024 * 1024 * 1024))
+UPLOAD_DISK_QUOTA = int(os.environ.get('UPLOAD_DISK_QUOTA', 20 * 1024 * 1024 * 1024))
+UPLOAD_TTL = float(os.environ.get('UPLOAD_TTL', 3600))
+UPLOAD_ANALYSIS_WORKERS = int(os.environ.get('UPLOAD_ANALYSIS_WORKERS', 1))
+os.makedirs(UPLOADS_FOLDER, exist_ok=True)
+
 # File upload settings
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
-ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov'}
-ALLOWED_AUDIO_EXTENSIONS = {'wav', 'mp3'}
\ No newline at end of file
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
+ALLOWED_AUDIO_EXTENSIONS = {'wav', 'mp3'}
+
+# Decode uploads from memory; UPLOAD_FOLDER is only used when that fails (e.g. formats needing audioread)
+IN_MEMORY_UPLOADS = os.environ.get('IN_MEMORY_UPLOADS', 'True').lower() == 'true'
\ No newline at end of file
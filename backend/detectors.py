@@ -0,0 +1,87 @@
+"""
+Build detectors from the settings in config.py
+
+Shared by the API (app.py) and the offline scanner (scan.py), so both score
+media with the same models, backends and pipeline options.
+"""
+import os
+
+from models.image_detector import ImageDetector
+from models.video_detector import VideoDetector
+from models.audio_detector import AudioDetector
+from utils.preprocessing import AudioLoader
+from utils.pipeline import DecodePool
+from utils.face_detection import FaceLocator
+from config import (INFERENCE_BACKEND, INFERENCE_THREADS, EXPORT_FOLDER,
+                    IMAGE_MODEL_PATH, AUDIO_MODEL_PATH, IMAGE_BASE_WEIGHTS, QUANTIZATION,
+                    MODEL_ARTIFACTS, ARTIFACTS_FOLDER,
+                    IMAGE_QUANTIZED_MODEL_PATH, AUDIO_QUANTIZED_MODEL_PATH,
+                    AUDIO_WINDOWED, AUDIO_MAX_WINDOWS,
+                    AUDIO_DECODER, AUDIO_RESAMPLER, AUDIO_FEATURES,
+                    PIPELINE_WORKERS, PIPELINE_EXECUTOR, PIPELINE_PREFETCH,
+                    FACE_CROP, FACE_CASCADE, FACE_MARGIN, FACE_MAX_FACES, FACE_REDETECT_EVERY,
+                    VIDEO_ADAPTIVE, VIDEO_MIN_FRAMES, VIDEO_MAX_FRAMES, VIDEO_ADAPTIVE_STEP,
+                    VIDEO_SPRT_DELTA, VIDEO_SPRT_ALPHA, VIDEO_SPRT_BETA,
+                    VIDEO_DEDUP, VIDEO_DEDUP_THRESHOLD)
+
+video_adaptive_options = {
+    'adaptive': VIDEO_ADAPTIVE,
+    'adaptive_min_frames': VIDEO_MIN_FRAMES,
+    'adaptive_max_frames': VIDEO_MAX_FRAMES or None,
+    'adaptive_step': VIDEO_ADAPTIVE_STEP,
+    'sprt_delta': VIDEO_SPRT_DELTA,
+    'sprt_alpha': VIDEO_SPRT_ALPHA,
+    'sprt_beta': VIDEO_SPRT_BETA
+}
+artifact_folder = ARTIFACTS_FOLDER if MODEL_ARTIFACTS else None
+video_dedup_threshold = VIDEO_DEDUP_THRESHOLD if VIDEO_DEDUP else None
+face_params = {'face_crop': FACE_CROP, 'face_cascade': FACE_CASCADE, 'face_margin': FACE_MARGIN,
+               'face_max_faces': FACE_MAX_FACES, 'face_redetect_every': FACE_REDETECT_EVERY} if FACE_CROP else {}
+
+def detector_backend(kind):
+    """Backend name and options for this detector kind, honouring the quantization switch"""
+    if QUANTIZATION != 'none':
+        quantized_path = IMAGE_QUANTIZED_MODEL_PATH if kind == 'image' else AUDIO_QUANTIZED_MODEL_PATH
+        if os.path.exists(quantized_path):
+            return 'tflite', {'export_path': quantized_path, 'num_threads': INFERENCE_THREADS}
+        print(f"Warning: quantized {kind} model not found at {quantized_path}. Using {INFERENCE_BACKEND} backend.")
+    
+    export_path = None
+    if INFERENCE_BACKEND == 'savedmodel':
+        export_path = os.path.join(EXPORT_FOLDER, f"{kind}_savedmodel")
+    elif INFERENCE_BACKEND == 'tflite':
+        export_path = os.path.join(EXPORT_FOLDER, f"{kind}.tflite")
+    if export_path:
+        os.makedirs(EXPORT_FOLDER, exist_ok=True)
+    return INFERENCE_BACKEND, {'export_path': export_path, 'num_threads': INFERENCE_THREADS}
+
+def make_decode_pool():
+    """Decode/preprocess workers shared by all detectors, or None when PIPELINE_WORKERS is 0"""
+    if PIPELINE_WORKERS <= 0:
+        return None
+    return DecodePool(workers=PIPELINE_WORKERS, executor=PIPELINE_EXECUTOR, prefetch=PIPELINE_PREFETCH)
+
+def make_face_locator():
+    """Optional face-crop stage in front of the image model, or None when FACE_CROP is off"""
+    if not FACE_CROP:
+        return None
+    return FaceLocator(cascade=FACE_CASCADE, margin=FACE_MARGIN, max_faces=FACE_MAX_FACES)
+
+def make_image_detector(face_locator=None, metrics=None):
+    backend, backend_options = detector_backend('image')
+    return ImageDetector(model_path=IMAGE_MODEL_PATH, backend=backend, backend_options=backend_options,
+                         base_weights=IMAGE_BASE_WEIGHTS, face_locator=face_locator, metrics=metrics,
+                         artifact_folder=artifact_folder)
+
+def make_video_detector(image_detector, decode_pool=None, face_locator=None):
+    return VideoDetector(image_detector=image_detector, decode_pool=decode_pool,
+                         face_locator=face_locator, face_redetect_every=FACE_REDETECT_EVERY,
+                         dedup_threshold=video_dedup_threshold, **video_adaptive_options)
+
+def make_audio_detector(decode_pool=None, metrics=None):
+    backend, backend_options = detector_backend('audio')
+    return AudioDetector(model_path=AUDIO_MODEL_PATH, backend=backend, backend_options=backend_options,
+                         windowed=AUDIO_WINDOWED, max_windows=AUDIO_MAX_WINDOWS,
+                         audio_loader=AudioLoader(decoder=AUDIO_DECODER, res_type=AUDIO_RESAMPLER),
+                         feature_backend=AUDIO_FEATURES, decode_pool=decode_pool, metrics=metrics,
+                         artifact_folder=artifact_folder)
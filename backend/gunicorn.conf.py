@@ -0,0 +1,31 @@
+"""
+Gunicorn settings for the API
+
+With preload_app (the default here) the master imports TensorFlow, the app and
+its dependencies once, and forks workers that share those pages copy-on-write
+instead of each importing them again. TensorFlow hangs in a child forked after
+it has built a model, so the master never builds one: each worker restores its
+models from the artifact cache (see models.artifacts) and runs a warm-up
+inference on a background thread. GET /api/ready answers 503 until it is done.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import os
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+if preload_app:
+    # Read by config.py, so it must be set before the app (and config) is imported
+    os.environ['PREFORK_SERVER'] = 'true'
+
+from config import API_HOST, API_PORT  # noqa: E402
+
+bind = os.environ.get('GUNICORN_BIND', f"{API_HOST}:{API_PORT}")
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+def post_worker_init(worker):
+    # Warm up in the background so the worker keeps answering the arbiter's heartbeat meanwhile
+    import app
+    app.start_warm_up()
@@ -0,0 +1,114 @@
+"""
+Serialized model artifacts for fast, offline worker startup
+
+The detectors assemble their networks in code (EfficientNetB0 backbone with
+ImageNet weights plus classification head, the audio CNN) and then load the
+fine-tuned weights. The assembled result is cached here as one HDF5 file per
+model, named after everything that changes it, so a worker restores it with
+one read and never fetches ImageNet weights. Missing artifacts are built and
+written on first use; this script builds them ahead of a deployment.
+
+Usage (from the backend directory):
+    python -m models.artifacts [--force]
+"""
+import argparse
+import hashlib
+import os
+import time
+import warnings
+
+import tensorflow as tf
+
+# Bump when a detector's architecture changes, so old artifacts are never restored
+ARTIFACT_VERSION = 1
+
+def artifact_path(folder, kind, model_path=None, base_weights=None):
+    """
+    Artifact file for a model, unique to its architecture, weights and TensorFlow version
+    
+    Args:
+        folder (str): Artifact directory
+        kind (str): 'image' or 'audio'
+        model_path (str, optional): Fine-tuned weights loaded on top of the architecture
+        base_weights (str, optional): Backbone weights, e.g. 'imagenet'
+        
+    Returns:
+        str: Path of the .h5 artifact (which may not exist yet)
+    """
+    parts = [str(ARTIFACT_VERSION), tf.__version__, kind, str(base_weights)]
+    if model_path and os.path.exists(model_path):
+        stat = os.stat(model_path)
+        parts += [os.path.abspath(model_path), str(stat.st_size), str(stat.st_mtime_ns)]
+    digest = hashlib.sha256('\0'.join(parts).encode()).hexdigest()[:16]
+    return os.path.join(folder, f"{kind}-{digest}.h5")
+
+def save_artifact(model, path):
+    """
+    Write a model's architecture and weights atomically, so concurrent workers never read a partial file
+    
+    Returns:
+        bool: True if written; False (with a warning) if the folder is not writable
+    """
+    temp_path = f"{path[:-len('.h5')]}.{os.getpid()}.tmp.h5"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with warnings.catch_warnings():
+            # Keras calls HDF5 legacy, but it restores these models about twice as fast as .keras
+            warnings.simplefilter('ignore', UserWarning)
+            model.save(temp_path)
+        os.replace(temp_path, path)
+        return True
+    except Exception as e:
+        print(f"Warning: could not write model artifact {path}: {str(e)}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+def load_or_build(path, build):
+    """
+    Restore a model from its artifact, or build it and write the artifact
+    
+    Args:
+        path (str, optional): Artifact file; None always builds
+        build (callable): Zero-argument function assembling the model in code
+        
+    Returns:
+        tf.keras.Model: Model ready for inference (not compiled)
+    """
+    if path and os.path.exists(path):
+        try:
+            model = tf.keras.models.load_model(path, compile=False)
+            print(f"Restored model from {path}")
+            return model
+        except Exception as e:
+            print(f"Warning: could not restore model artifact {path}, rebuilding: {str(e)}")
+    
+    model = build()
+    if path:
+        save_artifact(model, path)
+    return model
+
+def main():
+    from detectors import make_image_detector, make_audio_detector
+    from config import ARTIFACTS_FOLDER, MODEL_ARTIFACTS
+    
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--force', action='store_true', help="Rebuild artifacts that already exist")
+    args = parser.parse_args()
+    if not MODEL_ARTIFACTS:
+        raise SystemExit("MODEL_ARTIFACTS is disabled; nothing to build")
+    
+    for detector in (make_image_detector(), make_audio_detector()):
+        path = detector.artifact_path()
+        if args.force and os.path.exists(path):
+            os.remove(path)
+        start_time = time.time()
+        detector.model  # restores the artifact, or builds and writes it
+        if not os.path.exists(path):
+            raise SystemExit(f"Could not write {path}")
+        print(f"{detector.model_key[0]}: {path} ({os.path.getsize(path) / 1e6:.1f} MB, "
+              f"{time.time() - start_time:.1f}s)")
+    print(f"Artifacts are in {ARTIFACTS_FOLDER}")
+
+if __name__ == "__main__":
+    main()
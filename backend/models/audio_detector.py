@@ -1,28 +1,150 @@
+import base64
+import copy
+import io
 import os
+import time
 import numpy as np
 import librosa
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
-import matplotlib.pyplot as plt
-import tempfile
+from models.registry import registry
+from models.backends import create_backend
+from models.artifacts import artifact_path, load_or_build
+from utils.batching import MicroBatcher, QueueFullError
+from utils.postprocessing import spectrogram_to_png
+from utils.preprocessing import AudioLoader, MelSpectrogram
+from utils.pipeline import StageTimer, prefetch
 
 class AudioDetector:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend='keras', backend_options=None, windowed=False,
+                 max_windows=64, window_hop=108, window_aggregate='max', batch_size=16,
+                 audio_loader=None, feature_backend='librosa', decode_pool=None, metrics=None,
+                 artifact_folder=None):
         """
         Initialize the AudioDetector
         
         Args:
             model_path (str, optional): Path to saved model weights.
+            backend (str): Inference backend, see models.backends.BACKENDS
+            backend_options (dict, optional): Extra arguments for models.backends.create_backend
+            windowed (bool): Score the whole file in sliding windows instead of the first 5 seconds
+            max_windows (int): Cap on windows scored per file, spread uniformly over the file
+            window_hop (int): Spectrogram frames between window starts (108 = 50% overlap)
+            window_aggregate (str): How window scores combine into the verdict, 'max' or 'mean'
+            batch_size (int): Number of windows scored per model forward pass
+            audio_loader (AudioLoader, optional): Decoder/resampler. If None, uses librosa.load semantics.
+            feature_backend (str): Spectrogram implementation, see utils.preprocessing.FEATURE_BACKENDS
+            decode_pool (DecodePool, optional): Threads that decode ahead of the spectrogram,
+                split the numpy STFT, and build window batches ahead of inference
+            metrics (Metrics, optional): Records the size of every forward pass as inference_batch_size
+            artifact_folder (str, optional): Cache of assembled models, see models.artifacts
         """
         self.model_path = model_path
-        self.model = self._load_model()
+        self.artifact_folder = artifact_folder
         self.sample_rate = 22050  # Default sample rate
         self.duration = 5  # Process 5-second chunks
         
+        # Spectrogram settings (216 frames of hop 512 at 22050 Hz = 5 seconds)
+        self.n_fft = 2048
+        self.hop_length = 512
+        self.n_mels = 128
+        self.fmax = 8000
+        self.window_frames = 216
+        self.audio_loader = audio_loader or AudioLoader(sample_rate=self.sample_rate)
+        self.mel = MelSpectrogram(
+            sample_rate=self.sample_rate,
+            n_fft=self.n_fft,
+            hop_length=self.hop_length,
+            n_mels=self.n_mels,
+            fmax=self.fmax,
+            backend=feature_backend,
+            executor=decode_pool.threads() if decode_pool is not None else None,
+            workers=decode_pool.workers if decode_pool is not None else 1
+        )
+        self.decode_pool = decode_pool
+        self.metrics = metrics
+        
+        # Windowed full-length analysis
+        self.windowed = windowed
+        self.max_windows = max_windows
+        self.window_hop = window_hop
+        self.window_aggregate = window_aggregate
+        self.batch_size = batch_size
+        
+        # The network is built lazily and shared with any detector using the same weights
+        self.model_key = ('audio', model_path)
+        registry.register(self.model_key, self._load_model)
+        
+        self.backend_name = backend
+        self.backend_key = self.model_key + (backend,)
+        registry.register(self.backend_key, lambda: create_backend(
+            backend, lambda: self.model, **(backend_options or {})
+        ))
+        
+        # Optional request-coalescing scheduler, see enable_batching()
+        self.batcher = None
+    
+    @property
+    def model(self):
+        """
+        The shared TensorFlow model, built on first access
+        """
+        return registry.get(self.model_key)
+    
+    @property
+    def backend(self):
+        """
+        The shared inference backend wrapping the model, built on first access
+        """
+        return registry.get(self.backend_key)
+        
+    def artifact_path(self):
+        """
+        Artifact file for this detector's model, or None without an artifact folder
+        """
+        if not self.artifact_folder:
+            return None
+        return artifact_path(self.artifact_folder, 'audio', self.model_path)
+    
+    def warm_up(self):
+        """
+        Build the model and backend and run one inference, so the first request pays no setup cost
+        """
+        self.backend.predict(np.zeros((1, self.n_mels, self.window_frames, 1), dtype=np.float32), batch_size=1)
+    
+    def with_settings(self, **settings):
+        """
+        Copy of this detector with some settings replaced, e.g. fewer windows under load
+        
+        The copy shares models, batcher and decode pool; the detector itself is unchanged,
+        so concurrent requests can each run with their own settings.
+        
+        Args:
+            **settings: Attribute values, e.g. max_windows=8
+            
+        Returns:
+            AudioDetector: The copy
+        """
+        detector = copy.copy(self)
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise AttributeError(f"Unknown audio detector setting: {name}")
+            setattr(detector, name, value)
+        return detector
+    
     def _load_model(self):
         """
-        Load and prepare the model for inference
+        Load and prepare the model for inference, from its artifact when there is one
+        
+        Returns:
+            A TensorFlow model ready for prediction
+        """
+        return load_or_build(self.artifact_path(), self._build_model)
+    
+    def _build_model(self):
+        """
+        Assemble and compile the network and load the fine-tuned weights
         
         Returns:
             A TensorFlow model ready for prediction
@@ -57,33 +179,71 @@ class AudioDetector:
         
         return model
     
-    def create_spectrogram(self, audio_path, temp_img_path=None):
+    def enable_batching(self, max_batch_size=32, max_wait_ms=5, max_queue_size=256):
         """
-        Create a spectrogram from an audio file
+        Route predictions through a MicroBatcher shared by concurrent requests
+        
+        Args:
+            max_batch_size (int): Rows that trigger an immediate forward pass
+            max_wait_ms (float): Longest time a request waits for others to join its batch
+            max_queue_size (int): Pending requests allowed before new ones are rejected
+        """
+        self.batcher = MicroBatcher(
+            lambda batch: self.backend.predict(batch, batch_size=max_batch_size),
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            max_queue_size=max_queue_size,
+            on_batch=self._record_batch
+        )
+    
+    def _predict(self, batch):
+        """
+        Run the model on a batch of spectrograms, through the batcher if enabled
+        
+        Args:
+            batch (numpy.ndarray): Model input of shape (n, 128, 216, 1)
+            
+        Returns:
+            numpy.ndarray: Scores of shape (n, 1)
+        """
+        if self.batcher is not None:
+            return self.batcher.predict(batch)
+        self._record_batch(len(batch))
+        return self.backend.predict(batch)
+    
+    def _record_batch(self, rows):
+        """
+        Record the size of one forward pass
+        """
+        if self.metrics is not None:
+            self.metrics.observe('inference_batch_size', rows, {'detector': 'audio'})
+    
+    def mel_spectrogram_db(self, audio_path, timer=None):
+        """
+        Compute the fixed-size mel spectrogram in decibels
         
         Args:
             audio_path (str): Path to the audio file
-            temp_img_path (str, optional): Path to save the spectrogram image
+            timer (StageTimer, optional): Accumulates 'decode' and 'features' seconds
             
         Returns:
-            numpy.ndarray: Processed spectrogram for model input
+            numpy.ndarray: Spectrogram of shape (128, 216), in dB relative to its maximum
         """
-        # Load audio file
+        timer = timer or StageTimer()
+        
+        # Load audio file (only the first self.duration seconds are decoded)
         try:
-            y, sr = librosa.load(audio_path, sr=self.sample_rate, duration=self.duration)
+            with timer.stage('decode'):
+                y = self.audio_loader.load(audio_path, duration=self.duration)
         except Exception as e:
             raise Exception(f"Error loading audio file: {str(e)}")
         
-        # Create mel spectrogram
-        mel_spectrogram = librosa.feature.melspectrogram(
-            y=y,
-            sr=sr,
-            n_mels=128,
-            fmax=8000
-        )
-        
-        # Convert to decibels
-        mel_spectrogram_db = librosa.power_to_db(mel_spectrogram, ref=np.max)
+        with timer.stage('features'):
+            # Create mel spectrogram
+            mel_spectrogram = self.mel.power(y)
+            
+            # Convert to decibels
+            mel_spectrogram_db = librosa.power_to_db(mel_spectrogram, ref=np.max)
         
         # Resize if necessary to fit model input
         if mel_spectrogram_db.shape[1] < 216:
@@ -94,71 +254,394 @@ class AudioDetector:
             # Truncate
             mel_spectrogram_db = mel_spectrogram_db[:, :216]
         
-        # If a temp path is provided, save the spectrogram as an image for visualization
-        if temp_img_path:
-            plt.figure(figsize=(10, 4))
-            plt.imshow(mel_spectrogram_db, aspect='auto', origin='lower')
-            plt.colorbar(format='%+2.0f dB')
-            plt.title('Mel Spectrogram')
-            plt.tight_layout()
-            plt.savefig(temp_img_path)
-            plt.close()
-        
-        # Normalize and reshape for model input
+        return mel_spectrogram_db
+    
+    def to_model_input(self, mel_spectrogram_db):
+        """
+        Normalize a dB spectrogram and add batch and channel dimensions
+        
+        Args:
+            mel_spectrogram_db (numpy.ndarray): Spectrogram of shape (128, 216)
+            
+        Returns:
+            numpy.ndarray: Model input of shape (1, 128, 216, 1)
+        """
         mel_spectrogram_db = (mel_spectrogram_db - mel_spectrogram_db.min()) / (mel_spectrogram_db.max() - mel_spectrogram_db.min())
         mel_spectrogram_db = np.expand_dims(mel_spectrogram_db, axis=0)  # Add batch dimension
         mel_spectrogram_db = np.expand_dims(mel_spectrogram_db, axis=3)  # Add channel dimension
         
         return mel_spectrogram_db
     
-    def detect(self, audio_path):
+    def create_spectrogram(self, audio_path, temp_img_path=None):
         """
-        Detect if an audio contains deepfake content
+        Create a spectrogram from an audio file
         
         Args:
             audio_path (str): Path to the audio file
+            temp_img_path (str, optional): Path to save the spectrogram image as PNG
+            
+        Returns:
+            numpy.ndarray: Processed spectrogram for model input
+        """
+        mel_spectrogram_db = self.mel_spectrogram_db(audio_path)
+        
+        # If a path is provided, save the spectrogram as an image for visualization
+        if temp_img_path:
+            with open(temp_img_path, 'wb') as f:
+                f.write(spectrogram_to_png(mel_spectrogram_db))
+        
+        return self.to_model_input(mel_spectrogram_db)
+    
+    def mel_power(self, audio_path, timer=None, truncated=False, start_frame=0):
+        """
+        Mel power spectrogram of the whole file, computed while streaming the decode
+        
+        Frames match librosa.feature.melspectrogram with center=True, but only one
+        block of raw samples is held in memory at a time (two with a decode pool,
+        which decodes the next block while this one is transformed).
+        
+        Args:
+            audio_path (str): Path to the audio file
+            timer (StageTimer, optional): Accumulates 'decode' (time waiting for decoded
+                blocks) and 'features' seconds
+            truncated (bool): The file may still be growing: stop at the first block that
+                fails to decode instead of raising
+            start_frame (int): First frame to return; decoding starts a second before it,
+                so a resampler has settled by then
+            
+        Returns:
+            numpy.ndarray: Mel power spectrogram of shape (128, frames from start_frame on), float32
+        """
+        timer = timer or StageTimer()
+        pad = self.n_fft // 2
+        first = max(0, start_frame - self.sample_rate // self.hop_length)
+        offset = first * self.hop_length - pad
+        if offset <= 0:
+            first, offset = 0, 0
+        
+        # Leading zeros reproduce librosa's centred framing
+        buffer = np.zeros(pad if first == 0 else 0, dtype=np.float32)
+        frames = []
+        
+        def consume(buffer):
+            if len(buffer) < self.n_fft:
+                return buffer
+            n_frames = 1 + (len(buffer) - self.n_fft) // self.hop_length
+            used = (n_frames - 1) * self.hop_length + self.n_fft
+            frames.append(self.mel.power(buffer[:used], center=False))
+            return buffer[n_frames * self.hop_length:]
+        
+        blocks = self.audio_loader.stream(audio_path, offset=offset / self.sample_rate)
+        if self.decode_pool is not None:
+            blocks = prefetch(blocks, depth=self.decode_pool.prefetch)
+        
+        while True:
+            with timer.stage('decode'):
+                try:
+                    y = next(blocks, None)
+                except Exception:
+                    if not truncated:
+                        raise
+                    y = None
+            if y is None:
+                break
+            with timer.stage('features'):
+                buffer = consume(np.concatenate([buffer, y]))
+        with timer.stage('features'):
+            consume(np.concatenate([buffer, np.zeros(pad, dtype=np.float32)]))
+        
+        if not frames:
+            return np.zeros((self.n_mels, 0), dtype=np.float32)
+        return np.concatenate(frames, axis=1)[:, start_frame - first:]
+    
+    def all_window_starts(self, n_frames):
+        """
+        Start frames of every sliding window over the spectrogram
+        
+        Args:
+            n_frames (int): Length of the spectrogram in frames
+            
+        Returns:
+            list: Window start frames, including one aligned with the tail
+        """
+        last_start = max(n_frames - self.window_frames, 0)
+        starts = list(range(0, last_start + 1, self.window_hop))
+        if starts[-1] != last_start:
+            starts.append(last_start)
+        return starts
+    
+    def window_starts(self, n_frames):
+        """
+        Start frames of the sliding windows to score
+        
+        Args:
+            n_frames (int): Length of the spectrogram in frames
+            
+        Returns:
+            list: Window start frames, capped at max_windows spread uniformly over the file
+        """
+        starts = self.all_window_starts(n_frames)
+        if self.max_windows and len(starts) > self.max_windows:
+            picks = np.linspace(0, len(starts) - 1, self.max_windows)
+            starts = [starts[i] for i in sorted(set(int(round(p)) for p in picks))]
+        
+        return starts
+    
+    def windows_to_model_input(self, power_windows):
+        """
+        Convert mel power windows to normalized dB model inputs
+        
+        Each window is scaled like a standalone clip: dB relative to its own
+        maximum, clipped at 80 dB below it, then min-max normalized.
+        
+        Args:
+            power_windows (numpy.ndarray): Windows of shape (n, 128, 216)
+            
+        Returns:
+            numpy.ndarray: Model input of shape (n, 128, 216, 1)
+        """
+        db = 10.0 * np.log10(np.maximum(power_windows, 1e-10))
+        db -= db.max(axis=(1, 2), keepdims=True)
+        db = np.maximum(db, -80.0)
+        
+        low = db.min(axis=(1, 2), keepdims=True)
+        normalized = (db - low) / np.maximum(-low, 1e-10)
+        return normalized[..., np.newaxis].astype(np.float32)
+    
+    def detect_windowed(self, audio_path, return_spectrogram=False):
+        """
+        Score the whole file in overlapping 5-second windows
+        
+        Args:
+            audio_path (str): Path to the audio file
+            return_spectrogram (bool): Also return the highest-scoring window as a base64-encoded PNG
+            
+        Returns:
+            dict: Aggregate result plus per-window scores in window_analysis
+        """
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        mel = self.mel_power(audio_path, timer=timer)
+        if mel.shape[1] < self.window_frames:
+            mel = np.pad(mel, ((0, 0), (0, self.window_frames - mel.shape[1])))
+        
+        starts = self.window_starts(mel.shape[1])
+        windows_available = len(self.all_window_starts(mel.shape[1]))
+        scores = self._score_windows(mel, starts, timer)
+        
+        result = self._windowed_result(mel, starts, scores, windows_available, timer, return_spectrogram)
+        result['timings'] = {**timer.as_dict(), 'total': time.perf_counter() - start_time}
+        return result
+    
+    def score_received(self, audio_path, state, timer=None):
+        """
+        Score the sliding windows of an audio file that is still being uploaded
+        
+        Decodes from just before the first window not scored yet to the end of
+        the data, and scores the windows on the hop grid that end at least a
+        second before it, since the last frames change as more samples arrive.
+        max_windows does not apply: this work happens while the rest of the file
+        is still in transit.
+        
+        Args:
+            audio_path (str): Path to the audio file, possibly still growing
+            state (dict): Progress, updated in place and JSON-serializable: 'windows'
+                (start frame as str -> raw score). Start with {}.
+            timer (StageTimer, optional): Accumulates stage seconds
+            
+        Returns:
+            int: Windows scored by this call
+        """
+        timer = timer or StageTimer()
+        windows = state.setdefault('windows', {})
+        next_start = max((int(start) for start in windows), default=-self.window_hop) + self.window_hop
+        mel = self.mel_power(audio_path, timer=timer, truncated=True, start_frame=next_start)
+        usable = mel.shape[1] - self.sample_rate // self.hop_length
+        starts = list(range(0, usable - self.window_frames + 1, self.window_hop))
+        for start, score in zip(starts, self._score_windows(mel, starts, timer)):
+            windows[str(next_start + start)] = score
+        return len(starts)
+    
+    def detect_received(self, audio_path, state, return_spectrogram=False):
+        """
+        Windowed verdict for a completely uploaded file, scoring what score_received() has not yet
+        
+        Args:
+            audio_path (str): Path to the complete audio file
+            state (dict): Progress from score_received(), updated in place
+            return_spectrogram (bool): Also return the highest-scoring window as a base64-encoded PNG
+            
+        Returns:
+            dict: Result as from detect_windowed() with max_windows unset, plus windows_scored_before_finalize
+        """
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        windows = state.setdefault('windows', {})
+        scored_before = len(windows)
+        
+        # Only the part after the scored windows is decoded, from a hop earlier for the window
+        # aligned with the end of the file
+        next_start = max((int(start) for start in windows), default=-self.window_hop) + self.window_hop
+        mel_from = max(0, next_start - self.window_hop)
+        mel = self.mel_power(audio_path, timer=timer, start_frame=mel_from)
+        n_frames = mel_from + mel.shape[1]
+        if n_frames < self.window_frames:
+            mel = np.pad(mel, ((0, 0), (0, self.window_frames - n_frames)))
+            n_frames = self.window_frames
+        
+        starts = self.all_window_starts(n_frames)
+        missing = [start for start in starts if str(start) not in windows]
+        for start, score in zip(missing, self._score_windows(mel, [start - mel_from for start in missing], timer)):
+            windows[str(start)] = score
+        
+        scores = [windows[str(start)] for start in starts]
+        if return_spectrogram and starts[int(np.argmax(scores))] < mel_from:
+            # The best window was scored during the upload; decode from there again
+            mel_from = starts[int(np.argmax(scores))]
+            mel = self.mel_power(audio_path, timer=timer, start_frame=mel_from)
+        result = self._windowed_result(mel, starts, scores, len(starts), timer, return_spectrogram,
+                                       mel_offset=mel_from)
+        result['windows_scored_before_finalize'] = scored_before
+        result['timings'] = {**timer.as_dict(), 'total': time.perf_counter() - start_time}
+        return result
+    
+    def _score_windows(self, mel, starts, timer):
+        """
+        Raw model scores of the spectrogram windows starting at the given frames
+        
+        Args:
+            mel (numpy.ndarray): Mel power spectrogram of shape (128, frames)
+            starts (list): Window start frames
+            timer (StageTimer): Accumulates 'features' and 'inference' seconds
+            
+        Returns:
+            list: One float score per window
+        """
+        # Zero-copy (128, n_windows, 216) view; only one batch of windows is copied at a time
+        views = np.lib.stride_tricks.sliding_window_view(mel, self.window_frames, axis=1)
+        
+        def model_inputs():
+            for i in range(0, len(starts), self.batch_size):
+                with timer.stage('features'):
+                    batch = np.moveaxis(views[:, starts[i:i + self.batch_size]], 1, 0)
+                    yield self.windows_to_model_input(batch)
+        
+        # With a decode pool the next batch is normalized while the model scores this one
+        batches = model_inputs()
+        if self.decode_pool is not None:
+            batches = prefetch(batches, depth=self.decode_pool.prefetch)
+        
+        scores = []
+        for batch in batches:
+            with timer.stage('inference'):
+                scores.extend(float(score[0]) for score in self._predict(batch))
+        return scores
+    
+    def _windowed_result(self, mel, starts, scores, windows_available, timer, return_spectrogram=False,
+                         mel_offset=0):
+        """
+        Aggregate window scores into the windowed verdict
+        
+        Args:
+            mel_offset (int): Frame of the file at which mel starts, for the spectrogram
+        
+        Returns:
+            dict: Result of detect_windowed(), without timings
+        """
+        seconds_per_frame = self.hop_length / self.sample_rate
+        with timer.stage('aggregation'):
+            window_results = {}
+            for i, (start, score) in enumerate(zip(starts, scores)):
+                window_results[f"window_{i}"] = {
+                    'start': start * seconds_per_frame,
+                    'end': (start + self.window_frames) * seconds_per_frame,
+                    'is_fake': bool(score > 0.5),
+                    'confidence': float(max(score, 1 - score)),
+                    'raw_score': score
+                }
+            
+            prediction = max(scores) if self.window_aggregate == 'max' else float(np.mean(scores))
+        result = {
+            'is_fake': bool(prediction > 0.5),
+            'confidence': float(max(prediction, 1 - prediction)),
+            'raw_score': float(prediction),
+            'windows_analyzed': len(starts),
+            'windows_available': windows_available,
+            'window_analysis': window_results
+        }
+        
+        if return_spectrogram:
+            start = starts[int(np.argmax(scores))] - mel_offset
+            window_db = librosa.power_to_db(mel[:, start:start + self.window_frames], ref=np.max)
+            result['spectrogram'] = base64.b64encode(spectrogram_to_png(window_db)).decode('ascii')
+        
+        return result
+    
+    def detect_bytes(self, data, return_spectrogram=False, windowed=None):
+        """
+        Detect if in-memory encoded audio contains deepfake content
+        
+        Decodes from a BytesIO through libsndfile; formats that need audioread
+        fail here and should be retried from a file path.
+        
+        Args:
+            data (bytes): Encoded audio, e.g. the body of an upload
+            return_spectrogram (bool): Also return the spectrogram as a base64-encoded PNG
+            windowed (bool, optional): Score the whole file in sliding windows. If None, uses self.windowed
+            
+        Returns:
+            dict: Result with predictions and confidence
+        """
+        return self.detect(io.BytesIO(data), return_spectrogram=return_spectrogram, windowed=windowed)
+    
+    def detect(self, audio_path, return_spectrogram=False, windowed=None):
+        """
+        Detect if an audio contains deepfake content
+        
+        Args:
+            audio_path (str or file-like): Path to the audio file, or an open binary file
+            return_spectrogram (bool): Also return the spectrogram as a base64-encoded PNG
+            windowed (bool, optional): Score the whole file in sliding windows. If None, uses self.windowed
             
         Returns:
             dict: Result with predictions and confidence
         """
         try:
-            # Create a temporary directory for visualization (if needed)
-            temp_dir = tempfile.mkdtemp()
-            temp_img_path = os.path.join(temp_dir, "spectrogram.png")
+            if windowed if windowed is not None else self.windowed:
+                return self.detect_windowed(audio_path, return_spectrogram=return_spectrogram)
+            
+            start_time = time.perf_counter()
+            timer = StageTimer()
             
             # Process audio to create spectrogram
-            spectrogram = self.create_spectrogram(audio_path, temp_img_path)
+            mel_spectrogram_db = self.mel_spectrogram_db(audio_path, timer=timer)
+            with timer.stage('features'):
+                spectrogram = self.to_model_input(mel_spectrogram_db)
             
             # Make prediction
-            prediction = self.model.predict(spectrogram)[0][0]
+            with timer.stage('inference'):
+                prediction = self._predict(spectrogram)[0][0]
             
             # Confidence score and classification
             confidence = float(max(prediction, 1 - prediction))
             is_fake = bool(prediction > 0.5)
             
-            # Clean up
-            if os.path.exists(temp_img_path):
-                os.remove(temp_img_path)
-            try:
-                os.rmdir(temp_dir)
-            except:
-                pass
-            
-            return {
+            result = {
                 'is_fake': is_fake,
                 'confidence': confidence,
-                'raw_score': float(prediction)
+                'raw_score': float(prediction),
+                'timings': {**timer.as_dict(), 'total': time.perf_counter() - start_time}
             }
-        except Exception as e:
-            # Clean up in case of exception
-            try:
-                if 'temp_dir' in locals() and os.path.exists(temp_dir):
-                    for file in os.listdir(temp_dir):
-                        os.remove(os.path.join(temp_dir, file))
-                    os.rmdir(temp_dir)
-            except:
-                pass
             
+            # Visualization is opt-in; the default path does no rendering or file I/O
+            if return_spectrogram:
+                png = spectrogram_to_png(mel_spectrogram_db)
+                result['spectrogram'] = base64.b64encode(png).decode('ascii')
+            
+            return result
+        except QueueFullError:
+            raise
+        except Exception as e:
             raise Exception(f"Error in audio detection: {str(e)}")
 
 # For testing purposes
@@ -0,0 +1,190 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+# Available inference backends
+#   keras:      model.predict (original behaviour, highest per-call overhead)
+#   function:   tf.function-compiled direct call with a fixed input signature
+#   xla:        as 'function', compiled with XLA
+#   savedmodel: exported SavedModel serving signature
+#   tflite:     TFLite interpreter with configurable CPU threads
+BACKENDS = ('keras', 'function', 'xla', 'savedmodel', 'tflite')
+
+def _input_spec(model):
+    """
+    Fixed float32 input signature with a dynamic batch dimension
+    
+    Args:
+        model (tf.keras.Model): Model to describe
+        
+    Returns:
+        tf.TensorSpec: Input signature
+    """
+    return tf.TensorSpec([None] + list(model.input_shape[1:]), tf.float32)
+
+def _in_chunks(batch, batch_size, run):
+    """
+    Run a callable over a batch in chunks of at most batch_size rows
+    
+    Args:
+        batch (numpy.ndarray): Model input with a leading batch dimension
+        batch_size (int): Maximum rows per call
+        run (callable): Maps one chunk to a numpy array of outputs
+        
+    Returns:
+        numpy.ndarray: Concatenated outputs
+    """
+    outputs = [run(batch[i:i + batch_size]) for i in range(0, len(batch), batch_size)]
+    return outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+class KerasBackend:
+    def __init__(self, model):
+        """
+        Run inference through model.predict
+        
+        Args:
+            model (tf.keras.Model): Model to run
+        """
+        self.model = model
+    
+    def predict(self, batch, batch_size=32):
+        return self.model.predict(batch, batch_size=batch_size, verbose=0)
+
+class FunctionBackend:
+    def __init__(self, model, jit_compile=False):
+        """
+        Run inference through a tf.function-compiled direct model call
+        
+        Skips the data adapter and callback loop that model.predict sets up on
+        every call. The input signature is fixed apart from the batch dimension,
+        so the graph is traced once.
+        
+        Args:
+            model (tf.keras.Model): Model to run
+            jit_compile (bool): Compile the graph with XLA
+        """
+        self.model = model
+        self._fn = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[_input_spec(model)],
+            jit_compile=jit_compile
+        )
+    
+    def predict(self, batch, batch_size=32):
+        return _in_chunks(
+            np.asarray(batch, dtype=np.float32), batch_size,
+            lambda chunk: self._fn(chunk).numpy()
+        )
+
+class SavedModelBackend:
+    def __init__(self, model_fn, export_path=None):
+        """
+        Run inference through an exported SavedModel serving signature
+        
+        Args:
+            model_fn (callable): Returns the Keras model to export; only called
+                if export_path does not already hold a SavedModel
+            export_path (str, optional): SavedModel directory. If None, exports to a temp dir.
+        """
+        if export_path is None:
+            export_path = tempfile.mkdtemp()
+        
+        if not os.path.exists(os.path.join(export_path, 'saved_model.pb')):
+            model = model_fn()
+            serve = tf.function(lambda x: model(x, training=False))
+            tf.saved_model.save(
+                model, export_path,
+                signatures=serve.get_concrete_function(_input_spec(model))
+            )
+        
+        self.export_path = export_path
+        self._loaded = tf.saved_model.load(export_path)
+        self._fn = self._loaded.signatures['serving_default']
+    
+    def predict(self, batch, batch_size=32):
+        def run(chunk):
+            outputs = self._fn(tf.constant(chunk))
+            return next(iter(outputs.values())).numpy()
+        
+        return _in_chunks(np.asarray(batch, dtype=np.float32), batch_size, run)
+
+class TFLiteBackend:
+    def __init__(self, model_fn, model_file=None, num_threads=None):
+        """
+        Run inference through the TFLite interpreter
+        
+        Args:
+            model_fn (callable): Returns the Keras model to convert; only called
+                if model_file does not already exist
+            model_file (str, optional): .tflite file to load, or to write the conversion to
+            num_threads (int, optional): CPU threads used by the interpreter
+        """
+        if model_file and os.path.exists(model_file):
+            with open(model_file, 'rb') as f:
+                model_content = f.read()
+        else:
+            converter = tf.lite.TFLiteConverter.from_keras_model(model_fn())
+            model_content = converter.convert()
+            if model_file:
+                with open(model_file, 'wb') as f:
+                    f.write(model_content)
+        
+        self.model_file = model_file
+        self._interpreter = tf.lite.Interpreter(model_content=model_content, num_threads=num_threads)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_shape = None
+        
+        # The interpreter is not thread-safe
+        self._lock = threading.Lock()
+    
+    def predict(self, batch, batch_size=32):
+        with self._lock:
+            return _in_chunks(np.asarray(batch, dtype=self._input['dtype']), batch_size, self._invoke)
+    
+    def _invoke(self, chunk):
+        """
+        Run one chunk, resizing the interpreter input if its shape changed
+        
+        Args:
+            chunk (numpy.ndarray): Model input
+            
+        Returns:
+            numpy.ndarray: Model output (copied out of the interpreter)
+        """
+        if chunk.shape != self._batch_shape:
+            self._interpreter.resize_tensor_input(self._input['index'], chunk.shape)
+            self._interpreter.allocate_tensors()
+            self._batch_shape = chunk.shape
+        
+        self._interpreter.set_tensor(self._input['index'], chunk)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output['index']).copy()
+
+def create_backend(name, model_fn, export_path=None, num_threads=None):
+    """
+    Build an inference backend by name
+    
+    Args:
+        name (str): One of BACKENDS
+        model_fn (callable): Returns the Keras model to run, export or convert
+        export_path (str, optional): SavedModel directory or .tflite file for exported backends
+        num_threads (int, optional): CPU threads for the TFLite interpreter
+        
+    Returns:
+        An object with predict(batch, batch_size=32) returning numpy outputs
+    """
+    if name == 'keras':
+        return KerasBackend(model_fn())
+    if name == 'function':
+        return FunctionBackend(model_fn())
+    if name == 'xla':
+        return FunctionBackend(model_fn(), jit_compile=True)
+    if name == 'savedmodel':
+        return SavedModelBackend(model_fn, export_path=export_path)
+    if name == 'tflite':
+        return TFLiteBackend(model_fn, model_file=export_path, num_threads=num_threads)
+    raise ValueError(f"Unknown inference backend: {name}")
@@ -0,0 +1,168 @@
+"""
+Index backbone embeddings of media files and re-score them with a new head or threshold
+
+`index` runs the EfficientNetB0 trunk once over images and sampled video frames
+and keeps the 1280-d pooled features in an EmbeddingStore; files already in the
+store are skipped, so an interrupted run can simply be started again.
+`rescore` applies the classification head of a weights file to every stored
+embedding in large vectorized batches, without the backbone, and writes one
+verdict per file as JSONL.
+
+Usage (from the backend directory):
+    python -m models.embeddings index /data/archive [--manifest files.txt] [--store DIR]
+    python -m models.embeddings rescore --weights new_head.h5 [--threshold 0.3] --output rescored.jsonl
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+from models.image_detector import ImageDetector, EMBEDDING_DIM
+from models.video_detector import VideoDetector
+from detectors import make_image_detector, make_video_detector
+from utils.embedding_store import EmbeddingStore
+from utils.result_cache import hash_stream
+from config import EMBEDDINGS_FOLDER, IMAGE_MODEL_PATH, ALLOWED_IMAGE_EXTENSIONS, ALLOWED_VIDEO_EXTENSIONS
+
+def index(store, paths, video_detector, batch_size=32):
+    """
+    Embed every image and video not yet in the store
+    
+    Images are embedded batch_size at a time across files; videos one file at a time.
+    
+    Returns:
+        tuple: (files indexed, files skipped as already stored, files that failed)
+    """
+    image_detector = video_detector.image_detector
+    indexed = skipped = failed = 0
+    images = []
+    queued = set()
+    
+    def flush_images():
+        rows = np.stack([row for _, row in images])
+        for (content_hash, _), embedding in zip(images, image_detector.embed_batch(rows, batch_size=batch_size)):
+            store.put(content_hash, [0.0], embedding[np.newaxis], kind='image')
+        images.clear()
+        queued.clear()
+    
+    start_time = time.time()
+    for n, path in enumerate(paths, 1):
+        with open(path, 'rb') as f:
+            content_hash, _ = hash_stream(f)
+        if content_hash in queued or content_hash in store:
+            skipped += 1
+            continue
+        ext = path.rsplit('.', 1)[1].lower()
+        try:
+            if ext in ALLOWED_IMAGE_EXTENSIONS:
+                img_array = np.asarray(Image.open(path).convert('RGB'))
+                images.append((content_hash, image_detector.preprocess_array(img_array)))
+                queued.add(content_hash)
+                if len(images) == batch_size:
+                    flush_images()
+            elif ext in ALLOWED_VIDEO_EXTENSIONS:
+                timestamps, embeddings = video_detector.embed(path)
+                store.put(content_hash, timestamps, embeddings, kind='video')
+            indexed += 1
+        except Exception as e:
+            print(f"Warning: could not embed {path}: {str(e)}", file=sys.stderr)
+            failed += 1
+        if n % 100 == 0:
+            print(f"{n}/{len(paths)} files, {n / (time.time() - start_time):.1f} files/s", file=sys.stderr)
+    if images:
+        flush_images()
+    return indexed, skipped, failed
+
+def rescore(store, image_detector, video_detector, threshold=None, batch_rows=65536):
+    """
+    Verdicts for every file in the store from its stored embeddings
+    
+    Args:
+        store (EmbeddingStore): Embeddings to score
+        image_detector (ImageDetector): Supplies the classification head
+        video_detector (VideoDetector): Aggregates frame scores into a video verdict
+        threshold (float, optional): Fake-frame ratio for videos. If None, uses video_detector.threshold
+        batch_rows (int): Embeddings read and scored per batch
+        
+    Yields:
+        dict: content_hash, kind and the verdict fields of the image or video API response
+    """
+    def verdict(content_hash, kind, raw_scores):
+        if kind == 'video':
+            result = video_detector.aggregate_scores(raw_scores, threshold=threshold)
+        else:
+            result = image_detector.format_score(raw_scores[0])
+        return {
+            'content_hash': content_hash,
+            'kind': kind,
+            'result': 'fake' if result['is_fake'] else 'real',
+            **{key: value for key, value in result.items() if key != 'is_fake'}
+        }
+    
+    # A file's rows are written in one append, so in file order they arrive together
+    current, scores = None, []
+    for keys, embeddings in store.iter_batches(batch_rows):
+        for (content_hash, _, kind), score in zip(keys, image_detector.score_embeddings(embeddings)):
+            if (content_hash, kind) != current:
+                if current is not None:
+                    yield verdict(*current, np.array(scores))
+                current, scores = (content_hash, kind), []
+            scores.append(score)
+    if current is not None:
+        yield verdict(*current, np.array(scores))
+
+def main():
+    from scan import collect_paths
+    
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=('index', 'rescore'))
+    parser.add_argument('paths', nargs='*', help="index: files or directories")
+    parser.add_argument('--manifest', help="index: text file with one path per line")
+    parser.add_argument('--store', default=EMBEDDINGS_FOLDER or None,
+                        help="Embedding store directory (default: EMBEDDINGS_FOLDER)")
+    parser.add_argument('--weights', default=IMAGE_MODEL_PATH, help="rescore: detector weights whose head is applied")
+    parser.add_argument('--threshold', type=float, help="rescore: fake-frame ratio that makes a video fake")
+    parser.add_argument('--batch-size', type=int, default=32, help="index: images per forward pass")
+    parser.add_argument('--output', default='-', help="rescore: JSONL results, '-' for stdout")
+    args = parser.parse_args()
+    if not args.store:
+        parser.error("set --store or EMBEDDINGS_FOLDER")
+    
+    store = EmbeddingStore(args.store)
+    if args.command == 'index':
+        if not args.paths and not args.manifest:
+            parser.error("index needs at least one path or --manifest")
+        paths, _ = collect_paths(args.paths, args.manifest)
+        paths = [path for path in paths
+                 if path.rsplit('.', 1)[1].lower() in ALLOWED_IMAGE_EXTENSIONS | ALLOWED_VIDEO_EXTENSIONS]
+        # The serving backbone and frame sampling, so stored embeddings match what the API scores
+        indexed, skipped, failed = index(store, paths, make_video_detector(make_image_detector()),
+                                         batch_size=args.batch_size)
+        print(f"Indexed {indexed} files ({skipped} already stored or duplicates, {failed} failed); "
+              f"store: {store.stats()}", file=sys.stderr)
+        return
+    
+    # Only the head is evaluated, so the backbone needs no ImageNet weights
+    image_detector = ImageDetector(model_path=args.weights, base_weights=None)
+    video_detector = VideoDetector(image_detector=image_detector)
+    image_detector.score_embeddings(np.zeros((1, EMBEDDING_DIM), dtype=np.float32))  # build the head
+    start_time = time.time()
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        count = 0
+        for record in rescore(store, image_detector, video_detector, threshold=args.threshold):
+            out.write(json.dumps(record) + '\n')
+            count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    stats = store.stats()
+    elapsed = time.time() - start_time
+    print(f"Re-scored {count} files ({stats['embeddings']} embeddings) in {elapsed:.1f}s, "
+          f"{stats['embeddings'] / elapsed:.0f} embeddings/s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
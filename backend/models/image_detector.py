@@ -1,31 +1,231 @@
+import copy
+import io
 import os
+import threading
+import time
 import numpy as np
 import tensorflow as tf
+from PIL import Image
 from tensorflow.keras.preprocessing import image
 from tensorflow.keras.applications.efficientnet import EfficientNetB0, preprocess_input
+from models.registry import registry
+from models.backends import create_backend
+from models.artifacts import artifact_path, load_or_build
+from utils.batching import MicroBatcher, QueueFullError
+from utils.pipeline import StageTimer
+
+# Size of the pooled EfficientNetB0 features fed to the classification head
+EMBEDDING_DIM = 1280
+
+# Backends that can run the network at another input size; exported ones have a fixed input shape
+RESIZABLE_BACKENDS = ('keras', 'function', 'xla')
+
+def preprocess_frame(img_array, img_size=(224, 224)):
+    """
+    Resize an RGB image like load_img and apply the model's input preprocessing
+    
+    Module-level so decode pool workers (including processes) can call it.
+    
+    Args:
+        img_array (numpy.ndarray): RGB image of shape (height, width, 3), uint8
+        img_size (tuple): Target (width, height)
+        
+    Returns:
+        numpy.ndarray: Preprocessed image of shape (height, width, 3), float32
+    """
+    if img_array.shape[:2] != img_size[::-1]:
+        img = Image.fromarray(img_array).resize(img_size, Image.NEAREST)
+        img_array = np.asarray(img)
+    
+    return preprocess_input(img_array.astype(np.float32))
+
+def split_model(model):
+    """
+    Split the detector network at its pooled backbone features
+    
+    Args:
+        model (tf.keras.Model): Image detector network (backbone, GlobalAveragePooling2D, head)
+        
+    Returns:
+        tuple: (trunk mapping images to 1280-d embeddings, head mapping embeddings to scores),
+            both sharing the model's layers and weights
+    """
+    # The last pooling layer; the backbone's squeeze-and-excite blocks use the same layer type
+    pooled = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.GlobalAveragePooling2D)][-1]
+    trunk = tf.keras.Model(model.input, pooled.output)
+    
+    inputs = tf.keras.Input(shape=pooled.output_shape[1:])
+    x = inputs
+    for layer in model.layers[model.layers.index(pooled) + 1:]:
+        x = layer(x)
+    head = tf.keras.Model(inputs, x)
+    return trunk, head
+
+def resize_model(model, size):
+    """
+    The detector network for square inputs of another size, with the same weights
+    
+    The backbone is fully convolutional up to its pooling layer, so the weights
+    apply at any input size; smaller inputs trade accuracy for speed.
+    
+    Args:
+        model (tf.keras.Model): Image detector network
+        size (int): Input width and height in pixels, a multiple of 32
+        
+    Returns:
+        tf.keras.Model: Network taking inputs of shape (n, size, size, 3), with its own copy of the weights
+    """
+    resized = tf.keras.models.clone_model(model, input_tensors=tf.keras.Input(shape=(size, size, 3)))
+    resized.set_weights(model.get_weights())
+    return resized
+
+def most_fake(faces):
+    """
+    Verdict of a set of face results: that of the face with the highest fake score
+    
+    Args:
+        faces (list): Face result dicts with is_fake, confidence and raw_score
+        
+    Returns:
+        dict: is_fake, confidence and raw_score of that face
+    """
+    worst = max(faces, key=lambda face: face['raw_score'])
+    return {key: worst[key] for key in ('is_fake', 'confidence', 'raw_score')}
 
 class ImageDetector:
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, backend='keras', backend_options=None, base_weights='imagenet',
+                 face_locator=None, metrics=None, artifact_folder=None):
         """
         Initialize the ImageDetector with a pre-trained EfficientNetB0 model
         
         Args:
             model_path (str, optional): Path to saved model weights. If None, uses the base model.
+            backend (str): Inference backend, see models.backends.BACKENDS
+            backend_options (dict, optional): Extra arguments for models.backends.create_backend
+            base_weights (str, optional): EfficientNetB0 weights, 'imagenet' or None for random init
+            face_locator (FaceLocator, optional): Score face crops instead of the whole image,
+                falling back to the whole image when no face is found
+            metrics (Metrics, optional): Records the size of every forward pass as inference_batch_size
+            artifact_folder (str, optional): Cache of assembled models, see models.artifacts;
+                restoring from it skips the ImageNet download and the rebuild
         """
         self.model_path = model_path
-        self.model = self._load_model()
+        self.base_weights = base_weights
+        self.artifact_folder = artifact_folder
         self.img_size = (224, 224)  # EfficientNetB0 input size
+        self.face_locator = face_locator
+        self.metrics = metrics
+        
+        # The network is built lazily and shared with any detector using the same weights
+        self.model_key = ('image', model_path, base_weights)
+        registry.register(self.model_key, self._load_model)
+        
+        self.backend_name = backend
+        self.backend_key = self.model_key + (backend,)
+        registry.register(self.backend_key, lambda: create_backend(
+            backend, lambda: self.model, **(backend_options or {})
+        ))
+        
+        # Trunk and head of the same network, for embeddings and re-scoring them (always float)
+        self.split_key = self.model_key + ('split',)
+        registry.register(self.split_key, lambda: split_model(self.model))
+        registry.register(self.model_key + ('embedding',), lambda: create_backend(
+            'function', lambda: registry.get(self.split_key)[0]
+        ))
+        registry.register(self.model_key + ('head',), lambda: create_backend(
+            'function', lambda: registry.get(self.split_key)[1]
+        ))
+        
+        # Optional request-coalescing scheduler, see enable_batching()
+        self.batcher = None
+        
+        # Copies at other input sizes, see at_resolution()
+        self._resolutions = {}
+        self._resolutions_lock = threading.Lock()
+    
+    @property
+    def model(self):
+        """
+        The shared TensorFlow model, built on first access
+        """
+        return registry.get(self.model_key)
+    
+    @property
+    def backend(self):
+        """
+        The shared inference backend wrapping the model, built on first access
+        """
+        return registry.get(self.backend_key)
+        
+    def artifact_path(self):
+        """
+        Artifact file for this detector's model, or None without an artifact folder
+        """
+        if not self.artifact_folder:
+            return None
+        return artifact_path(self.artifact_folder, 'image', self.model_path, self.base_weights)
+    
+    def warm_up(self):
+        """
+        Build the model and backend and run one inference, so the first request pays no setup cost
+        """
+        self.backend.predict(np.zeros((1,) + self.img_size + (3,), dtype=np.float32), batch_size=1)
+    
+    def at_resolution(self, size):
+        """
+        This detector scoring square inputs of size pixels, e.g. to answer faster under load
+        
+        The resized network (see resize_model) is built on first use and shared
+        through the registry. Its copy of this detector shares the face locator
+        and metrics and gets its own batcher, since batches must have one input shape.
         
+        Args:
+            size (int): Input width and height in pixels, a multiple of 32
+            
+        Returns:
+            ImageDetector: This detector if size is its own or its backend cannot resize, else the copy
+        """
+        if (size, size) == self.img_size or self.backend_name not in RESIZABLE_BACKENDS:
+            return self
+        with self._resolutions_lock:
+            if size not in self._resolutions:
+                detector = copy.copy(self)
+                detector.img_size = (size, size)
+                detector.model_key = self.model_key + ('resolution', size)
+                detector.backend_key = detector.model_key + (self.backend_name,)
+                detector._resolutions = {}
+                registry.register(detector.model_key, lambda: resize_model(self.model, size))
+                registry.register(detector.backend_key, lambda: create_backend(
+                    self.backend_name, lambda: detector.model
+                ))
+                if self.batcher is not None:
+                    detector.enable_batching(
+                        max_batch_size=self.batcher.max_batch_size,
+                        max_wait_ms=self.batcher.max_wait_ms,
+                        max_queue_size=self.batcher.max_queue_size
+                    )
+                self._resolutions[size] = detector
+            return self._resolutions[size]
+    
     def _load_model(self):
         """
-        Load and prepare the model for inference
+        Load and prepare the model for inference, from its artifact when there is one
+        
+        Returns:
+            A TensorFlow model ready for prediction
+        """
+        return load_or_build(self.artifact_path(), self._build_model)
+    
+    def _build_model(self):
+        """
+        Assemble the network and load the fine-tuned weights
         
         Returns:
             A TensorFlow model ready for prediction
         """
         # Base model
         base_model = EfficientNetB0(
-            weights='imagenet',
+            weights=self.base_weights,
             include_top=False,
             input_shape=(224, 224, 3)
         )
@@ -65,6 +265,21 @@ class ImageDetector:
         
         return preprocessed_img
     
+    def preprocess_array(self, img_array):
+        """
+        Preprocess an in-memory RGB image for the model
+        
+        Uses the same nearest-neighbour resize as load_img so scores match the
+        file-based path, without any disk round-trip.
+        
+        Args:
+            img_array (numpy.ndarray): RGB image of shape (height, width, 3), uint8
+            
+        Returns:
+            numpy.ndarray: Preprocessed image of shape (224, 224, 3), without batch dimension
+        """
+        return preprocess_frame(img_array, self.img_size)
+    
     def detect(self, img_path):
         """
         Detect if an image is real or fake
@@ -73,23 +288,229 @@ class ImageDetector:
             img_path (str): Path to the image file
             
         Returns:
-            dict: Result with predictions and confidence
+            dict: Result with predictions and confidence, plus per-stage seconds in timings
+        """
+        try:
+            start_time = time.perf_counter()
+            timer = StageTimer()
+            if self.face_locator is not None:
+                with timer.stage('decode'):
+                    img_array = np.asarray(Image.open(img_path).convert('RGB'))
+                return self.detect_faces(img_array, timer=timer, start_time=start_time)
+            
+            # load_img decodes and resizes in one step
+            with timer.stage('preprocess'):
+                preprocessed_img = self.preprocess_image(img_path)
+            with timer.stage('inference'):
+                prediction = self._predict(preprocessed_img)[0][0]
+            
+            return self._timed_result(self.format_score(prediction), timer, start_time)
+        except QueueFullError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error in image detection: {str(e)}")
+    
+    def detect_bytes(self, data):
+        """
+        Detect if an in-memory encoded image (PNG/JPEG bytes) is real or fake
+        
+        Args:
+            data (bytes): Encoded image, e.g. the body of an upload
+            
+        Returns:
+            dict: Result with predictions and confidence, plus per-stage seconds in timings
         """
         try:
-            preprocessed_img = self.preprocess_image(img_path)
-            prediction = self.model.predict(preprocessed_img)[0][0]
-            
-            # Confidence score and classification
-            confidence = float(max(prediction, 1 - prediction))
-            is_fake = bool(prediction > 0.5)
-            
-            return {
-                'is_fake': is_fake,
-                'confidence': confidence,
-                'raw_score': float(prediction)
-            }
+            start_time = time.perf_counter()
+            timer = StageTimer()
+            # Same RGB conversion and nearest-neighbour resize as load_img, without the disk round-trip
+            with timer.stage('decode'):
+                img_array = np.asarray(Image.open(io.BytesIO(data)).convert('RGB'))
+            if self.face_locator is not None:
+                return self.detect_faces(img_array, timer=timer, start_time=start_time)
+            
+            with timer.stage('preprocess'):
+                preprocessed_img = np.expand_dims(self.preprocess_array(img_array), axis=0)
+            with timer.stage('inference'):
+                prediction = self._predict(preprocessed_img)[0][0]
+            
+            return self._timed_result(self.format_score(prediction), timer, start_time)
+        except QueueFullError:
+            raise
         except Exception as e:
             raise Exception(f"Error in image detection: {str(e)}")
+    
+    def detect_faces(self, img_array, timer=None, start_time=None):
+        """
+        Score every face found in an RGB image, in one batch
+        
+        The image verdict is that of its most likely fake face. Without faces the
+        whole image is scored instead and face_fallback is set.
+        
+        Args:
+            img_array (numpy.ndarray): RGB image of shape (height, width, 3), uint8
+            timer (StageTimer, optional): Timer already holding earlier stages, e.g. 'decode'
+            start_time (float, optional): perf_counter() at the start of the request, for timings['total']
+            
+        Returns:
+            dict: Result with predictions and confidence, plus per-face results in faces
+                and per-stage seconds in timings
+        """
+        timer = timer or StageTimer()
+        start_time = start_time if start_time is not None else time.perf_counter()
+        with timer.stage('faces'):
+            boxes = self.face_locator.locate(img_array, rgb=True)
+        if not boxes:
+            with timer.stage('preprocess'):
+                preprocessed_img = np.expand_dims(self.preprocess_array(img_array), axis=0)
+            with timer.stage('inference'):
+                prediction = self._predict(preprocessed_img)[0][0]
+            result = {**self.format_score(prediction), 'faces': [], 'face_fallback': True}
+            return self._timed_result(result, timer, start_time)
+        
+        with timer.stage('preprocess'):
+            crops = np.stack([self.preprocess_array(self.face_locator.crop(img_array, box)) for box in boxes])
+        with timer.stage('inference'):
+            predictions = self._predict(crops, batch_size=len(crops))
+        with timer.stage('aggregation'):
+            faces = [{'box': list(box), **self.format_score(prediction[0])} for box, prediction in zip(boxes, predictions)]
+            result = {**most_fake(faces), 'faces': faces, 'face_fallback': False}
+        return self._timed_result(result, timer, start_time)
+    
+    def embed_batch(self, batch, batch_size=32):
+        """
+        Pooled backbone features of preprocessed images, the input of the classification head
+        
+        Args:
+            batch (numpy.ndarray): Preprocessed images of shape (n, 224, 224, 3)
+            batch_size (int): Maximum number of images per forward pass
+            
+        Returns:
+            numpy.ndarray: Embeddings of shape (n, 1280), float32
+        """
+        return registry.get(self.model_key + ('embedding',)).predict(batch, batch_size=batch_size)
+    
+    def embed_bytes(self, data):
+        """
+        Pooled backbone features of an in-memory encoded image (PNG/JPEG bytes)
+        
+        Returns:
+            numpy.ndarray: Embedding of shape (1280,), float32
+        """
+        img_array = np.asarray(Image.open(io.BytesIO(data)).convert('RGB'))
+        return self.embed_batch(np.expand_dims(self.preprocess_array(img_array), axis=0))[0]
+    
+    def score_embeddings(self, embeddings, batch_size=16384):
+        """
+        Apply the classification head to stored embeddings, without the backbone
+        
+        Args:
+            embeddings (numpy.ndarray): Embeddings of shape (n, 1280), float16 or float32
+            batch_size (int): Rows per head evaluation
+            
+        Returns:
+            numpy.ndarray: Raw sigmoid scores of shape (n,), as raw_score in detect()
+        """
+        head = registry.get(self.model_key + ('head',))
+        scores = [head.predict(np.asarray(embeddings[i:i + batch_size], dtype=np.float32), batch_size=batch_size)
+                  for i in range(0, len(embeddings), batch_size)]
+        return np.concatenate(scores)[:, 0] if scores else np.zeros(0, dtype=np.float32)
+    
+    def format_score(self, prediction):
+        """
+        Convert a raw sigmoid score into a detection result, e.g. one from score_embeddings()
+        
+        Args:
+            prediction (float): Model output for a single image
+            
+        Returns:
+            dict: Result with predictions and confidence
+        """
+        # Confidence score and classification
+        confidence = float(max(prediction, 1 - prediction))
+        is_fake = bool(prediction > 0.5)
+        
+        return {
+            'is_fake': is_fake,
+            'confidence': confidence,
+            'raw_score': float(prediction)
+        }
+    
+    def _timed_result(self, result, timer, start_time):
+        """
+        Attach the timer's stages and the total time since start_time to a result
+        """
+        result['timings'] = {**timer.as_dict(), 'total': time.perf_counter() - start_time}
+        return result
+    
+    def detect_batch(self, arrays, batch_size=32):
+        """
+        Detect if each image in a batch of preprocessed images is real or fake
+        
+        Args:
+            arrays: Preprocessed image tensors, either one (N, 224, 224, 3) array
+                or a sequence of (224, 224, 3) / (1, 224, 224, 3) arrays
+            batch_size (int): Maximum number of images per forward pass
+            
+        Returns:
+            list: One result dict per image, in input order, same format as detect()
+        """
+        try:
+            if len(arrays) == 0:
+                return []
+            
+            if isinstance(arrays, np.ndarray) and arrays.ndim == 4:
+                batch = arrays
+            else:
+                batch = np.stack([np.reshape(a, self.img_size + (3,)) for a in arrays])
+            
+            predictions = self._predict(batch, batch_size=batch_size)
+            
+            return [self.format_score(prediction[0]) for prediction in predictions]
+        except QueueFullError:
+            raise
+        except Exception as e:
+            raise Exception(f"Error in batch image detection: {str(e)}")
+    
+    def enable_batching(self, max_batch_size=32, max_wait_ms=5, max_queue_size=256):
+        """
+        Route predictions through a MicroBatcher shared by concurrent requests
+        
+        Args:
+            max_batch_size (int): Rows that trigger an immediate forward pass
+            max_wait_ms (float): Longest time a request waits for others to join its batch
+            max_queue_size (int): Pending requests allowed before new ones are rejected
+        """
+        self.batcher = MicroBatcher(
+            lambda batch: self.backend.predict(batch, batch_size=max_batch_size),
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            max_queue_size=max_queue_size,
+            on_batch=self._record_batch
+        )
+    
+    def _predict(self, batch, batch_size=32):
+        """
+        Run the model on a preprocessed batch, through the batcher if enabled
+        
+        Args:
+            batch (numpy.ndarray): Model input of shape (n, 224, 224, 3)
+            batch_size (int): Maximum number of images per forward pass
+            
+        Returns:
+            numpy.ndarray: Scores of shape (n, 1)
+        """
+        if self.batcher is not None:
+            return self.batcher.predict(batch)
+        self._record_batch(len(batch))
+        return self.backend.predict(batch, batch_size=batch_size)
+    
+    def _record_batch(self, rows):
+        """
+        Record the size of one forward pass
+        """
+        if self.metrics is not None:
+            self.metrics.observe('inference_batch_size', rows, {'detector': 'image'})
 
 # For testing purposes
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+Post-training quantization of the detector models for CPU-only deployment
+
+Converts the float .h5 weights named in config.py into a quantized TFLite model
+and reports size, latency and score drift against the float model. Set
+QUANTIZATION=<mode> to have the API load the result.
+
+Usage (from the backend directory):
+    python -m models.quantization --model image --mode int8 --samples path/to/samples
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from config import (MODELS_FOLDER, IMAGE_MODEL_PATH, AUDIO_MODEL_PATH,
+                    ALLOWED_IMAGE_EXTENSIONS, ALLOWED_AUDIO_EXTENSIONS)
+from models.backends import TFLiteBackend
+from models.image_detector import ImageDetector
+from models.audio_detector import AudioDetector
+
+# Available quantization modes
+#   dynamic: int8 weights, float activations; no calibration data needed
+#   float16: float16 weights
+#   int8:    int8 weights and activations, calibrated on a representative dataset
+MODES = ('dynamic', 'float16', 'int8')
+
+def quantized_model_path(kind, mode):
+    """
+    Default location of a quantized model, as read by config.py
+    
+    Args:
+        kind (str): 'image' or 'audio'
+        mode (str): One of MODES
+        
+    Returns:
+        str: Path of the .tflite file
+    """
+    return os.path.join(MODELS_FOLDER, f"{kind}_detector_{mode}.tflite")
+
+def load_float_detector(kind, model_path):
+    """
+    Build the float detector whose model is quantized
+    
+    Args:
+        kind (str): 'image' or 'audio'
+        model_path (str): Path to the saved .h5 weights
+        
+    Returns:
+        ImageDetector or AudioDetector
+    """
+    if kind == 'image':
+        # Saved weights cover the backbone too, so skip the ImageNet weights when they exist
+        base_weights = None if model_path and os.path.exists(model_path) else 'imagenet'
+        return ImageDetector(model_path=model_path, base_weights=base_weights)
+    return AudioDetector(model_path=model_path)
+
+def load_samples(kind, detector, sample_dir):
+    """
+    Preprocess every supported file in a directory into model inputs
+    
+    Args:
+        kind (str): 'image' or 'audio'
+        detector (ImageDetector or AudioDetector): Detector providing the preprocessing
+        sample_dir (str): Directory of local sample files
+        
+    Returns:
+        numpy.ndarray: Inputs with one row per file, in sorted filename order
+    """
+    extensions = ALLOWED_IMAGE_EXTENSIONS if kind == 'image' else ALLOWED_AUDIO_EXTENSIONS
+    paths = sorted(
+        os.path.join(sample_dir, name) for name in os.listdir(sample_dir)
+        if name.rsplit('.', 1)[-1].lower() in extensions
+    )
+    
+    rows = []
+    for path in paths:
+        if kind == 'image':
+            rows.append(detector.preprocess_image(path))
+        else:
+            rows.append(detector.create_spectrogram(path))
+    return np.concatenate(rows).astype(np.float32) if rows else None
+
+def random_samples(kind, count, seed=0):
+    """
+    Synthetic model inputs, used when no local samples are provided
+    
+    Args:
+        kind (str): 'image' or 'audio'
+        count (int): Number of rows
+        seed (int): Random seed
+        
+    Returns:
+        numpy.ndarray: Inputs of shape (count, ...)
+    """
+    rng = np.random.default_rng(seed)
+    if kind == 'image':
+        return rng.uniform(0, 255, (count, 224, 224, 3)).astype(np.float32)
+    return rng.uniform(0, 1, (count, 128, 216, 1)).astype(np.float32)
+
+def quantize(model, mode, representative_inputs=None):
+    """
+    Convert a Keras model into a quantized TFLite flatbuffer
+    
+    Inputs and outputs stay float32, so the quantized model is a drop-in
+    replacement behind the tflite backend.
+    
+    Args:
+        model (tf.keras.Model): Float model
+        mode (str): One of MODES
+        representative_inputs (numpy.ndarray, optional): Calibration rows, required for int8
+        
+    Returns:
+        bytes: The .tflite model
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+    
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    
+    if mode == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        if representative_inputs is None or len(representative_inputs) == 0:
+            raise ValueError("int8 quantization needs representative inputs")
+        
+        def representative_dataset():
+            for row in representative_inputs:
+                yield [row[np.newaxis]]
+        
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    
+    return converter.convert()
+
+def latency(backend, inputs, runs, warmup=3):
+    """
+    Single-sample latency of a backend
+    
+    Returns:
+        tuple: (p50, p99) in milliseconds
+    """
+    for i in range(warmup):
+        backend.predict(inputs[i % len(inputs)][np.newaxis])
+    samples = []
+    for i in range(runs):
+        start_time = time.perf_counter()
+        backend.predict(inputs[i % len(inputs)][np.newaxis])
+        samples.append((time.perf_counter() - start_time) * 1000)
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--model', choices=('image', 'audio'), required=True)
+    parser.add_argument('--mode', choices=MODES, default='dynamic')
+    parser.add_argument('--weights', help="Float .h5 weights (default: path from config.py)")
+    parser.add_argument('--samples', help="Directory of local samples; the first --calibration "
+                                          "files calibrate int8, the rest are held out for drift")
+    parser.add_argument('--calibration', type=int, default=100)
+    parser.add_argument('--output', help="Output .tflite path (default: the path config.py loads)")
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+    
+    weights = args.weights or (IMAGE_MODEL_PATH if args.model == 'image' else AUDIO_MODEL_PATH)
+    output = args.output or quantized_model_path(args.model, args.mode)
+    detector = load_float_detector(args.model, weights)
+    
+    samples = load_samples(args.model, detector, args.samples) if args.samples else None
+    if samples is None or len(samples) <= args.calibration:
+        print("Warning: not enough local samples, using synthetic inputs for calibration and drift")
+        samples = random_samples(args.model, args.calibration + 32)
+    calibration, held_out = samples[:args.calibration], samples[args.calibration:]
+    
+    # Quantize and save
+    with open(output, 'wb') as f:
+        f.write(quantize(detector.model, args.mode, calibration))
+    
+    # Float reference converted the same way, for a like-for-like comparison
+    float_file = os.path.join(tempfile.mkdtemp(), 'float.tflite')
+    float_backend = TFLiteBackend(lambda: detector.model, model_file=float_file, num_threads=args.threads)
+    quant_backend = TFLiteBackend(None, model_file=output, num_threads=args.threads)
+    
+    float_scores = float_backend.predict(held_out)
+    quant_scores = quant_backend.predict(held_out)
+    drift = np.abs(quant_scores - float_scores)
+    flips = int(np.sum((quant_scores > 0.5) != (float_scores > 0.5)))
+    float_latency = latency(float_backend, held_out, args.runs)
+    quant_latency = latency(quant_backend, held_out, args.runs)
+    
+    print(f"Quantized {args.model} model ({args.mode}) written to {output}")
+    print(f"{'':<10}{'size (MB)':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}")
+    print(f"{'float':<10}{os.path.getsize(float_file) / 1e6:>12.2f}{float_latency[0]:>12.2f}{float_latency[1]:>12.2f}")
+    print(f"{args.mode:<10}{os.path.getsize(output) / 1e6:>12.2f}{quant_latency[0]:>12.2f}{quant_latency[1]:>12.2f}")
+    print(f"Score drift on {len(held_out)} held-out samples: "
+          f"mean {drift.mean():.4f}, max {drift.max():.4f}, label flips {flips}")
+    
+    os.remove(float_file)
+
+if __name__ == "__main__":
+    main()
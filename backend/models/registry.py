@@ -0,0 +1,99 @@
+import resource
+import threading
+import time
+
+def current_rss():
+    """
+    Resident set size of this process
+    
+    Returns:
+        int: RSS in bytes (peak RSS where /proc is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize()
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+class ModelRegistry:
+    def __init__(self):
+        """
+        Initialize an empty registry
+        
+        Each network is built at most once per process and shared by every
+        detector that asks for the same key.
+        """
+        self._builders = {}
+        self._models = {}
+        self._stats = {}
+        self._lock = threading.RLock()
+        # Models built so far; requests that saw it change paid for a build
+        self.builds = 0
+    
+    def register(self, key, builder):
+        """
+        Register how to build a model without building it
+        
+        Args:
+            key (tuple): Model identity, e.g. ('image', model_path)
+            builder (callable): Zero-argument function returning the model
+        """
+        with self._lock:
+            self._builders.setdefault(key, builder)
+    
+    def get(self, key):
+        """
+        Return the model for key, building it on first use
+        
+        Args:
+            key (tuple): Model identity passed to register()
+            
+        Returns:
+            The shared model instance
+        """
+        model = self._models.get(key)
+        if model is not None:
+            return model
+        
+        with self._lock:
+            if key not in self._models:
+                if key not in self._builders:
+                    raise KeyError(f"No model registered for {key}")
+                
+                rss_before = current_rss()
+                start_time = time.time()
+                self._models[key] = self._builders[key]()
+                self._stats[key] = {
+                    'load_time': time.time() - start_time,
+                    'rss_bytes': max(current_rss() - rss_before, 0)
+                }
+                self.builds += 1
+            return self._models[key]
+    
+    def warm_up(self, keys=None):
+        """
+        Eagerly build registered models, e.g. before serving traffic
+        
+        Args:
+            keys (list, optional): Models to build. If None, builds all registered models.
+        """
+        for key in list(keys or self._builders):
+            self.get(key)
+    
+    def stats(self):
+        """
+        Report load time and resident memory for each registered model
+        
+        Returns:
+            dict: Per-model stats keyed by "<kind>:<model_path>"
+        """
+        report = {}
+        for key in self._builders:
+            name = ':'.join(str(part) for part in key)
+            report[name] = {'loaded': key in self._models, **self._stats.get(key, {})}
+        return report
+
+# Process-wide registry shared by all detectors
+registry = ModelRegistry()
@@ -1,12 +1,60 @@
+import collections
+import copy
 import os
+import time
 import numpy as np
 import cv2
 import tensorflow as tf
-from models.image_detector import ImageDetector
+from models.image_detector import ImageDetector, most_fake, preprocess_frame
+from utils.face_detection import FaceTracker
+from utils.frame_dedup import REUSED, FrameDeduplicator
+from utils.frame_sampling import FrameSampler
+from utils.batching import QueueFullError
+from utils.memory_files import memory_file
+from utils.pipeline import StageTimer
+from utils.sequential import FakeRatioTest, coarse_to_fine
 import tempfile
 
+def decode_chunk(task, out):
+    """
+    Decode pool task: decode and preprocess one chunk of planned frames into out
+    
+    Args:
+        task (tuple): (video_path, FrameSampler, frame numbers, image size, FrameDeduplicator or None).
+            A chunk's first frame is always scored, since the deduplicator only sees its own chunk.
+        out (numpy.ndarray): Buffer of shape (chunk size, height, width, 3)
+    
+    Returns:
+        tuple: (rows written, {'decode': seconds, 'preprocess': seconds},
+            per-frame entries: None for a row, REUSED for a skipped duplicate)
+    """
+    video_path, sampler, indices, img_size, dedup = task
+    seconds = {'decode': 0.0, 'preprocess': 0.0}
+    count = 0
+    entries = []
+    
+    start_time = time.perf_counter()
+    for _, frame in sampler.sample_indices(video_path, indices):
+        decoded_time = time.perf_counter()
+        seconds['decode'] += decoded_time - start_time
+    
+        if dedup is not None and dedup.is_duplicate(frame):
+            entries.append(REUSED)
+        else:
+            out[count] = preprocess_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB), img_size)
+            entries.append(None)
+            count += 1
+    
+        start_time = time.perf_counter()
+        seconds['preprocess'] += start_time - decoded_time
+    return count, seconds, entries
+
 class VideoDetector:
-    def __init__(self, model_path=None, frames_per_second=1, threshold=0.5):
+    def __init__(self, model_path=None, frames_per_second=1, threshold=0.5, batch_size=16,
+                 max_frames=None, sampling_strategy='grab', image_detector=None, backend='keras',
+                 decode_pool=None, face_locator=None, face_redetect_every=5, adaptive=False,
+                 adaptive_min_frames=8, adaptive_max_frames=None, adaptive_step=8,
+                 sprt_delta=0.1, sprt_alpha=0.01, sprt_beta=0.01, dedup_threshold=None, dedup_size=16):
         """
         Initialize the VideoDetector
         
@@ -14,13 +62,99 @@ class VideoDetector:
             model_path (str, optional): Path to saved model weights.
             frames_per_second (int): Number of frames to analyze per second
             threshold (float): Classification threshold (0.5 default)
+            batch_size (int): Number of frames scored per model forward pass
+            max_frames (int, optional): Cap on frames analyzed per video, spread uniformly over the clip
+            sampling_strategy (str): Frame sampling strategy, see utils.frame_sampling.STRATEGIES
+            image_detector (ImageDetector, optional): Detector used to score frames.
+                If None, one is created; its network is shared through the model registry.
+            backend (str): Inference backend for the created ImageDetector, see models.backends.BACKENDS
+            decode_pool (DecodePool, optional): Decode and preprocess chunks of frames in parallel,
+                ahead of inference. If None, frames are decoded serially between model calls.
+            face_locator (FaceLocator, optional): Score tracked face crops instead of whole frames.
+                Frames without faces are scored whole. Face mode decodes serially, since tracking is sequential.
+            face_redetect_every (int): Sampled frames between full face detections; faces are tracked in between
+            adaptive (bool): Score frames coarse-to-fine and stop once the verdict is settled
+            adaptive_min_frames (int): Frames scored before an adaptive run may stop on the sequential test
+            adaptive_max_frames (int, optional): Frame budget per adaptive run, spread over the clip
+            adaptive_step (int): Frames scored between sequential test checks
+            sprt_delta (float): Half-width of the indifference region around threshold
+            sprt_alpha (float): Tolerated rate of calling a real video fake
+            sprt_beta (float): Tolerated rate of calling a fake video real
+            dedup_threshold (float, optional): Reuse the last scored frame's result for sampled frames
+                within this thumbnail difference of it (see utils.frame_dedup). None scores every frame.
+                Adaptive runs never deduplicate, since their frames are spread over the clip.
+            dedup_size (int): Thumbnail size used to compare frames
         """
         self.model_path = model_path
         self.frames_per_second = frames_per_second
         self.threshold = threshold
+        self.batch_size = batch_size
+        self.max_frames = max_frames
+        self.sampling_strategy = sampling_strategy
+        self.decode_pool = decode_pool
+        self.face_locator = face_locator
+        self.face_redetect_every = face_redetect_every
+        
+        # Early exit
+        self.adaptive = adaptive
+        self.adaptive_min_frames = adaptive_min_frames
+        self.adaptive_max_frames = adaptive_max_frames
+        self.adaptive_step = adaptive_step
+        self.sprt_delta = sprt_delta
+        self.sprt_alpha = sprt_alpha
+        self.sprt_beta = sprt_beta
+        
+        # Temporal deduplication
+        self.dedup_threshold = dedup_threshold
+        self.dedup_size = dedup_size
         
         # Use the ImageDetector for frame analysis
-        self.image_detector = ImageDetector(model_path=model_path)
+        self.image_detector = image_detector or ImageDetector(model_path=model_path, backend=backend)
+    
+    def with_settings(self, **settings):
+        """
+        Copy of this detector with some settings replaced, e.g. fewer frames under load
+        
+        The copy shares the image detector (unless replaced), decode pool and face locator;
+        the detector itself is unchanged, so concurrent requests can each run with their own settings.
+        
+        Args:
+            **settings: Attribute values, e.g. frames_per_second=0.5, or
+                image_detector=image_detector.at_resolution(160) for smaller frames
+            
+        Returns:
+            VideoDetector: The copy
+        """
+        detector = copy.copy(self)
+        for name, value in settings.items():
+            if not hasattr(self, name):
+                raise AttributeError(f"Unknown video detector setting: {name}")
+            setattr(detector, name, value)
+        return detector
+    
+    def _sampler(self):
+        """
+        Build a frame sampler from the current sampling settings
+        
+        Returns:
+            FrameSampler: Sampler for one video
+        """
+        return FrameSampler(
+            frames_per_second=self.frames_per_second,
+            max_frames=self.max_frames,
+            strategy=self.sampling_strategy
+        )
+    
+    def _deduplicator(self):
+        """
+        Build a frame deduplicator for one video
+        
+        Returns:
+            FrameDeduplicator: Deduplicator, or None if deduplication is off
+        """
+        if self.dedup_threshold is None:
+            return None
+        return FrameDeduplicator(threshold=self.dedup_threshold, size=self.dedup_size)
     
     def extract_frames(self, video_path, output_dir=None):
         """
@@ -39,110 +173,641 @@ class VideoDetector:
         else:
             os.makedirs(output_dir, exist_ok=True)
         
-        # Open the video file
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video file: {video_path}")
+        # Extract frames
+        frame_paths = []
         
-        # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for frame_count, frame in self._sampler().sample(video_path):
+            frame_path = os.path.join(output_dir, f"frame_{frame_count:06d}.jpg")
+            cv2.imwrite(frame_path, frame)
+            frame_paths.append(frame_path)
         
-        # Calculate frame extraction interval
-        frame_interval = int(fps / self.frames_per_second)
-        if frame_interval < 1:
-            frame_interval = 1
+        return frame_paths
+    
+    def iter_frames(self, video_path, timer=None):
+        """
+        Stream sampled frames from a video, decoded and preprocessed in memory
         
-        # Extract frames
-        frame_paths = []
-        frame_count = 0
+        Args:
+            video_path (str): Path to the video file
+            timer (StageTimer, optional): Accumulates 'decode' and 'preprocess' seconds
+            
+        Yields:
+            tuple: (frame_number, preprocessed frame of shape (224, 224, 3))
+        """
+        timer = timer or StageTimer()
+        frames = self._sampler().sample(video_path)
+        while True:
+            with timer.stage('decode'):
+                item = next(frames, None)
+            if item is None:
+                return
+            
+            frame_count, frame = item
+            with timer.stage('preprocess'):
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                preprocessed = self.image_detector.preprocess_array(rgb)
+            yield frame_count, preprocessed
+    
+    def iter_batches(self, video_path, timer=None):
+        """
+        Group streamed frames into model-ready mini-batches
         
+        Only one batch is held in memory at a time, so peak memory depends on
+        batch_size rather than on the video length.
+        
+        Args:
+            video_path (str): Path to the video file
+            timer (StageTimer, optional): Accumulates 'decode' and 'preprocess' seconds
+            
+        Yields:
+            numpy.ndarray: Batch of shape (n, 224, 224, 3) with n <= batch_size
+        """
+        batch = []
+        for _, frame in self.iter_frames(video_path, timer=timer):
+            batch.append(frame)
+            if len(batch) == self.batch_size:
+                yield np.stack(batch)
+                batch = []
+        
+        if batch:
+            yield np.stack(batch)
+    
+    def iter_batches_pooled(self, video_path, timer=None):
+        """
+        Like iter_batches, but chunks of frames are decoded and preprocessed on the decode pool
+        
+        Each worker opens its own capture, seeks to its chunk and writes the
+        preprocessed frames straight into a batch buffer (shared memory with the
+        process executor). At most workers * prefetch chunks are buffered.
+        Falls back to serial decoding when the frame count is unknown.
+        
+        Args:
+            video_path (str): Path to the video file
+            timer (StageTimer, optional): Accumulates worker 'decode' and 'preprocess' seconds
+                (summed over workers) and 'decode_wait', the time spent waiting for a chunk
+            
+        Yields:
+            tuple: (batch of shape (n, 224, 224, 3) with n <= batch_size, or None if every frame
+                in the chunk was a duplicate; one entry per frame: None for a row, REUSED for a
+                duplicate). The buffer is reused on the next iteration.
+        """
+        timer = timer or StageTimer()
+        sampler = self._sampler()
+        indices = sampler.video_plan(video_path)
+        if indices is None:
+            yield from self._row_batches(sampler.sample(video_path), None, timer, self._deduplicator())
+            return
+        
+        if self.decode_pool.executor == 'process':
+            # Anonymous in-memory files are only reachable by other processes through our pid
+            video_path = video_path.replace('/proc/self/', f"/proc/{os.getpid()}/")
+        
+        img_size = self.image_detector.img_size
+        chunks = (
+            (video_path, sampler, indices[i:i + self.batch_size], img_size, self._deduplicator())
+            for i in range(0, len(indices), self.batch_size)
+        )
+        slot_shape = (self.batch_size, img_size[1], img_size[0], 3)
+        for out, (count, seconds, entries), wait in self.decode_pool.map_into(decode_chunk, chunks, slot_shape):
+            timer.merge(seconds)
+            timer.add('decode_wait', wait)
+            if entries:
+                yield (out[:count] if count else None), entries
+    
+    def iter_face_batches(self, video_path, tracker, timer=None):
+        """
+        Stream mini-batches of face crops, tracking faces from frame to frame
+        
+        A frame's crops are never split across batches, so a batch can exceed
+        batch_size by up to max_faces - 1 rows.
+        
+        Args:
+            video_path (str): Path to the video file
+            tracker (FaceTracker): Tracker for this video
+            timer (StageTimer, optional): Accumulates 'decode', 'faces' and 'preprocess' seconds
+            
+        Yields:
+            tuple: (batch of shape (n, 224, 224, 3), one entry per frame: a list of
+                {'track_id', 'box'} dicts matching its rows, or None for a whole-frame row)
+        """
+        return self._row_batches(self._sampler().sample(video_path), tracker, timer or StageTimer(),
+                                 self._deduplicator())
+    
+    def _row_batches(self, frames, tracker, timer, dedup=None):
+        """
+        Preprocess decoded frames into model rows and group them into mini-batches
+        
+        Args:
+            frames: Iterator of (frame_number, BGR frame)
+            tracker (FaceTracker, optional): Face tracker; if None every frame is one whole-frame row
+            timer (StageTimer): Accumulates 'decode', 'dedup', 'faces' and 'preprocess' seconds
+            dedup (FrameDeduplicator, optional): Near-duplicate frames get a REUSED entry and no rows
+            
+        Yields:
+            tuple: (batch, per-frame entries) as in iter_face_batches; batch is None
+                if every frame since the last batch was a duplicate
+        """
+        rows, owners = [], []
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            with timer.stage('decode'):
+                item = next(frames, None)
+            if item is None:
                 break
             
-            if frame_count % frame_interval == 0:
-                frame_path = os.path.join(output_dir, f"frame_{frame_count:06d}.jpg")
-                cv2.imwrite(frame_path, frame)
-                frame_paths.append(frame_path)
+            _, frame = item
+            if dedup is not None:
+                with timer.stage('dedup'):
+                    duplicate = dedup.is_duplicate(frame)
+                if duplicate:
+                    # Skips face tracking too; the tracker picks up again on the next scored frame
+                    owners.append(REUSED)
+                    continue
+            
+            tracked = []
+            if tracker is not None:
+                with timer.stage('faces'):
+                    tracked = tracker.update(frame)
             
-            frame_count += 1
+            with timer.stage('preprocess'):
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                if tracked:
+                    crops = [self.image_detector.preprocess_array(self.face_locator.crop(rgb, box)) for _, box in tracked]
+                    faces = [{'track_id': track_id, 'box': list(box)} for track_id, box in tracked]
+                else:
+                    crops = [self.image_detector.preprocess_array(rgb)]
+                    faces = None
+            
+            if rows and len(rows) + len(crops) > self.batch_size:
+                yield np.stack(rows), owners
+                rows, owners = [], []
+            rows.extend(crops)
+            owners.append(faces)
+        
+        if owners:
+            yield (np.stack(rows) if rows else None), owners
+    
+    def _frame_results(self, results, owners, face_mode):
+        """
+        Turn one batch of model results into per-frame results
+        
+        Args:
+            results (list): detect_batch results, one per row
+            owners (list): Per-frame entries from the batch generator
+            face_mode (bool): Report faces and face_fallback for every frame
+            
+        Returns:
+            list: One frame result dict per entry in owners, or None for a REUSED entry
+        """
+        frame_results = []
+        row = 0
+        for faces in owners:
+            if faces == REUSED:
+                frame_results.append(None)
+                continue
+            if faces is None:
+                result = results[row]
+                row += 1
+                frame_result = {
+                    "is_fake": result["is_fake"],
+                    "confidence": float(result["confidence"])
+                }
+                if face_mode:
+                    frame_result.update(faces=[], face_fallback=True)
+            else:
+                # The frame's verdict is that of its most likely fake face
+                face_results = results[row:row + len(faces)]
+                row += len(faces)
+                result = most_fake(face_results)
+                frame_result = {
+                    "is_fake": result["is_fake"],
+                    "confidence": float(result["confidence"]),
+                    "faces": [
+                        {**face, "is_fake": r["is_fake"], "confidence": float(r["confidence"])}
+                        for face, r in zip(faces, face_results)
+                    ],
+                    "face_fallback": False
+                }
+            frame_results.append(frame_result)
+        return frame_results
+    
+    def iter_adaptive_chunks(self, video_path, plan, order, tracker=None, timer=None):
+        """
+        Decode and preprocess sampled frames chunk by chunk in coarse-to-fine order
+        
+        Frames are reached by seeking, whatever the sampling strategy, since
+        consecutive chunks are spread over the whole clip. Chunks are produced
+        lazily, so stopping early skips the decode of everything left.
         
+        Args:
+            video_path (str): Path to the video file
+            plan (list): Sampled frame numbers, in timeline order
+            order (list): Plan positions in scoring order
+            tracker (FaceTracker, optional): Face tracker (re-detecting on every frame)
+            timer (StageTimer, optional): Accumulates stage seconds
+            
+        Yields:
+            tuple: (plan positions, list of (batch, per-frame entries)) per chunk
+        """
+        timer = timer or StageTimer()
+        seek_sampler = FrameSampler(strategy='seek')
+        chunks = []
+        start = 0
+        for size in [self.adaptive_min_frames] + [self.adaptive_step] * len(order):
+            if start >= len(order):
+                break
+            chunks.append(sorted(order[start:start + max(size, 1)]))
+            start += max(size, 1)
+        
+        if self.decode_pool is not None and tracker is None:
+            if self.decode_pool.executor == 'process':
+                video_path = video_path.replace('/proc/self/', f"/proc/{os.getpid()}/")
+            img_size = self.image_detector.img_size
+            slot_size = max(len(chunk) for chunk in chunks)
+            tasks = ((video_path, seek_sampler, [plan[p] for p in chunk], img_size, None) for chunk in chunks)
+            slot_shape = (slot_size, img_size[1], img_size[0], 3)
+            outputs = self.decode_pool.map_into(decode_chunk, tasks, slot_shape)
+            try:
+                for chunk, (out, (count, seconds, _), wait) in zip(chunks, outputs):
+                    timer.merge(seconds)
+                    timer.add('decode_wait', wait)
+                    yield chunk[:count], [(out[:count], [None] * count)]
+            finally:
+                # Cancels chunks decoded ahead when the caller stops early
+                outputs.close()
+            return
+        
+        for chunk in chunks:
+            frames = seek_sampler.sample_indices(video_path, [plan[p] for p in chunk])
+            batches = list(self._row_batches(frames, tracker, timer))
+            yield chunk[:sum(len(owners) for _, owners in batches)], batches
+    
+    def detect_adaptive(self, video_path, progress=None):
+        """
+        Detect with early exit: score frames coarse-to-fine and stop once the verdict is settled
+        
+        After each chunk a sequential test (utils.sequential.FakeRatioTest)
+        decides whether more frames could still flip the verdict. At least
+        adaptive_min_frames and at most adaptive_max_frames frames are scored.
+        
+        Args:
+            video_path (str): Path to the video file
+            progress (callable, optional): Progress callback, as in detect()
+            
+        Returns:
+            dict: Result as from detect(), plus frames_scored, frames_available and stop_reason
+                ('bound' or 'sprt' when stopped early, 'budget' or 'exhausted' otherwise).
+                None if the container reports no frame count; detect() then scores every frame.
+        """
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        plan = self._sampler().video_plan(video_path)
+        if plan is None:
+            return None
+        
+        frames_available = len(plan)
+        budget = min(frames_available, self.adaptive_max_frames or frames_available)
+        order = coarse_to_fine(frames_available)
+        if budget < frames_available:
+            # Spread the budget over the clip, then refine within it
+            spread = sorted(set(int(round(i)) for i in np.linspace(0, frames_available - 1, budget)))
+            order = [spread[i] for i in coarse_to_fine(len(spread))]
+        
+        test = FakeRatioTest(
+            threshold=self.threshold, total=len(order), min_frames=self.adaptive_min_frames,
+            delta=self.sprt_delta, alpha=self.sprt_alpha, beta=self.sprt_beta
+        )
+        tracker = None
+        if self.face_locator is not None:
+            tracker = FaceTracker(self.face_locator, redetect_every=1)
+        if progress is not None:
+            progress(frames_total=len(order))
+        
+        frame_results = {}
+        total_confidence = 0
+        is_fake, stop_reason = None, None
+        chunks = self.iter_adaptive_chunks(video_path, plan, order, tracker=tracker, timer=timer)
+        try:
+            for positions, batches in chunks:
+                chunk_results = []
+                for batch, owners in batches:
+                    with timer.stage('inference'):
+                        results = self.image_detector.detect_batch(batch, batch_size=self.batch_size)
+                    chunk_results.extend(self._frame_results(results, owners, tracker is not None))
+                
+                batch_results = {}
+                with timer.stage('aggregation'):
+                    for position, frame_result in zip(positions, chunk_results):
+                        batch_results[f"frame_{position}"] = frame_result
+                        test.update(frame_result["is_fake"])
+                        total_confidence += frame_result["confidence"]
+                    frame_results.update(batch_results)
+                if progress is not None:
+                    progress(frame_results=batch_results, frames_done=test.scored)
+                
+                is_fake, stop_reason = test.decision()
+                if is_fake is not None:
+                    break
+        finally:
+            chunks.close()
+        
+        if test.scored == 0:
+            raise ValueError("No frames could be extracted from the video")
+        
+        fake_ratio = test.fakes / test.scored
+        if is_fake is None or test.scored >= len(order):
+            # Every frame in the plan was scored, so nothing was skipped; the ratio is the verdict
+            is_fake = fake_ratio >= self.threshold
+            stop_reason = 'budget' if budget < frames_available else 'exhausted'
+        
+        return {
+            'is_fake': bool(is_fake),
+            'confidence': float(total_confidence / test.scored),
+            'fake_frame_ratio': float(fake_ratio),
+            'frames_analyzed': test.scored,
+            'frames_scored': test.scored,
+            'frames_available': frames_available,
+            'stop_reason': stop_reason,
+            'frame_analysis': dict(sorted(frame_results.items(), key=lambda item: int(item[0].split('_')[1]))),
+            'timings': {**timer.as_dict(), 'total': time.perf_counter() - start_time}
+        }
+    
+    def embed(self, video_path):
+        """
+        Backbone embeddings of the sampled frames, for re-scoring without the backbone
+        
+        Whole frames are embedded with the sampling settings of detect(); face
+        crops, deduplication and early exit do not apply.
+        
+        Args:
+            video_path (str): Path to the video file
+            
+        Returns:
+            tuple: (frame timestamps in seconds, shape (n,); embeddings of shape (n, 1280), float32)
+        """
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
         cap.release()
-        return frame_paths
+        
+        timestamps, embeddings, batch = [], [], []
+        for frame_count, frame in self.iter_frames(video_path):
+            timestamps.append(frame_count / fps if fps > 0 else float(frame_count))
+            batch.append(frame)
+            if len(batch) == self.batch_size:
+                embeddings.append(self.image_detector.embed_batch(np.stack(batch), batch_size=self.batch_size))
+                batch = []
+        if batch:
+            embeddings.append(self.image_detector.embed_batch(np.stack(batch), batch_size=self.batch_size))
+        if not embeddings:
+            raise ValueError("No frames could be extracted from the video")
+        return np.array(timestamps), np.concatenate(embeddings)
+    
+    def score_received(self, video_path, state, complete=False, timer=None):
+        """
+        Score the sampled frames of a video that is still being uploaded
+        
+        Walks forward from where the last call stopped, so call it again as more
+        of the file arrives. Needs a container that can be read while truncated:
+        AVI, MKV/WebM, MPEG-TS, or MP4 with its index first (faststart) or
+        fragmented. An MP4 whose index is written last cannot be opened before
+        the upload completes, and is then scored in one go. Frames within a second
+        of the end of the data are left for the next call, since the last of them
+        may be cut off. max_frames, deduplication and early exit do not apply:
+        this work happens while the rest of the file is still in transit.
+        
+        Args:
+            video_path (str): Path to the video file, possibly still growing
+            state (dict): Progress, updated in place and JSON-serializable: 'next_frame' (the
+                next sampled frame number) and 'frames' (frame number as str -> frame result).
+                Start with {}.
+            complete (bool): The file is complete; score up to its last frame
+            timer (StageTimer, optional): Accumulates stage seconds
+            
+        Returns:
+            int: Frames scored by this call
+        """
+        timer = timer or StageTimer()
+        frames = state.setdefault('frames', {})
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            cap.release()
+            if complete:
+                raise ValueError(f"Could not open video file: {video_path}")
+            return 0
+        
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_interval = self._sampler().frame_interval(fps)
+        holdback = 0 if complete else max(1, int(round(fps)))
+        numbers = []
+        
+        def received_frames():
+            frame_count = state.get('next_frame', 0)
+            if frame_count > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_count)
+            pending = collections.deque()
+            while cap.grab():
+                if frame_count % frame_interval == 0:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        pending.append((frame_count, frame))
+                while pending and frame_count - pending[0][0] >= holdback:
+                    numbers.append(pending[0][0])
+                    yield pending.popleft()
+                frame_count += 1
+        
+        # Frames are scored independently, so faces are detected on every one
+        tracker = None
+        if self.face_locator is not None:
+            tracker = FaceTracker(self.face_locator, redetect_every=1)
+        scored = 0
+        try:
+            for batch, owners in self._row_batches(received_frames(), tracker, timer):
+                with timer.stage('inference'):
+                    results = self.image_detector.detect_batch(batch, batch_size=self.batch_size)
+                frame_results = self._frame_results(results, owners, tracker is not None)
+                for number, frame_result in zip(numbers[scored:], frame_results):
+                    frames[str(number)] = frame_result
+                scored += len(owners)
+                state['next_frame'] = numbers[scored - 1] + frame_interval
+        finally:
+            cap.release()
+        return scored
+    
+    def detect_received(self, video_path, state):
+        """
+        Verdict for a completely uploaded video, scoring what score_received() has not yet
+        
+        Args:
+            video_path (str): Path to the complete video file
+            state (dict): Progress from score_received(), updated in place
+            
+        Returns:
+            dict: Result as from detect() with max_frames unset, plus frames_scored_before_finalize
+        """
+        start_time = time.perf_counter()
+        timer = StageTimer()
+        scored_before = len(state.get('frames', {}))
+        self.score_received(video_path, state, complete=True, timer=timer)
+        if not state['frames']:
+            raise ValueError("No frames could be extracted from the video")
+        
+        with timer.stage('aggregation'):
+            frame_results = [state['frames'][number] for number in sorted(state['frames'], key=int)]
+            fake_ratio = sum(result['is_fake'] for result in frame_results) / len(frame_results)
+            avg_confidence = sum(result['confidence'] for result in frame_results) / len(frame_results)
+        return {
+            'is_fake': fake_ratio >= self.threshold,
+            'confidence': float(avg_confidence),
+            'fake_frame_ratio': float(fake_ratio),
+            'frames_analyzed': len(frame_results),
+            'frames_scored_before_finalize': scored_before,
+            'frame_analysis': {f"frame_{i}": result for i, result in enumerate(frame_results)},
+            'timings': {**timer.as_dict(), 'total': time.perf_counter() - start_time}
+        }
+    
+    def aggregate_scores(self, raw_scores, threshold=None):
+        """
+        Video verdict from per-frame raw scores, as detect() computes it
+        
+        Args:
+            raw_scores (numpy.ndarray): Per-frame sigmoid scores, e.g. from ImageDetector.score_embeddings()
+            threshold (float, optional): Fake-frame ratio that makes the video fake. If None, uses self.threshold
+            
+        Returns:
+            dict: is_fake, confidence, fake_frame_ratio and frames_analyzed
+        """
+        raw_scores = np.asarray(raw_scores, dtype=np.float64)
+        threshold = self.threshold if threshold is None else threshold
+        fake_ratio = float(np.mean(raw_scores > 0.5))
+        return {
+            'is_fake': fake_ratio >= threshold,
+            'confidence': float(np.mean(np.maximum(raw_scores, 1 - raw_scores))),
+            'fake_frame_ratio': fake_ratio,
+            'frames_analyzed': len(raw_scores)
+        }
     
-    def detect(self, video_path):
+    def detect_bytes(self, data, suffix='.mp4', adaptive=None):
+        """
+        Detect if an in-memory video contains deepfake content
+        
+        OpenCV can only open paths, so the bytes are exposed through an anonymous
+        in-memory file (memfd, or tmpfs where memfd is unavailable).
+        
+        Args:
+            data (bytes): Encoded video, e.g. the body of an upload
+            suffix (str): Container extension hint, e.g. '.mp4'
+            adaptive (bool, optional): Stop early once the verdict is settled. If None, uses self.adaptive
+            
+        Returns:
+            dict: Result with predictions and confidence
+        """
+        with memory_file(data, suffix=suffix) as video_path:
+            return self.detect(video_path, adaptive=adaptive)
+    
+    def detect(self, video_path, progress=None, adaptive=None):
         """
         Detect if a video contains deepfake content
         
         Args:
             video_path (str): Path to the video file
+            progress (callable, optional): Called as progress(frames_total=n) before scoring
+                (n is None if unknown) and as progress(frame_results=..., frames_done=n)
+                after each mini-batch, with only that batch's frame results
+            adaptive (bool, optional): Stop early once the verdict is settled, see detect_adaptive().
+                If None, uses self.adaptive
             
         Returns:
             dict: Result with predictions and confidence
         """
         try:
-            # Create a temporary directory for extracted frames
-            temp_dir = tempfile.mkdtemp()
+            adaptive = adaptive if adaptive is not None else self.adaptive
+            if adaptive:
+                result = self.detect_adaptive(video_path, progress=progress)
+                if result is not None:
+                    return result
             
-            # Extract frames from the video
-            frame_paths = self.extract_frames(video_path, temp_dir)
+            start_time = time.perf_counter()
+            timer = StageTimer()
+            if progress is not None:
+                progress(frames_total=self._sampler().expected_frames(video_path))
             
-            if not frame_paths:
-                raise ValueError("No frames could be extracted from the video")
-            
-            # Process each frame
+            # Score frames in mini-batches as they are decoded
             fake_count = 0
             total_confidence = 0
             frame_results = {}
+            frames_analyzed = 0
+            frames_reused = 0
+            scored_name, scored_result = None, None
             
-            for i, frame_path in enumerate(frame_paths):
-                result = self.image_detector.detect(frame_path)
-                frame_results[f"frame_{i}"] = {
-                    "is_fake": result["is_fake"],
-                    "confidence": float(result["confidence"])
-                }
-                
-                if result["is_fake"]:
-                    fake_count += 1
-                total_confidence += result["confidence"]
+            # Each batch comes with one entry per frame: None for a whole-frame row, its faces,
+            # or REUSED for a near-duplicate of the last scored frame
+            tracker = None
+            if self.face_locator is not None:
+                tracker = FaceTracker(self.face_locator, redetect_every=self.face_redetect_every)
+                batches = self.iter_face_batches(video_path, tracker, timer=timer)
+            elif self.decode_pool is not None:
+                batches = self.iter_batches_pooled(video_path, timer=timer)
+            else:
+                batches = self._row_batches(self._sampler().sample(video_path), None, timer, self._deduplicator())
+            
+            for batch, owners in batches:
+                results = []
+                if batch is not None:
+                    with timer.stage('inference'):
+                        results = self.image_detector.detect_batch(batch, batch_size=self.batch_size)
+                batch_results = {}
                 
-                # Clean up
-                if os.path.exists(frame_path):
-                    os.remove(frame_path)
+                with timer.stage('aggregation'):
+                    for frame_result in self._frame_results(results, owners, tracker is not None):
+                        name = f"frame_{frames_analyzed}"
+                        if frame_result is None:
+                            frame_result = {**scored_result, 'reused': True, 'reused_from': scored_name}
+                            frames_reused += 1
+                        elif self.dedup_threshold is not None:
+                            frame_result['reused'] = False
+                            scored_name, scored_result = name, frame_result
+                        batch_results[name] = frame_result
+                        
+                        if frame_result["is_fake"]:
+                            fake_count += 1
+                        total_confidence += frame_result["confidence"]
+                        frames_analyzed += 1
+                    
+                    frame_results.update(batch_results)
+                if progress is not None:
+                    progress(frame_results=batch_results, frames_done=frames_analyzed)
+            
+            if frames_analyzed == 0:
+                raise ValueError("No frames could be extracted from the video")
             
             # Calculate overall results
-            fake_ratio = fake_count / len(frame_paths)
-            avg_confidence = total_confidence / len(frame_paths)
+            fake_ratio = fake_count / frames_analyzed
+            avg_confidence = total_confidence / frames_analyzed
             
             # Video is considered fake if the fake ratio exceeds the threshold
             is_fake = fake_ratio >= self.threshold
             
-            # Clean up temporary directory
-            try:
-                os.rmdir(temp_dir)
-            except:
-                pass
-            
-            return {
+            response = {
                 'is_fake': is_fake,
                 'confidence': float(avg_confidence),
                 'fake_frame_ratio': float(fake_ratio),
-                'frames_analyzed': len(frame_paths),
-                'frame_analysis': frame_results
+                'frames_analyzed': frames_analyzed,
+                'frame_analysis': frame_results,
+                'timings': {**timer.as_dict(), 'total': time.perf_counter() - start_time}
             }
+            if tracker is not None:
+                response['face_detections'] = tracker.detections
+            if self.dedup_threshold is not None:
+                response['frames_reused'] = frames_reused
+            if adaptive:
+                # The frame count was unknown, so every sampled frame was scored
+                response.update(frames_scored=frames_analyzed, frames_available=frames_analyzed,
+                                stop_reason='exhausted')
             
-        except Exception as e:
-            # Clean up in case of exception
-            try:
-                if 'temp_dir' in locals():
-                    for file in os.listdir(temp_dir):
-                        os.remove(os.path.join(temp_dir, file))
-                    os.rmdir(temp_dir)
-            except:
-                pass
+            return response
             
+        except QueueFullError:
+            raise
+        except Exception as e:
             raise Exception(f"Error in video detection: {str(e)}")
 
 # For testing purposes
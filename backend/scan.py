@@ -0,0 +1,199 @@
+"""
+fdpa-scan: score directories or manifests of media files offline
+
+Walks the given directories (and/or reads a manifest with one path per line),
+routes every file to the image, video or audio detector by the extension sets
+in config.py and scores them on a worker pool, batching images across files.
+Detector settings (backends, quantization, adaptive video, windowed audio, face
+crops, ...) come from the same environment variables as the API.
+
+Results are appended to a JSONL file as they complete; the file doubles as the
+checkpoint, so an interrupted scan continues where it stopped with --resume.
+With a .parquet output the JSONL checkpoint is kept next to it and converted
+at the end (requires pyarrow).
+
+Usage (backend/fdpa-scan runs the same from any directory):
+    python scan.py /data/archive [more paths] [--manifest files.txt] --output results.jsonl [--resume]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from utils.scanner import BatchScanner
+from detectors import (make_decode_pool, make_face_locator, make_image_detector,
+                       make_video_detector, make_audio_detector)
+from config import (ALLOWED_IMAGE_EXTENSIONS, ALLOWED_VIDEO_EXTENSIONS, ALLOWED_AUDIO_EXTENSIONS,
+                    BATCH_MAX_WAIT_MS)
+
+EXTENSIONS = {'image': ALLOWED_IMAGE_EXTENSIONS, 'video': ALLOWED_VIDEO_EXTENSIONS, 'audio': ALLOWED_AUDIO_EXTENSIONS}
+ALLOWED_EXTENSIONS = set().union(*EXTENSIONS.values())
+
+def is_media(path):
+    return '.' in path and path.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def collect_paths(inputs, manifest=None):
+    """
+    Media files to scan, in a stable order and without duplicates
+    
+    Args:
+        inputs (list): Files or directories; directories are walked recursively
+        manifest (str, optional): Text file with one path per line; blank lines and
+            lines starting with '#' are skipped, relative paths are relative to the manifest
+            
+    Returns:
+        tuple: (paths of supported files, number of files skipped for their extension)
+    """
+    candidates = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                candidates.extend(os.path.join(root, name) for name in sorted(files))
+        else:
+            candidates.append(path)
+    if manifest:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    candidates.append(os.path.join(base, line))
+    
+    paths, seen, skipped = [], set(), 0
+    for path in candidates:
+        path = os.path.normpath(path)
+        if path in seen:
+            continue
+        seen.add(path)
+        if is_media(path):
+            paths.append(path)
+        else:
+            skipped += 1
+    return paths, skipped
+
+def load_checkpoint(path, retry_errors=False):
+    """
+    Paths already scanned according to a JSONL results file
+    
+    A partly written last line (the scan was killed mid-write) is cut off so
+    appending continues on a clean line.
+    
+    Args:
+        path (str): JSONL results file
+        retry_errors (bool): Leave files that failed out of the set, so they are scanned again
+        
+    Returns:
+        set: Paths with a record
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    good_size = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b'\n'):
+                break
+            good_size += len(line)
+            if not (retry_errors and 'error' in record):
+                done.add(record['name'])
+    if good_size < os.path.getsize(path):
+        print(f"Warning: dropping a partial record at the end of {path}", file=sys.stderr)
+        with open(path, 'r+b') as f:
+            f.truncate(good_size)
+    return done
+
+def write_parquet(jsonl_path, parquet_path):
+    """
+    Convert the JSONL results to Parquet; nested details are stored as JSON strings
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit(f"Parquet output requires pyarrow (pip install pyarrow); results are in {jsonl_path}")
+    
+    with open(jsonl_path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    columns = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+    rows = [
+        {key: json.dumps(record[key]) if isinstance(record.get(key), (dict, list)) else record.get(key)
+         for key in columns}
+        for record in records
+    ]
+    pq.write_table(pa.Table.from_pylist(rows), parquet_path)
+
+def main():
+    parser = argparse.ArgumentParser(prog='fdpa-scan', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help="Files or directories to scan")
+    parser.add_argument('--manifest', help="Text file with one path per line")
+    parser.add_argument('--output', required=True, help="Results file, .jsonl or .parquet")
+    parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help="Files scored concurrently")
+    parser.add_argument('--batch-size', type=int, default=32, help="Rows per forward pass, across files")
+    parser.add_argument('--resume', action='store_true', help="Skip files already in the output")
+    parser.add_argument('--retry-errors', action='store_true', help="With --resume, scan failed files again (their new record follows the old one)")
+    parser.add_argument('--details', action='store_true',
+                        help="Keep per-frame, per-window and per-face results")
+    args = parser.parse_args()
+    if not args.paths and not args.manifest:
+        parser.error("give at least one path or --manifest")
+    
+    parquet_path = None
+    jsonl_path = args.output
+    if args.output.endswith('.parquet'):
+        parquet_path, jsonl_path = args.output, args.output + '.jsonl'
+    
+    paths, skipped = collect_paths(args.paths, args.manifest)
+    if args.resume:
+        done = load_checkpoint(jsonl_path, retry_errors=args.retry_errors)
+        paths = [path for path in paths if path not in done]
+        print(f"Resuming: {len(done)} files already scanned", file=sys.stderr)
+    elif os.path.exists(jsonl_path):
+        parser.error(f"{jsonl_path} exists; pass --resume to continue it or remove it")
+    print(f"{len(paths)} files to scan ({skipped} skipped: unsupported extension)", file=sys.stderr)
+    
+    decode_pool = make_decode_pool()
+    face_locator = make_face_locator()
+    image_detector = make_image_detector(face_locator=face_locator)
+    video_detector = make_video_detector(image_detector, decode_pool=decode_pool, face_locator=face_locator)
+    audio_detector = make_audio_detector(decode_pool=decode_pool)
+    if args.workers > 1:
+        # Frames and audio windows from concurrent files share forward passes
+        for detector in (image_detector, audio_detector):
+            detector.enable_batching(max_batch_size=args.batch_size, max_wait_ms=BATCH_MAX_WAIT_MS,
+                                     max_queue_size=4 * args.workers * args.batch_size)
+    
+    scanner = BatchScanner(image_detector, video_detector, audio_detector, EXTENSIONS,
+                           workers=args.workers, batch_size=args.batch_size, details=args.details)
+    
+    start_time = time.time()
+    last_report = start_time
+    scanned = errors = 0
+    with open(jsonl_path, 'a') as out:
+        for record in scanner.scan((path, path) for path in paths):
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            scanned += 1
+            errors += 'error' in record
+            now = time.time()
+            if now - last_report >= 5 or scanned == len(paths):
+                last_report = now
+                print(f"{scanned}/{len(paths)} files, {scanned / max(now - start_time, 1e-9):.1f} files/s, "
+                      f"{errors} errors", file=sys.stderr)
+        os.fsync(out.fileno())
+    
+    if parquet_path:
+        write_parquet(jsonl_path, parquet_path)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
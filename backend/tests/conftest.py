@@ -0,0 +1,96 @@
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+# Tests run offline from any directory: randomly initialized backbones, no model artifacts,
+# and every runtime file in a temporary directory
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+RUNTIME_DIR = tempfile.mkdtemp(prefix='fdpa-tests-')
+os.environ.setdefault('IMAGE_BASE_WEIGHTS', 'none')
+os.environ.setdefault('MODEL_ARTIFACTS', 'False')
+os.environ.setdefault('CACHE_ENABLED', 'False')
+os.environ.setdefault('JOB_WORKERS', '0')
+os.environ.setdefault('JOBS_DB_PATH', os.path.join(RUNTIME_DIR, 'jobs.sqlite3'))
+os.environ.setdefault('METRICS_DB_PATH', '')
+os.environ.setdefault('UPLOADS_FOLDER', os.path.join(RUNTIME_DIR, 'uploads'))
+os.environ.setdefault('EMBEDDINGS_FOLDER', os.path.join(RUNTIME_DIR, 'embeddings'))
+
+def write_image(path, seed, size=(96, 64)):
+    """Random RGB image, saved in the format of path's extension"""
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)).save(path)
+    return path
+
+def write_video(path, seconds=4, fps=10, size=(96, 64), motion=True):
+    """Synthetic clip: a bright square sliding over a gradient (still if not motion)"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    width, height = size
+    background = np.tile(np.linspace(0, 255, width, dtype=np.uint8), (height, 1))
+    for i in range(int(seconds * fps)):
+        frame = cv2.cvtColor(background, cv2.COLOR_GRAY2BGR)
+        x = (i * 3) % (width - 16) if motion else 8
+        frame[20:36, x:x + 16] = (40, 200, 250)
+        writer.write(frame)
+    writer.release()
+    return path
+
+def write_audio(path, seconds=12, sample_rate=22050, seed=0):
+    """Noisy tone with a slow pitch sweep"""
+    import soundfile as sf
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    rng = np.random.default_rng(seed)
+    y = 0.3 * np.sin(2 * np.pi * (220 + 20 * t) * t) + 0.05 * rng.standard_normal(len(t))
+    sf.write(path, y.astype(np.float32), sample_rate)
+    return path
+
+@pytest.fixture(scope='session')
+def image_detector():
+    from models.image_detector import ImageDetector
+    return ImageDetector(base_weights=None)
+
+@pytest.fixture(scope='session')
+def image_paths(tmp_path_factory):
+    folder = tmp_path_factory.mktemp('images')
+    return [write_image(str(folder / f"image_{i}.{ext}"), i) for i, ext in enumerate(('png', 'jpg', 'png'))]
+
+@pytest.fixture(scope='session')
+def video_path(tmp_path_factory):
+    return write_video(str(tmp_path_factory.mktemp('videos') / 'clip.mp4'))
+
+@pytest.fixture(scope='session')
+def video_detector(image_detector):
+    from models.video_detector import VideoDetector
+    return VideoDetector(image_detector=image_detector, batch_size=3)
+
+@pytest.fixture(scope='session')
+def api():
+    """The Flask app module, configured by the environment above"""
+    import app
+    app.app.config['TESTING'] = True
+    return app
+
+@pytest.fixture(scope='session')
+def small_model():
+    """A tiny Keras classifier with the detectors' sigmoid output, for backend and conversion tests"""
+    import tensorflow as tf
+    tf.keras.utils.set_random_seed(0)
+    inputs = tf.keras.Input((8, 8, 3))
+    x = tf.keras.layers.Conv2D(4, 3, activation='relu')(inputs)
+    x = tf.keras.layers.GlobalAveragePooling2D()(x)
+    outputs = tf.keras.layers.Dense(1, activation='sigmoid')(x)
+    return tf.keras.Model(inputs, outputs)
+
+@pytest.fixture(scope='session')
+def audio_path(tmp_path_factory):
+    return write_audio(str(tmp_path_factory.mktemp('audio') / 'speech.wav'))
+
+@pytest.fixture(scope='session')
+def audio_detector():
+    from models.audio_detector import AudioDetector
+    return AudioDetector()
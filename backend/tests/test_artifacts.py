@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+
+from models.artifacts import artifact_path, load_or_build, save_artifact
+
+def test_artifact_path_follows_the_model(tmp_path):
+    folder = str(tmp_path)
+    weights = tmp_path / 'weights.h5'
+    weights.write_bytes(b'v1')
+    
+    path = artifact_path(folder, 'image', str(weights), 'imagenet')
+    assert os.path.dirname(path) == folder and os.path.basename(path).startswith('image-')
+    assert artifact_path(folder, 'image', str(weights), 'imagenet') == path
+    assert artifact_path(folder, 'image', str(weights), None) != path
+    assert artifact_path(folder, 'audio', str(weights), 'imagenet') != path
+    
+    # New fine-tuned weights get a new artifact
+    weights.write_bytes(b'version 2')
+    assert artifact_path(folder, 'image', str(weights), 'imagenet') != path
+
+def test_load_or_build_restores_the_artifact(tmp_path, small_model):
+    path = str(tmp_path / 'artifacts' / 'image-test.h5')
+    builds = []
+    
+    def build():
+        builds.append(1)
+        return small_model
+    
+    assert load_or_build(path, build) is small_model
+    assert os.path.exists(path)
+    restored = load_or_build(path, build)
+    assert len(builds) == 1
+    
+    x = np.random.default_rng(0).random((2, 8, 8, 3), dtype=np.float32)
+    assert np.allclose(restored.predict(x, verbose=0), small_model.predict(x, verbose=0), atol=1e-6)
+    assert not [name for name in os.listdir(tmp_path / 'artifacts') if name.endswith('.tmp.h5')]
+
+def test_unreadable_artifact_is_rebuilt(tmp_path, small_model):
+    path = str(tmp_path / 'image-test.h5')
+    with open(path, 'wb') as f:
+        f.write(b'truncated')
+    assert load_or_build(path, lambda: small_model) is small_model
+    # Rewritten with a good copy
+    assert load_or_build(path, lambda: None) is not None
+
+def test_unwritable_folder_still_builds(tmp_path, small_model):
+    blocker = tmp_path / 'file'
+    blocker.write_bytes(b'')
+    assert save_artifact(small_model, str(blocker / 'image-test.h5')) is False
+    assert load_or_build(str(blocker / 'image-test.h5'), lambda: small_model) is small_model
+
+def test_detector_restores_from_its_artifact(tmp_path, image_paths):
+    from models.image_detector import ImageDetector
+    
+    built = ImageDetector(base_weights=None, artifact_folder=str(tmp_path))
+    expected = built.detect(image_paths[0])
+    assert os.path.exists(built.artifact_path())
+    
+    restored = ImageDetector(base_weights=None, artifact_folder=str(tmp_path))
+    assert restored.artifact_path() == built.artifact_path()
+    assert np.isclose(restored.detect(image_paths[0])['raw_score'], expected['raw_score'], atol=1e-6)
@@ -1 +1,55 @@
-ECHO is off.
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+from utils.postprocessing import spectrogram_to_png
+
+def test_spectrogram_is_opt_in(audio_detector, audio_path):
+    plain = audio_detector.detect(audio_path)
+    assert 'spectrogram' not in plain
+    
+    result = audio_detector.detect(audio_path, return_spectrogram=True)
+    assert result['raw_score'] == plain['raw_score']
+    img = Image.open(io.BytesIO(base64.b64decode(result['spectrogram'])))
+    assert img.format == 'PNG'
+    assert img.size == (2 * audio_detector.window_frames, 2 * audio_detector.n_mels)
+
+def test_spectrogram_png_puts_low_frequencies_at_the_bottom():
+    spectrogram = np.full((4, 3), -80.0)
+    spectrogram[0] = 0.0
+    img = np.asarray(Image.open(io.BytesIO(spectrogram_to_png(spectrogram, scale=1))))
+    
+    assert img.shape == (4, 3, 3)
+    # Viridis: loud is bright yellow, quiet is dark purple
+    assert img[-1].mean() > img[0].mean()
+    assert (img[:-1] == img[0]).all()
+
+def test_window_starts_cover_the_tail_and_respect_the_cap(audio_detector):
+    detector = audio_detector.with_settings(max_windows=3)
+    assert detector.all_window_starts(1000) == [0, 108, 216, 324, 432, 540, 648, 756, 784]
+    assert detector.window_starts(1000) == [0, 432, 784]
+    assert detector.window_starts(100) == [0]
+
+def test_windowed_detection_scores_the_whole_file(audio_detector, audio_path):
+    result = audio_detector.detect(audio_path, windowed=True)
+    windows = result['window_analysis']
+    scores = [window['raw_score'] for window in windows.values()]
+    
+    # 12 seconds at 512 / 22050 seconds per frame, in 5-second windows with 50% overlap
+    assert result['windows_analyzed'] == result['windows_available'] == len(windows) == 4
+    assert windows['window_0']['start'] == 0.0
+    assert np.isclose(windows['window_3']['end'], 12.0, atol=0.05)
+    assert result['raw_score'] == max(scores)
+    
+    mean = audio_detector.with_settings(window_aggregate='mean').detect(audio_path, windowed=True)
+    assert np.isclose(mean['raw_score'], np.mean(scores), atol=1e-6)
+
+def test_detect_bytes_matches_detect(audio_detector, audio_path):
+    with open(audio_path, 'rb') as f:
+        data = f.read()
+    for windowed in (False, True):
+        result = audio_detector.detect_bytes(data, windowed=windowed)
+        expected = audio_detector.detect(audio_path, windowed=windowed)
+        assert np.isclose(result['raw_score'], expected['raw_score'], atol=1e-6)
@@ -0,0 +1,31 @@
+import os
+
+import numpy as np
+import pytest
+
+from models.backends import BACKENDS, create_backend
+
+@pytest.mark.parametrize('name', BACKENDS)
+def test_backends_match_keras(name, small_model, tmp_path):
+    batch = np.random.default_rng(0).uniform(0, 1, (5, 8, 8, 3)).astype(np.float32)
+    expected = small_model.predict(batch, verbose=0)
+    export_path = {'savedmodel': str(tmp_path / 'savedmodel'), 'tflite': str(tmp_path / 'model.tflite')}.get(name)
+    backend = create_backend(name, lambda: small_model, export_path=export_path, num_threads=1)
+    
+    # Whole batch, uneven chunks, and a single row all give the Keras outputs
+    for batch_size in (32, 2):
+        assert np.allclose(backend.predict(batch, batch_size=batch_size), expected, atol=1e-5)
+    assert np.allclose(backend.predict(batch[:1]), expected[:1], atol=1e-5)
+    if export_path:
+        assert os.path.exists(export_path)
+
+def test_exported_backends_reuse_the_export(small_model, tmp_path):
+    export_path = str(tmp_path / 'model.tflite')
+    create_backend('tflite', lambda: small_model, export_path=export_path)
+    # The model is not needed again once exported
+    backend = create_backend('tflite', lambda: pytest.fail("rebuilt the model"), export_path=export_path)
+    assert backend.predict(np.zeros((1, 8, 8, 3), dtype=np.float32)).shape == (1, 1)
+
+def test_unknown_backend(small_model):
+    with pytest.raises(ValueError):
+        create_backend('onnx', lambda: small_model)
@@ -0,0 +1,74 @@
+import io
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from utils.batching import MicroBatcher, QueueFullError
+
+def test_concurrent_requests_share_a_forward_pass():
+    sizes = []
+    
+    def predict(batch):
+        sizes.append(len(batch))
+        return batch * 2
+    
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=200)
+    inputs = [np.full((rows, 3), i, dtype=np.float32) for i, rows in enumerate((1, 2, 3))]
+    futures = [batcher.submit(batch) for batch in inputs]
+    
+    # Every request gets its own rows back, computed in one pass
+    for batch, future in zip(inputs, futures):
+        assert np.array_equal(future.result(5), batch * 2)
+    assert sizes == [6]
+    assert batcher.stats()['mean_batch_size'] == 6.0
+
+def test_errors_reach_every_request():
+    def predict(batch):
+        raise RuntimeError("model failed")
+    
+    batcher = MicroBatcher(predict, max_wait_ms=50)
+    futures = [batcher.submit(np.zeros((1, 2))) for _ in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(5)
+
+def blocked_batcher(max_queue_size):
+    """A batcher whose forward pass is stuck until release is set, with a full queue"""
+    release = threading.Event()
+    
+    def predict(batch):
+        release.wait(10)
+        return batch
+    
+    batcher = MicroBatcher(predict, max_batch_size=1, max_wait_ms=0, max_queue_size=max_queue_size)
+    running = batcher.submit(np.zeros((1, 1)))
+    while batcher.stats()['queue_depth']:
+        time.sleep(0.01)
+    queued = [batcher.submit(np.zeros((1, 1))) for _ in range(max_queue_size)]
+    return batcher, release, [running] + queued
+
+def test_full_queue_rejects_requests():
+    batcher, release, futures = blocked_batcher(max_queue_size=2)
+    with pytest.raises(QueueFullError):
+        batcher.submit(np.zeros((1, 1)))
+    
+    release.set()
+    for future in futures:
+        future.result(5)
+
+def test_full_queue_returns_503(api, image_paths, monkeypatch):
+    batcher, release, futures = blocked_batcher(max_queue_size=1)
+    monkeypatch.setattr(api.image_detector, 'batcher', batcher)
+    with open(image_paths[0], 'rb') as f:
+        data = f.read()
+    
+    try:
+        response = api.app.test_client().post('/api/detect/image', data={'file': (io.BytesIO(data), 'image.png')})
+        assert response.status_code == 503
+        assert 'busy' in response.get_json()['error']
+    finally:
+        release.set()
+    for future in futures:
+        future.result(5)
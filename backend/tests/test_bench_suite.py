@@ -0,0 +1,48 @@
+import cv2
+import pytest
+
+from benchmarks.bench_suite import compare, measure
+from benchmarks.synthetic import image_array, make_clip
+
+def result(p50_ms, p95_ms, rps, rss_mb):
+    return {'p50_ms': p50_ms, 'p95_ms': p95_ms, 'throughput_rps': {'1': rps}, 'peak_rss_mb': rss_mb}
+
+def test_compare_flags_regressions():
+    baseline = {'cases': {'image': result(100, 150, 10, 500), 'removed': result(1, 1, 1, 1)}}
+    current = {'cases': {'image': result(130, 152, 7, 510), 'added': result(1, 1, 1, 1)}}
+    rows = {(case, label): regressed for case, label, _, _, _, regressed in compare(current, baseline, 0.15, 5)}
+    
+    # Only cases in both runs are compared
+    assert {case for case, _ in rows} == {'image'}
+    assert rows[('image', 'p50_ms')] is True
+    assert rows[('image', 'p95_ms')] is False
+    # Throughput is better when higher
+    assert rows[('image', 'throughput_rps@1')] is True
+    assert rows[('image', 'peak_rss_mb')] is False
+
+def test_compare_ignores_small_latency_changes():
+    baseline = {'cases': {'image': result(2, 2, 10, 500)}}
+    current = {'cases': {'image': result(4, 4, 10, 500)}}
+    assert not any(row[-1] for row in compare(current, baseline, 0.15, 5))
+
+def test_measure():
+    calls = []
+    stats = measure(lambda: calls.append(1), runs=3, concurrency=[1, 2])
+    
+    # One warm-up call, then the sequential runs and runs per worker at each level
+    assert len(calls) == 1 + 3 + 3 * 1 + 3 * 2
+    assert stats['runs'] == 3
+    assert set(stats['throughput_rps']) == {'1', '2'}
+    assert stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms']
+    assert stats['peak_rss_mb'] > 0
+
+def test_synthetic_inputs(tmp_path):
+    assert image_array('structured', 64, 48).shape == (48, 64, 3)
+    with pytest.raises(ValueError):
+        image_array('blank', 64, 48)
+    
+    path = str(tmp_path / 'clip.mp4')
+    make_clip(path, 'motion', 1, 10, 64, 48)
+    cap = cv2.VideoCapture(path)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 10
+    cap.release()
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from models.embeddings import index, rescore
+from utils.embedding_store import EmbeddingStore
+
+def embeddings(n, dim=8, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+def test_put_get_round_trip(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=8)
+    rows = embeddings(3)
+    store.put('a' * 64, [1.0, 0.0, 2.0], rows, kind='video')
+    
+    kind, timestamps, stored = store.get('a' * 64)
+    assert kind == 'video'
+    assert list(timestamps) == [0.0, 1.0, 2.0]
+    assert stored.dtype == np.float16
+    # In timestamp order, at float16 precision
+    assert np.allclose(stored, rows[[1, 0, 2]], atol=1e-2)
+    
+    assert 'a' * 64 in store and 'b' * 64 not in store
+    kind, timestamps, stored = store.get('b' * 64)
+    assert kind is None and len(timestamps) == 0 and stored.shape == (0, 8)
+
+def test_put_again_repoints(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=8)
+    store.put('a', [0.0, 1.0], embeddings(2, seed=0))
+    store.put('b', [0.0], embeddings(1, seed=1))
+    store.put('a', [0.0], embeddings(1, seed=2))
+    
+    assert np.allclose(store.get('a')[2], embeddings(1, seed=2), atol=1e-2)
+    # The old rows stay in the file but are no longer indexed
+    assert store.stats() == {'media': 2, 'embeddings': 2, 'dim': 8, 'bytes': 4 * 8 * 2}
+
+def test_put_checks_the_row_count(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=8)
+    with pytest.raises(ValueError):
+        store.put('a', [0.0], embeddings(2))
+
+def test_partial_row_is_skipped(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=8)
+    store.put('a', [0.0], embeddings(1, seed=0))
+    with open(store.data_path, 'ab') as f:
+        f.write(b'\1' * 5)
+    store.put('b', [0.0], embeddings(1, seed=1))
+    
+    assert np.allclose(store.get('a')[2], embeddings(1, seed=0), atol=1e-2)
+    assert np.allclose(store.get('b')[2], embeddings(1, seed=1), atol=1e-2)
+
+def test_iter_batches_streams_every_row(tmp_path):
+    store = EmbeddingStore(str(tmp_path), dim=8)
+    for i in range(5):
+        store.put(f"m{i}", [0.0, 0.5], embeddings(2, seed=i))
+    
+    batches = list(store.iter_batches(batch_rows=3))
+    assert [len(keys) for keys, _ in batches] == [3, 3, 3, 1]
+    keys = [key for batch_keys, _ in batches for key in batch_keys]
+    rows = np.concatenate([rows for _, rows in batches])
+    assert keys == [(f"m{i}", t, 'image') for i in range(5) for t in (0.0, 0.5)]
+    assert np.allclose(rows, np.concatenate([embeddings(2, seed=i) for i in range(5)]), atol=1e-2)
+
+def test_rescore_matches_detect(tmp_path, image_detector, video_detector, image_paths, video_path):
+    store = EmbeddingStore(str(tmp_path / 'store'))
+    assert index(store, list(image_paths) + [video_path], video_detector, batch_size=2) == (4, 0, 0)
+    assert index(store, image_paths[:1], video_detector) == (0, 1, 0)
+    assert store.stats()['embeddings'] == len(image_paths) + 4
+    
+    results = list(rescore(store, image_detector, video_detector))
+    assert len(results) == 4
+    by_kind = {'image': [], 'video': []}
+    for result in results:
+        by_kind[result['kind']].append(result)
+    
+    # float16 embeddings move the scores only slightly
+    expected = sorted(image_detector.detect(path)['confidence'] for path in image_paths)
+    assert np.allclose(sorted(result['confidence'] for result in by_kind['image']), expected, atol=2e-3)
+    video = video_detector.detect(video_path)
+    assert by_kind['video'][0]['frames_analyzed'] == video['frames_analyzed']
+    assert np.isclose(by_kind['video'][0]['confidence'], video['confidence'], atol=2e-3)
+
+def test_embeddings_endpoints(api, image_paths):
+    client = api.app.test_client()
+    with open(image_paths[0], 'rb') as f:
+        response = client.post('/api/embeddings', data={'file': (f, 'face.png')},
+                               content_type='multipart/form-data')
+    assert response.status_code == 200
+    created = response.get_json()
+    assert created['dim'] == 1280
+    
+    response = client.get(f"/api/embeddings/{created['content_hash']}")
+    assert response.status_code == 200
+    stored = response.get_json()
+    assert np.allclose(stored['embeddings'], created['embeddings'], atol=1e-2)
+    assert client.get(f"/api/embeddings/{'0' * 64}").status_code == 404
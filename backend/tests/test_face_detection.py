@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from utils.face_detection import FaceLocator, FaceTracker, iou, to_source
+
+def test_iou():
+    assert iou((0, 0, 10, 10), (0, 0, 10, 10)) == 1.0
+    assert iou((0, 0, 10, 10), (20, 20, 10, 10)) == 0.0
+    assert np.isclose(iou((0, 0, 10, 10), (5, 0, 10, 10)), 50 / 150)
+    assert iou((0, 0, 0, 0), (0, 0, 0, 0)) == 0.0
+
+def test_to_source_undoes_the_detection_scale():
+    assert to_source((50, 25, 40, 40), 0.5) == (100, 50, 80, 80)
+
+def test_unknown_cascade():
+    with pytest.raises(ValueError):
+        FaceLocator(cascade='haarcascade_eye.xml')
+
+def test_crop_adds_margin_and_clips():
+    locator = FaceLocator(margin=0.5)
+    img = np.zeros((200, 300, 3), dtype=np.uint8)
+    
+    # 40 pixel face widened by half its size on each side
+    assert locator.crop(img, (100, 80, 40, 40)).shape == (80, 80, 3)
+    # Past the top left the crop starts at the edge and keeps its size
+    assert locator.crop(img, (0, 0, 40, 40)).shape == (80, 80, 3)
+    # Past the bottom right it is clipped rather than padded
+    assert locator.crop(img, (280, 180, 20, 20)).shape == (30, 30, 3)
+
+def test_locate_without_faces():
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 256, (240, 1280, 3), dtype=np.uint8)
+    assert FaceLocator().locate(img) == []
+    assert FaceLocator().locate(np.zeros((240, 320, 3), dtype=np.uint8), rgb=True) == []
+
+def test_detect_falls_back_to_the_whole_image(image_detector, image_paths, monkeypatch):
+    from PIL import Image
+    
+    img_array = np.asarray(Image.open(image_paths[0]).convert('RGB'))
+    expected = image_detector.detect_batch(image_detector.preprocess_array(img_array)[np.newaxis])[0]
+    
+    monkeypatch.setattr(image_detector, 'face_locator', FaceLocator())
+    result = image_detector.detect(image_paths[0])
+    assert result['face_fallback'] is True
+    assert result['faces'] == []
+    assert np.isclose(result['raw_score'], expected['raw_score'], atol=1e-5)
+    assert 'faces' in result['timings']
+
+def test_detect_scores_every_face(image_detector, image_paths, monkeypatch):
+    boxes = [(10, 10, 30, 30), (60, 20, 20, 20)]
+    locator = FaceLocator()
+    monkeypatch.setattr(locator, 'locate', lambda img, rgb=False: boxes)
+    monkeypatch.setattr(image_detector, 'face_locator', locator)
+    
+    result = image_detector.detect(image_paths[0])
+    assert result['face_fallback'] is False
+    assert [face['box'] for face in result['faces']] == [list(box) for box in boxes]
+    # The image verdict is that of its most likely fake face
+    assert result['raw_score'] == max(face['raw_score'] for face in result['faces'])
+
+def textured_frame(x, y, size=40, shape=(120, 160)):
+    frame = np.full(shape + (3,), 128, dtype=np.uint8)
+    rng = np.random.default_rng(1)
+    frame[y:y + size, x:x + size] = rng.integers(0, 256, (size, size, 1), dtype=np.uint8)
+    return frame
+
+def test_tracker_follows_between_detections(monkeypatch):
+    locator = FaceLocator()
+    detections = []
+    
+    def detect_prepared(gray, scale):
+        detections.append(len(detections))
+        return [(20, 30, 40, 40)]
+    
+    monkeypatch.setattr(locator, 'detect_prepared', detect_prepared)
+    tracker = FaceTracker(locator, redetect_every=3)
+    
+    assert tracker.update(textured_frame(20, 30)) == [(0, (20, 30, 40, 40))]
+    # The patch moves; template matching follows it without running the cascade
+    assert tracker.update(textured_frame(26, 33)) == [(0, (26, 33, 40, 40))]
+    assert tracker.update(textured_frame(30, 36)) == [(0, (30, 36, 40, 40))]
+    assert tracker.detections == 1
+    
+    # Every redetect_every frames the cascade runs again; the overlapping box keeps its track id
+    assert tracker.update(textured_frame(20, 30)) == [(0, (20, 30, 40, 40))]
+    assert tracker.detections == 2
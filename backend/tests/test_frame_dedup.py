@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from conftest import write_video
+from models.video_detector import VideoDetector
+from utils.frame_dedup import FrameDeduplicator
+from utils.pipeline import DecodePool
+
+def frame(level):
+    return np.full((48, 64, 3), level, dtype=np.uint8)
+
+def test_near_identical_frames_are_duplicates():
+    dedup = FrameDeduplicator(threshold=0.02)
+    assert not dedup.is_duplicate(frame(100))
+    assert dedup.is_duplicate(frame(100))
+    assert dedup.is_duplicate(frame(103))
+    assert not dedup.is_duplicate(frame(160))
+
+def test_drift_is_rescored():
+    dedup = FrameDeduplicator(threshold=0.02)
+    verdicts = [dedup.is_duplicate(frame(100 + 2 * i)) for i in range(8)]
+    # Each frame is 2 levels from the last but compared with the last scored one,
+    # so the drift is scored again once it passes the threshold (about 5 levels)
+    assert verdicts == [False, True, True, False, True, True, False, True]
+
+@pytest.fixture(scope='module')
+def still_video_path(tmp_path_factory):
+    return write_video(str(tmp_path_factory.mktemp('videos') / 'still.mp4'), motion=False)
+
+def test_detect_reuses_duplicate_frames(image_detector, still_video_path):
+    plain = VideoDetector(image_detector=image_detector, frames_per_second=2, decode_pool=None)
+    dedup = VideoDetector(image_detector=image_detector, frames_per_second=2, decode_pool=None,
+                          dedup_threshold=0.02)
+    expected = plain.detect(still_video_path)
+    result = dedup.detect(still_video_path)
+    
+    assert result['frames_analyzed'] == expected['frames_analyzed'] == 8
+    assert result['frames_reused'] == 7
+    frames = result['frame_analysis']
+    assert frames['frame_0']['reused'] is False
+    assert frames['frame_7']['reused'] is True and frames['frame_7']['reused_from'] == 'frame_0'
+    # A still clip scores the same with or without reuse
+    assert np.isclose(result['confidence'], expected['confidence'], atol=1e-5)
+    assert result['is_fake'] == expected['is_fake']
+
+def test_pooled_decode_reuses_within_chunks(image_detector, still_video_path):
+    detector = VideoDetector(image_detector=image_detector, frames_per_second=2, batch_size=3,
+                             decode_pool=DecodePool(workers=2), dedup_threshold=0.02)
+    result = detector.detect(still_video_path)
+    
+    # Each chunk of batch_size frames scores its first frame
+    assert result['frames_analyzed'] == 8
+    assert result['frames_reused'] == 8 - 3
+    assert [name for name, frame in result['frame_analysis'].items() if not frame['reused']] == [
+        'frame_0', 'frame_3', 'frame_6']
+
+def test_moving_clip_is_scored_in_full(image_detector, video_path):
+    dedup = VideoDetector(image_detector=image_detector, decode_pool=None, dedup_threshold=0.001)
+    assert dedup.detect(video_path)['frames_reused'] == 0
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from utils.frame_sampling import FrameSampler, STRATEGIES
+
+def test_plan_uses_interval_and_spreads_capped_frames():
+    assert FrameSampler(frames_per_second=1).plan(10, 35) == [0, 10, 20, 30]
+    assert FrameSampler(frames_per_second=100).plan(10, 3) == [0, 1, 2]
+    assert FrameSampler(frames_per_second=1, max_frames=3).plan(10, 101) == [0, 50, 100]
+    assert FrameSampler().plan(10, 0) is None
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        FrameSampler(strategy='nearest')
+
+def test_strategies_decode_the_same_frames(video_path):
+    samples = {strategy: list(FrameSampler(frames_per_second=2, strategy=strategy).sample(video_path))
+               for strategy in ('read', 'grab', 'seek')}
+    
+    numbers = [number for number, _ in samples['read']]
+    assert numbers == FrameSampler(frames_per_second=2).plan(10, 40)
+    for strategy in ('grab', 'seek'):
+        assert [number for number, _ in samples[strategy]] == numbers
+    # grab only skips decoding the frames in between, so the pixels are identical
+    for (_, read), (_, grab) in zip(samples['read'], samples['grab']):
+        assert np.array_equal(read, grab)
+
+@pytest.mark.parametrize('strategy', STRATEGIES)
+def test_sample_indices_matches_sample(video_path, strategy):
+    sampler = FrameSampler(frames_per_second=2, strategy=strategy)
+    indices = sampler.video_plan(video_path)
+    expected = [number for number, _ in sampler.sample(video_path)]
+    
+    # A chunk in the middle of the plan, as handed to one decode pool worker
+    chunk = indices[2:5]
+    assert [number for number, _ in sampler.sample_indices(video_path, chunk)] == chunk
+    assert set(chunk) <= set(expected)
@@ -1 +1,29 @@
-ECHO is off.
+import numpy as np
+
+def test_detect_batch_matches_detect(image_detector, image_paths):
+    single = [image_detector.detect(path) for path in image_paths]
+    batch = np.concatenate([image_detector.preprocess_image(path) for path in image_paths])
+    
+    # One forward pass and several smaller ones give the per-image scores of detect()
+    for batch_size in (len(image_paths), 2):
+        results = image_detector.detect_batch(batch, batch_size=batch_size)
+        assert len(results) == len(image_paths)
+        for result, expected in zip(results, single):
+            assert result['is_fake'] == expected['is_fake']
+            assert np.isclose(result['raw_score'], expected['raw_score'], atol=1e-5)
+            assert np.isclose(result['confidence'], expected['confidence'], atol=1e-5)
+
+def test_detect_batch_accepts_sequences(image_detector, image_paths):
+    arrays = [image_detector.preprocess_image(path) for path in image_paths]
+    stacked = image_detector.detect_batch(np.concatenate(arrays))
+    listed = image_detector.detect_batch(arrays)
+    assert [r['raw_score'] for r in listed] == [r['raw_score'] for r in stacked]
+    assert image_detector.detect_batch([]) == []
+
+def test_detect_bytes_matches_detect(image_detector, image_paths):
+    for path in image_paths:
+        with open(path, 'rb') as f:
+            result = image_detector.detect_bytes(f.read())
+        expected = image_detector.detect(path)
+        assert result['is_fake'] == expected['is_fake']
+        assert np.isclose(result['raw_score'], expected['raw_score'], atol=1e-5)
@@ -0,0 +1,132 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from utils.jobs import JobStore, JobRunner
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / 'clip.mp4'
+    path.write_bytes(b'video')
+    return str(path)
+
+def test_jobs_are_claimed_oldest_first(store):
+    first = store.create('video', None, {'adaptive': True})
+    second = store.create('video', None)
+    
+    job = store.claim_next()
+    assert (job['id'], job['status'], job['attempt'], job['params']) == (first, 'running', 1, {'adaptive': True})
+    assert store.claim_next()['id'] == second
+    assert store.claim_next() is None
+
+def test_progress_and_outcome(store):
+    job_id = store.create('video', None)
+    attempt = store.claim_next()['attempt']
+    assert store.set_total(job_id, attempt, 3)
+    assert store.add_frames(job_id, attempt, {'frame_0': {'is_fake': False}, 'frame_1': {'is_fake': True}}, 2)
+    assert store.finish(job_id, attempt, {'result': 'real'})
+    
+    job = store.get(job_id)
+    assert (job['status'], job['frames_done'], job['frames_total'], job['result']) == ('done', 2, 3, {'result': 'real'})
+    assert store.frames(job_id, start=1) == [('frame_1', {'is_fake': True})]
+
+def test_requeued_job_belongs_to_the_new_attempt(store):
+    job_id = store.create('video', None)
+    stalled = store.claim_next()
+    store.add_frames(job_id, stalled['attempt'], {'frame_0': {}}, 1)
+    time.sleep(0.02)
+    store.requeue_stale(0.01)
+    
+    # The restart begins from scratch
+    job = store.get(job_id)
+    assert (job['status'], job['frames_done'], store.frames(job_id)) == ('queued', 0, [])
+    rerun = store.claim_next()
+    assert rerun['attempt'] == stalled['attempt'] + 1
+    
+    # The stalled attempt can no longer record anything
+    assert not store.add_frames(job_id, stalled['attempt'], {'frame_0': {}}, 1)
+    assert not store.heartbeat(job_id, stalled['attempt'])
+    assert not store.fail(job_id, stalled['attempt'], 'timeout')
+    assert store.frames(job_id) == [] and store.get(job_id)['status'] == 'running'
+    assert store.finish(job_id, rerun['attempt'], {})
+
+def test_runner_records_results_and_removes_media(store, media):
+    def handler(job, progress):
+        progress(frames_total=1)
+        progress(frame_results={'frame_0': {'is_fake': True}}, frames_done=1)
+        return {'result': 'fake'}
+    
+    job_id = store.create('video', media)
+    JobRunner(store, {'video': handler}, workers=0)._execute(store.claim_next())
+    job = store.get(job_id)
+    assert (job['status'], job['result'], job['frames_done']) == ('done', {'result': 'fake'}, 1)
+    assert not os.path.exists(media)
+
+def test_runner_records_failures(store, media):
+    def handler(job, progress):
+        raise ValueError("No frames could be extracted from the video")
+    
+    job_id = store.create('video', media)
+    JobRunner(store, {'video': handler}, workers=0)._execute(store.claim_next())
+    job = store.get(job_id)
+    assert (job['status'], job['error']) == ('failed', "No frames could be extracted from the video")
+    assert not os.path.exists(media)
+
+def test_heartbeat_keeps_a_slow_job_claimed(store, media):
+    def handler(job, progress):
+        # No progress for longer than stale_after
+        time.sleep(0.6)
+        return {'result': 'real'}
+    
+    job_id = store.create('video', media)
+    runner = JobRunner(store, {'video': handler}, workers=0, stale_after=0.3)
+    thread = threading.Thread(target=runner._execute, args=(store.claim_next(),))
+    thread.start()
+    while thread.is_alive():
+        store.requeue_stale(runner.stale_after)
+        time.sleep(0.05)
+    
+    job = store.get(job_id)
+    assert (job['status'], job['attempt']) == ('done', 1)
+    assert not os.path.exists(media)
+
+def test_lost_job_leaves_media_to_the_new_owner(store, media):
+    def handler(job, progress):
+        # Requeued behind the worker's back, e.g. after the process was suspended
+        time.sleep(0.02)
+        store.requeue_stale(0.01)
+        store.claim_next()
+        return {'result': 'real'}
+    
+    job_id = store.create('video', media)
+    JobRunner(store, {'video': handler}, workers=0, stale_after=60)._execute(store.claim_next())
+    job = store.get(job_id)
+    assert (job['status'], job['attempt'], job['result']) == ('running', 2, None)
+    assert os.path.exists(media)
+
+def test_video_job_api(api, video_path):
+    client = api.app.test_client()
+    with open(video_path, 'rb') as f:
+        response = client.post('/api/jobs/video', data={'file': (io.BytesIO(f.read()), 'clip.mp4')})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert client.get(f"/api/jobs/{job_id}").get_json()['status'] == 'queued'
+    
+    job = api.job_store.claim_next()
+    assert job['id'] == job_id
+    api.job_runner._execute(job)
+    
+    body = client.get(f"/api/jobs/{job_id}").get_json()
+    assert body['status'] == 'done'
+    assert body['progress'] == {'frames_done': 4, 'frames_total': 4}
+    assert len(body['frame_analysis']) == body['frames_analyzed'] == 4
+    events = client.get(f"/api/jobs/{job_id}/events").get_data(as_text=True)
+    assert events.count('event: frame') == 4 and 'event: done' in events
+    assert client.get('/api/jobs/missing').status_code == 404
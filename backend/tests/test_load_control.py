@@ -0,0 +1,113 @@
+import io
+
+import pytest
+
+import utils.load_control as load_control
+from utils.load_control import EFFORT_SETTINGS, LoadController, effort_levels, relative_cost
+
+FULL = {'frames_per_second': 1.0, 'max_frames': None, 'audio_windows': 64, 'resolution': 224}
+MINIMUM = {'frames_per_second': 0.25, 'max_frames': 16, 'audio_windows': 8, 'resolution': 160}
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def perf_counter(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(load_control, 'time', clock)
+    return clock
+
+def test_effort_levels_decline_geometrically():
+    levels = effort_levels(4, FULL, MINIMUM)
+    
+    assert len(levels) == 4 and levels[0] == FULL
+    assert all(set(level) == set(EFFORT_SETTINGS) for level in levels)
+    assert levels[-1]['frames_per_second'] == 0.25 and levels[-1]['audio_windows'] == 8
+    assert levels[-1]['max_frames'] == 16 and levels[-1]['resolution'] == 160
+    # Without a cap at full effort the cap halves per level down to the minimum
+    assert [level['max_frames'] for level in levels[1:]] == [64, 32, 16]
+    assert all(level['resolution'] % 32 == 0 for level in levels)
+    for key in ('frames_per_second', 'audio_windows', 'resolution'):
+        assert all(a[key] >= b[key] for a, b in zip(levels, levels[1:]))
+    assert effort_levels(1, FULL, MINIMUM) == [FULL]
+
+def test_relative_cost():
+    half = {**FULL, 'frames_per_second': 0.5, 'audio_windows': 16, 'resolution': 112}
+    assert relative_cost('image', FULL, FULL) == 1.0
+    assert relative_cost('image', half, FULL) == 0.25
+    assert relative_cost('video', half, FULL) == relative_cost('batch', half, FULL) == 0.125
+    assert relative_cost('audio_windowed', half, FULL) == 0.25
+    assert relative_cost('audio', half, FULL) == 1.0
+
+def test_full_effort_until_rates_are_known(clock):
+    controller = LoadController(effort_levels(4, FULL, MINIMUM), targets={'video': 1.0})
+    
+    # Without a budget or target the request is unmanaged
+    ticket = controller.begin('image')
+    assert ticket['level'] == 0 and ticket['budget'] is None and ticket['predicted'] is None
+    controller.end(ticket)
+    # With one but no finished request of its kind yet, full effort too
+    ticket = controller.begin('video', work=2.0)
+    assert ticket['level'] == 0 and ticket['budget'] == 1.0 and ticket['predicted'] is None
+    assert controller.in_flight == 1
+    clock.now += 4.0
+    controller.end(ticket)
+    assert controller.in_flight == 0
+    assert controller.stats()['rates'] == {'image': {0: 0.0}, 'video': {0: 2.0}}
+
+def test_tight_budget_lowers_effort(clock):
+    levels = effort_levels(4, FULL, MINIMUM)
+    controller = LoadController(levels, targets={'video': 100.0}, headroom=0.5)
+    ticket = controller.begin('video')
+    clock.now += 1.0
+    controller.end(ticket)
+    
+    # 1 s per unit of work at full effort: a generous budget keeps it
+    running = controller.begin('video', work=1.0)
+    assert running['level'] == 0
+    controller.end(controller.begin('image'), record=False)
+    
+    # running is still in flight, which doubles the prediction; relative_cost scales it below full effort
+    ticket = controller.begin('video', work=1.0, budget=0.5)
+    assert controller.in_flight == 2
+    expected = [relative_cost('video', level, levels[0]) * 2 for level in levels]
+    fitting = [i for i, prediction in enumerate(expected) if prediction <= 0.25]
+    assert ticket['level'] == (fitting[0] if fitting else len(levels) - 1)
+    assert ticket['level'] > 0
+    assert ticket['predicted'] == pytest.approx(expected[ticket['level']])
+    
+    effort = controller.effort(ticket)
+    assert effort['level'] == ticket['level'] and effort['levels'] == 4
+    assert effort['budget_ms'] == 500.0
+    assert {key: effort[key] for key in EFFORT_SETTINGS} == levels[ticket['level']]
+
+def test_rates_account_for_concurrency(clock):
+    controller = LoadController(effort_levels(2, FULL, MINIMUM))
+    first = controller.begin('image')
+    second = controller.begin('image')
+    clock.now += 2.0
+    controller.end(first)
+    controller.end(second)
+    
+    # Two requests shared the server for 2 s: 1 s of work each
+    assert controller.stats()['rates']['image'][0] == pytest.approx(1.0)
+
+def test_budget_parameter(api, image_paths):
+    client = api.app.test_client()
+    with open(image_paths[0], 'rb') as f:
+        data = f.read()
+    
+    def post(query):
+        return client.post(f"/api/detect/image{query}", data={'file': (io.BytesIO(data), 'face.png')},
+                           content_type='multipart/form-data')
+    
+    response = post('?budget_ms=60000')
+    assert response.status_code == 200
+    effort = response.get_json()['effort']
+    assert effort['budget_ms'] == 60000 and 0 <= effort['level'] < effort['levels']
+    assert 'effort' not in post('').get_json()
+    assert post('?budget_ms=-5').status_code == 400
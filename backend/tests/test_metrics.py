@@ -0,0 +1,66 @@
+import numpy as np
+
+from utils.metrics import Metrics, bucket_bound, bucket_index, quantile
+
+def test_buckets_cover_their_values():
+    for value in (1e-5, 1e-4, 0.0123, 1.0, 42.0):
+        index = bucket_index(value)
+        assert value <= bucket_bound(index)
+        if index > 0:
+            assert value > bucket_bound(index - 1)
+
+def test_quantile_is_within_a_bucket():
+    metrics = Metrics()
+    values = np.linspace(0.01, 1.0, 1000)
+    metrics.observe_many('latency', [(value, None) for value in values])
+    _, histograms = metrics.snapshot()
+    histogram = histograms[('latency', '{}')]
+    
+    for q in (0.5, 0.95, 0.99):
+        assert abs(quantile(histogram, q) - np.quantile(values, q)) <= np.quantile(values, q) * 0.2
+    assert quantile(histogram, 0) >= 0.01 and quantile(histogram, 1) <= 1.0
+    assert np.isnan(quantile((0, 0, {}, 0, 0), 0.5))
+
+def test_render():
+    metrics = Metrics(namespace='test')
+    metrics.describe('requests_total', 'counter', "Requests")
+    metrics.inc('requests_total', {'endpoint': 'image', 'status': '200'})
+    metrics.inc('requests_total', {'endpoint': 'image', 'status': '200'}, amount=2)
+    metrics.observe_timings('stage_seconds', {'decode': 0.5, 'inference': 0.25})
+    
+    lines = metrics.render().splitlines()
+    assert lines[:3] == [
+        '# HELP test_requests_total Requests',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{endpoint="image",status="200"} 3',
+    ]
+    assert '# TYPE test_stage_seconds summary' in lines
+    assert 'test_stage_seconds{quantile="0.5",stage="decode"} 0.5' in lines
+    assert 'test_stage_seconds_sum{stage="inference"} 0.25' in lines
+    assert 'test_stage_seconds_count{stage="inference"} 1' in lines
+
+def test_workers_share_totals_through_the_database(tmp_path):
+    db_path = str(tmp_path / 'metrics.sqlite3')
+    first = Metrics(db_path=db_path, flush_interval=60)
+    second = Metrics(db_path=db_path, flush_interval=60)
+    
+    first.inc('requests_total')
+    first.observe('latency', 0.1)
+    second.inc('requests_total', amount=2)
+    second.observe('latency', 0.3)
+    first.flush()
+    second.flush()
+    
+    for metrics in (first, second):
+        counters, histograms = metrics.snapshot()
+        assert counters[('requests_total', '{}')] == 3
+        total, count, buckets, low, high = histograms[('latency', '{}')]
+        assert np.isclose(total, 0.4) and count == 2 and sum(buckets.values()) == 2
+        assert (low, high) == (0.1, 0.3)
+
+def test_metrics_endpoint(api):
+    client = api.app.test_client()
+    client.get('/api/health')
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert 'fdpa_requests_total' in response.get_data(as_text=True)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from utils.pipeline import DecodePool, StageTimer, prefetch
+
+def fill(task, out):
+    """Module-level, so process workers can unpickle it"""
+    out[:] = task
+    return task * 2
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_map_into_keeps_task_order(executor):
+    pool = DecodePool(workers=2, executor=executor, prefetch=2)
+    seen = []
+    for out, result, wait in pool.map_into(fill, range(10), (3,)):
+        assert np.array_equal(out, np.full(3, result / 2))
+        assert wait >= 0
+        seen.append(result)
+    assert seen == [i * 2 for i in range(10)]
+
+def test_unknown_executor():
+    with pytest.raises(ValueError):
+        DecodePool(executor='gpu')
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_pooled_frames_match_serial_decoding(video_detector, video_path, executor):
+    # Runs after the detector has built its TensorFlow model, so process workers must not be forked
+    serial = np.concatenate(list(video_detector.iter_batches(video_path)))
+    pooled = video_detector.with_settings(decode_pool=DecodePool(workers=2, executor=executor, prefetch=1))
+    # Buffers are reused, so copy each batch before taking the next
+    batches = [np.array(batch) for batch, _ in pooled.iter_batches_pooled(video_path)]
+    assert np.allclose(np.concatenate(batches), serial, atol=1e-4)
+    
+    result = pooled.detect(video_path)
+    assert np.isclose(result['confidence'], video_detector.detect(video_path)['confidence'], atol=1e-5)
+
+def test_prefetch_keeps_order_and_reraises():
+    assert list(prefetch(iter(range(20)), depth=3)) == list(range(20))
+    
+    def broken():
+        yield 1
+        raise RuntimeError("decode failed")
+    
+    items = prefetch(broken())
+    assert next(items) == 1
+    with pytest.raises(RuntimeError):
+        next(items)
+
+def test_stage_timer_accumulates():
+    timer = StageTimer()
+    with timer.stage('decode'):
+        pass
+    timer.add('decode', 1.0)
+    timer.merge({'decode': 0.5, 'preprocess': 0.25})
+    timings = timer.as_dict()
+    assert timings['decode'] >= 1.5 and timings['preprocess'] == 0.25
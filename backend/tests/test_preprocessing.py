@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from conftest import write_audio
+from utils.preprocessing import AudioLoader, MelSpectrogram, RESAMPLERS
+
+@pytest.fixture(scope='module')
+def audio_44k(tmp_path_factory):
+    return write_audio(str(tmp_path_factory.mktemp('audio') / 'speech_44k.wav'), seconds=4, sample_rate=44100)
+
+def test_soundfile_decoder_matches_librosa(audio_44k):
+    librosa_y = AudioLoader(decoder='librosa').load(audio_44k, offset=0.5, duration=2.0)
+    soundfile_y = AudioLoader(decoder='soundfile').load(audio_44k, offset=0.5, duration=2.0)
+    assert len(soundfile_y) == len(librosa_y) == 2 * 22050
+    assert np.abs(soundfile_y - librosa_y).max() < 1e-4
+
+@pytest.mark.parametrize('res_type', RESAMPLERS)
+def test_resamplers_agree(audio_44k, res_type):
+    reference = AudioLoader(decoder='soundfile').load(audio_44k)
+    y = AudioLoader(decoder='soundfile', res_type=res_type).load(audio_44k)
+    assert y.dtype == np.float32 and len(y) == len(reference)
+    # soxr_qq is cubic interpolation without an anti-aliasing filter, so the noise folds back
+    assert np.corrcoef(y[1000:-1000], reference[1000:-1000])[0, 1] > 0.98
+
+def test_stream_matches_load(audio_44k):
+    loader = AudioLoader(decoder='soundfile')
+    streamed = np.concatenate(list(loader.stream(audio_44k, block_seconds=1, offset=1.0)))
+    loaded = loader.load(audio_44k, offset=1.0)
+    assert abs(len(streamed) - len(loaded)) <= 1
+    n = min(len(streamed), len(loaded))
+    assert np.corrcoef(streamed[:n], loaded[:n])[0, 1] > 0.999
+
+def test_unknown_settings():
+    with pytest.raises(ValueError):
+        AudioLoader(decoder='ffmpeg')
+    with pytest.raises(ValueError):
+        MelSpectrogram(backend='torch')
+
+def test_numpy_mel_matches_librosa(audio_44k):
+    y = AudioLoader(decoder='soundfile').load(audio_44k)
+    expected = MelSpectrogram(backend='librosa').power(y)
+    with ThreadPoolExecutor(2) as executor:
+        for mel in (MelSpectrogram(backend='numpy'), MelSpectrogram(backend='numpy', executor=executor, workers=2)):
+            power = mel.power(y)
+            assert power.shape == expected.shape
+            assert np.allclose(power, expected, rtol=1e-3, atol=1e-6 * expected.max())
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from models.backends import TFLiteBackend
+from models.quantization import MODES, quantize
+
+@pytest.mark.parametrize('mode', MODES)
+def test_quantized_models_stay_close_to_float(mode, small_model, tmp_path):
+    inputs = np.random.default_rng(1).uniform(0, 1, (16, 8, 8, 3)).astype(np.float32)
+    model_file = tmp_path / f"model_{mode}.tflite"
+    model_file.write_bytes(quantize(small_model, mode, representative_inputs=inputs))
+    
+    # Float inputs and outputs, so the tflite backend serves it like the float model
+    backend = TFLiteBackend(lambda: pytest.fail("converted again"), model_file=str(model_file))
+    scores = backend.predict(inputs)
+    assert scores.dtype == np.float32
+    assert np.abs(scores - small_model.predict(inputs, verbose=0)).max() < 0.05
+
+def test_int8_needs_calibration_data(small_model):
+    with pytest.raises(ValueError):
+        quantize(small_model, 'int8')
+    with pytest.raises(ValueError):
+        quantize(small_model, 'int4')
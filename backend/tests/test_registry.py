@@ -0,0 +1,35 @@
+import threading
+
+import pytest
+
+from models.registry import ModelRegistry, registry
+from models.image_detector import ImageDetector
+
+def test_builds_each_model_once():
+    models = ModelRegistry()
+    calls = []
+    models.register(('image', None), lambda: calls.append(1) or object())
+    # A second registration for the same key keeps the first builder
+    models.register(('image', None), lambda: pytest.fail("replaced builder"))
+    
+    assert models.stats()['image:None'] == {'loaded': False}
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(models.get(('image', None)))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1 and models.builds == 1
+    assert all(model is results[0] for model in results)
+    stats = models.stats()['image:None']
+    assert stats['loaded'] and stats['load_time'] >= 0 and stats['rss_bytes'] >= 0
+
+def test_unregistered_key():
+    with pytest.raises(KeyError):
+        ModelRegistry().get(('audio', 'missing.h5'))
+
+def test_detectors_share_the_network(image_detector):
+    other = ImageDetector(base_weights=None)
+    assert other.model is image_detector.model
+    assert registry.get(other.model_key) is image_detector.model
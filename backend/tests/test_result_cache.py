@@ -0,0 +1,66 @@
+import io
+import time
+
+from utils.result_cache import ResultCache, hash_stream
+
+def test_keys_depend_on_content_params_and_model_version():
+    cache = ResultCache(model_version='1')
+    stream = io.BytesIO(b'x' * 3000)
+    key, size = cache.make_key('image', stream, {'face_crop': False})
+    
+    assert size == 3000 and stream.tell() == 0
+    assert cache.make_key('image', io.BytesIO(b'x' * 3000), {'face_crop': False})[0] == key
+    assert cache.make_key('image', io.BytesIO(b'y' * 3000), {'face_crop': False})[0] != key
+    assert cache.make_key('image', stream, {'face_crop': True})[0] != key
+    assert ResultCache(model_version='2').make_key('image', stream, {'face_crop': False})[0] != key
+    assert hash_stream(io.BytesIO(b'abc'), chunk_size=2) == hash_stream(io.BytesIO(b'abc'))
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', {'n': 1})
+    cache.put('b', {'n': 2})
+    assert cache.get('a') == {'n': 1}
+    # 'b' is now the least recently used
+    cache.put('c', {'n': 3})
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == {'n': 1} and cache.get('c') == {'n': 3}
+    assert cache.stats()['entries'] == 2
+
+def test_byte_limit_eviction():
+    cache = ResultCache(max_bytes=100)
+    cache.put('a', {'data': 'x' * 40})
+    cache.put('b', {'data': 'y' * 40})
+    assert cache.get('a') is None and cache.get('b') is not None
+    assert cache.stats()['bytes'] <= 100
+    
+    # A result larger than the whole budget is not kept
+    cache.put('c', {'data': 'z' * 200})
+    assert cache.get('c') is None
+
+def test_ttl_expiry():
+    cache = ResultCache(ttl=0.05)
+    cache.put('a', {'n': 1})
+    assert cache.get('a') == {'n': 1}
+    time.sleep(0.1)
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+def test_sqlite_tier_is_shared(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    writer, reader = ResultCache(sqlite_path=path), ResultCache(sqlite_path=path)
+    writer.put('a', {'n': 1})
+    
+    # Another worker finds it on disk, then in its own memory
+    assert reader.get('a', nbytes=10) == {'n': 1}
+    assert reader.get('a', nbytes=10) == {'n': 1}
+    stats = reader.stats()
+    assert (stats['hits'], stats['disk_hits'], stats['misses'], stats['bytes_saved']) == (2, 1, 0, 20)
+
+def test_sqlite_tier_expires(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    ResultCache(sqlite_path=path, ttl=0.05).put('a', {'n': 1})
+    time.sleep(0.1)
+    reader = ResultCache(sqlite_path=path)
+    assert reader.get('a') is None
+    assert reader.stats()['misses'] == 1
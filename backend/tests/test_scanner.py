@@ -0,0 +1,102 @@
+import io
+import json
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+from utils.scanner import BatchScanner
+
+EXTENSIONS = {'image': {'png', 'jpg'}, 'video': {'mp4'}, 'audio': {'wav'}}
+
+@pytest.fixture
+def scanner(image_detector, video_detector, audio_detector):
+    return BatchScanner(image_detector, video_detector, audio_detector, EXTENSIONS, workers=3, batch_size=2)
+
+def test_scan_all_keeps_input_order(scanner, image_detector, video_detector, audio_detector, image_paths,
+                                    video_path, audio_path):
+    with open(image_paths[1], 'rb') as f:
+        image_bytes = f.read()
+    items = [
+        (image_paths[0], image_paths[0]),
+        ('clip.mp4', video_path),
+        ('notes.txt', b'not media'),
+        ('second.jpg', image_bytes),
+        ('speech.wav', audio_path),
+        (image_paths[2], image_paths[2]),
+    ]
+    records = scanner.scan_all(items)
+    
+    assert [record['name'] for record in records] == [name for name, _ in items]
+    assert [record['kind'] for record in records] == ['image', 'video', None, 'image', 'audio', 'image']
+    assert records[2]['error'] == 'File type not allowed'
+    
+    # Images scored across files in one forward pass match their single-image scores
+    for record, path in zip([records[0], records[3], records[5]], image_paths):
+        expected = image_detector.detect(path)
+        assert record['result'] == ('fake' if expected['is_fake'] else 'real')
+        assert np.isclose(record['confidence'], expected['confidence'], atol=1e-5)
+    assert np.isclose(records[1]['confidence'], video_detector.detect(video_path)['confidence'], atol=1e-5)
+    assert records[1]['frames_analyzed'] == 4
+    assert np.isclose(records[4]['confidence'], audio_detector.detect(audio_path)['confidence'], atol=1e-5)
+    # Summaries only; per-frame results need details=True
+    assert 'frame_analysis' not in records[1]
+
+def test_corrupt_file_gets_an_error_record(scanner, image_paths, tmp_path):
+    corrupt = tmp_path / 'corrupt.png'
+    corrupt.write_bytes(b'\x89PNG not really')
+    records = scanner.scan_all([(str(corrupt), str(corrupt)), (image_paths[0], image_paths[0]),
+                                ('broken.wav', b'RIFF')])
+    
+    assert 'error' in records[0] and records[0]['kind'] == 'image'
+    assert 'error' not in records[1]
+    assert 'error' in records[2] and records[2]['kind'] == 'audio'
+
+def test_collect_paths(tmp_path):
+    from scan import collect_paths
+    
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    for name in ('a/one.png', 'a/b/two.mp4', 'a/readme.txt', 'three.wav'):
+        (tmp_path / name).write_bytes(b'')
+    manifest = tmp_path / 'files.txt'
+    manifest.write_text("# listed files\nthree.wav\n\na/one.png\n")
+    
+    paths, skipped = collect_paths([str(tmp_path / 'a')], manifest=str(manifest))
+    assert paths == [str(tmp_path / name) for name in ('a/one.png', 'a/b/two.mp4', 'three.wav')]
+    assert skipped == 1
+
+def test_load_checkpoint_drops_a_partial_record(tmp_path):
+    from scan import load_checkpoint
+    
+    path = tmp_path / 'results.jsonl'
+    lines = [json.dumps({'name': 'a.png', 'result': 'real'}), json.dumps({'name': 'b.png', 'error': 'bad'})]
+    path.write_text('\n'.join(lines) + '\n{"name": "c.p')
+    
+    assert load_checkpoint(str(path)) == {'a.png', 'b.png'}
+    assert path.read_text() == '\n'.join(lines) + '\n'
+    assert load_checkpoint(str(path), retry_errors=True) == {'a.png'}
+    assert load_checkpoint(str(tmp_path / 'missing.jsonl')) == set()
+
+def test_batch_endpoint(api, image_paths):
+    client = api.app.test_client()
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        zf.write(image_paths[1], 'inner/second.jpg')
+        zf.writestr('inner/notes.txt', 'not media')
+    with open(image_paths[0], 'rb') as f:
+        first = f.read()
+    
+    response = client.post('/api/detect/batch', data={'file': [
+        (io.BytesIO(first), os.path.basename(image_paths[0])),
+        (io.BytesIO(archive.getvalue()), 'more.zip'),
+    ]}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [record['name'] for record in body['results']] == [
+        os.path.basename(image_paths[0]), 'inner/second.jpg', 'inner/notes.txt']
+    assert body['files'] == 3 and body['errors'] == 1
+    
+    assert client.post('/api/detect/batch', data={}).status_code == 400
+    bad_zip = {'file': (io.BytesIO(b'not a zip'), 'bad.zip')}
+    assert client.post('/api/detect/batch', data=bad_zip, content_type='multipart/form-data').status_code == 400
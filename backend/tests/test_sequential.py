@@ -0,0 +1,86 @@
+from models.video_detector import VideoDetector
+from utils.sequential import FakeRatioTest, coarse_to_fine
+
+def test_coarse_to_fine_covers_the_clip_early():
+    for n in (1, 2, 7, 16, 100):
+        order = coarse_to_fine(n)
+        assert sorted(order) == list(range(n))
+    
+    order = coarse_to_fine(100)
+    assert order[:2] == [0, 64]
+    # Any early prefix already reaches every quarter of the clip
+    assert {position * 4 // 100 for position in order[:8]} == {0, 1, 2, 3}
+
+def test_sprt_stops_on_a_clear_majority():
+    test = FakeRatioTest(min_frames=8)
+    for _ in range(7):
+        test.update(True)
+    # Not before min_frames, however one-sided
+    assert test.decision() == (None, None)
+    
+    while test.decision() == (None, None):
+        test.update(True)
+        assert test.scored < 30
+    assert test.decision() == (True, 'sprt')
+    
+    test = FakeRatioTest(min_frames=8)
+    while test.decision() == (None, None):
+        test.update(False)
+    assert test.decision() == (False, 'sprt')
+
+def test_bound_stops_once_the_rest_cannot_flip_the_verdict():
+    test = FakeRatioTest(threshold=0.5, total=10, min_frames=100)
+    for _ in range(4):
+        test.update(True)
+    assert test.decision() == (None, None)
+    test.update(True)
+    assert test.decision() == (True, 'bound')
+    
+    test = FakeRatioTest(threshold=0.5, total=10, min_frames=100)
+    for _ in range(5):
+        test.update(False)
+    assert test.decision() == (None, None)
+    test.update(False)
+    assert test.decision() == (False, 'bound')
+
+def fixed_verdicts(image_detector, monkeypatch, pattern):
+    """Make the image detector return frame verdicts cycling through pattern"""
+    verdicts = iter(pattern * 100)
+    
+    def detect_batch(batch, batch_size=32):
+        return [{'is_fake': fake, 'confidence': 0.9, 'raw_score': 0.9 if fake else 0.1}
+                for fake, _ in zip(verdicts, batch)]
+    monkeypatch.setattr(image_detector, 'detect_batch', detect_batch)
+
+def test_adaptive_stops_early(image_detector, video_path, monkeypatch):
+    fixed_verdicts(image_detector, monkeypatch, [True])
+    detector = VideoDetector(image_detector=image_detector, frames_per_second=5, adaptive_min_frames=4,
+                             adaptive_step=4)
+    result = detector.detect(video_path, adaptive=True)
+    
+    assert result['frames_available'] == 20
+    assert result['stop_reason'] == 'bound'
+    assert result['frames_scored'] == result['frames_analyzed'] == len(result['frame_analysis']) == 12
+    assert result['is_fake'] and result['fake_frame_ratio'] == 1.0
+
+def test_adaptive_stops_at_the_budget(image_detector, video_path, monkeypatch):
+    # Evenly split verdicts never settle before the budget is spent
+    fixed_verdicts(image_detector, monkeypatch, [True, False])
+    detector = VideoDetector(image_detector=image_detector, frames_per_second=5, adaptive_min_frames=4,
+                             adaptive_step=4, adaptive_max_frames=6)
+    result = detector.detect_adaptive(video_path)
+    
+    assert result['stop_reason'] == 'budget'
+    assert result['frames_scored'] == 6
+    assert result['frames_available'] == 20
+    assert {'is_fake', 'confidence', 'fake_frame_ratio', 'frame_analysis', 'timings'} <= result.keys()
+
+def test_adaptive_without_early_exit_matches_detect(video_detector, video_path):
+    result = video_detector.detect(video_path, adaptive=True)
+    expected = video_detector.detect(video_path)
+    
+    # Fewer sampled frames than adaptive_min_frames: all are scored, none skipped
+    assert result['stop_reason'] == 'exhausted'
+    assert result['frame_analysis'].keys() == expected['frame_analysis'].keys()
+    assert result['fake_frame_ratio'] == expected['fake_frame_ratio']
+    assert result['is_fake'] == expected['is_fake']
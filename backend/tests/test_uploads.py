@@ -0,0 +1,183 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from utils.batching import QueueFullError
+from utils.uploads import UploadAnalyzer, UploadError, UploadLimitError, UploadStore
+
+@pytest.fixture
+def store(tmp_path):
+    return UploadStore(str(tmp_path / 'uploads.sqlite3'), str(tmp_path / 'uploads'), max_size=100, quota=150,
+                       ttl=3600)
+
+def contents(upload):
+    with open(upload['path'], 'rb') as f:
+        return f.read()
+
+def test_retried_and_overlapping_chunks(store):
+    upload = store.create('video', 'clip.mkv', 10, {'windowed': True})
+    assert upload['status'] == 'receiving' and upload['received'] == 0 and upload['params'] == {'windowed': True}
+    
+    store.append(upload['id'], 0, b'abcd')
+    # A retry of the same chunk, then one overlapping what was received: only new bytes are written
+    store.append(upload['id'], 0, b'abcd')
+    upload = store.append(upload['id'], 2, b'cdef')
+    assert upload['received'] == 6
+    assert contents(upload) == b'abcdef'
+    
+    with pytest.raises(UploadError):
+        store.append(upload['id'], 7, b'h')
+    with pytest.raises(UploadError):
+        store.append(upload['id'], 6, b'ghijk')
+    upload = store.append(upload['id'], 6, b'ghij')
+    assert upload['received'] == 10 and contents(upload) == b'abcdefghij'
+    assert store.append('missing', 0, b'x') is None
+
+def test_size_and_quota_limits(store):
+    with pytest.raises(UploadLimitError):
+        store.create('video', 'clip.mkv', 101)
+    first = store.create('video', 'clip.mkv', 100)
+    with pytest.raises(UploadLimitError):
+        store.create('audio', 'talk.wav', 60)
+    assert store.stats()['reserved_bytes'] == 100
+    
+    # Aborting frees the reservation
+    assert store.delete(first['id'])
+    assert not os.path.exists(first['path'])
+    assert store.create('audio', 'talk.wav', 60)['size'] == 60
+    assert not store.delete(first['id'])
+
+def test_expire_deletes_idle_uploads(tmp_path):
+    store = UploadStore(str(tmp_path / 'uploads.sqlite3'), str(tmp_path / 'uploads'), max_size=100, quota=150,
+                        ttl=0.05)
+    upload = store.create('video', 'clip.mkv', 10)
+    store.expire()
+    assert store.get(upload['id']) is not None
+    
+    time.sleep(0.1)
+    store.expire()
+    assert store.get(upload['id']) is None
+    assert not os.path.exists(upload['path'])
+
+def test_stale_lease_cannot_write(store):
+    upload = store.create('audio', 'talk.wav', 4)
+    store.append(upload['id'], 0, b'RIFF')
+    stale = store.claim(upload['id'], lease=0.01)
+    assert store.claim(upload['id'], lease=60) is None
+    
+    time.sleep(0.05)
+    # The lease ran out and another worker claimed the upload
+    current = store.claim(upload['id'], lease=60)
+    assert current is not None
+    assert not store.release(upload['id'], stale['lease_until'], {'windows': {'0': 1}})
+    assert not store.finish(upload['id'], stale['lease_until'], {'is_fake': False})
+    assert not store.fail(upload['id'], stale['lease_until'], "error")
+    assert store.get(upload['id'])['status'] == 'receiving' and os.path.exists(upload['path'])
+    
+    assert store.release(upload['id'], current['lease_until'], {'windows': {'0': 1}})
+    assert store.get(upload['id'])['state'] == {'windows': {'0': 1}}
+    current = store.claim(upload['id'], lease=60)
+    assert store.finish(upload['id'], current['lease_until'], {'is_fake': False})
+    upload = store.get(upload['id'])
+    assert upload['status'] == 'done' and upload['result'] == {'is_fake': False}
+    assert not os.path.exists(upload['path'])
+
+def test_transient_errors_leave_the_upload_open(store):
+    upload = store.create('audio', 'talk.wav', 4)
+    store.append(upload['id'], 0, b'RIFF')
+    errors = [QueueFullError("Server busy"), ValueError("not audio")]
+    
+    def handler(upload, state, complete):
+        state['passes'] = state.get('passes', 0) + 1
+        raise errors.pop(0)
+    
+    analyzer = UploadAnalyzer(store, {'audio': handler})
+    with pytest.raises(QueueFullError):
+        analyzer.finalize(upload['id'])
+    # Released with its progress, so a retry can claim it again
+    upload = store.get(upload['id'])
+    assert upload['status'] == 'receiving' and upload['lease_until'] is None
+    assert upload['state'] == {'passes': 1}
+    
+    # A real decoding error is final
+    upload = analyzer.finalize(upload['id'])
+    assert upload['status'] == 'failed' and upload['error'] == 'not audio'
+
+class FullBatcher:
+    """Stands in for a MicroBatcher whose queue is full"""
+    
+    def predict(self, batch):
+        raise QueueFullError("Server busy, try again later")
+
+def upload(client, path, filename, **params):
+    """Send a whole file as one chunk; returns the upload id"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    response = client.post('/api/uploads', data={'filename': filename, 'size': len(data), **params})
+    upload_id = response.get_json()['upload_id']
+    response = client.patch(f"/api/uploads/{upload_id}?offset=0", data=data, content_type='application/octet-stream')
+    assert response.status_code == 200
+    return upload_id
+
+def test_uploads_bypass_the_request_batcher(api, audio_path, monkeypatch):
+    # With batching on, interactive requests may find the batcher full; uploads never use it
+    monkeypatch.setattr(api.audio_detector, 'batcher', FullBatcher())
+    client = api.app.test_client()
+    for windowed in ('true', 'false'):
+        upload_id = upload(client, audio_path, 'speech.wav', windowed=windowed)
+        response = client.post(f"/api/uploads/{upload_id}/finalize")
+        assert response.status_code == 200 and response.get_json()['status'] == 'done'
+
+def test_busy_finalize_can_be_retried(api, audio_path, monkeypatch):
+    client = api.app.test_client()
+    upload_id = upload(client, audio_path, 'speech.wav')
+    
+    monkeypatch.setattr(api.job_audio_detector, 'batcher', FullBatcher())
+    response = client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 503
+    assert client.get(f"/api/uploads/{upload_id}").get_json()['status'] == 'receiving'
+    
+    monkeypatch.setattr(api.job_audio_detector, 'batcher', None)
+    response = client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 200 and response.get_json()['status'] == 'done'
+
+def test_chunked_upload_endpoints(api, audio_path):
+    client = api.app.test_client()
+    with open(audio_path, 'rb') as f:
+        data = f.read()
+    
+    assert client.post('/api/uploads', data={'filename': 'notes.txt', 'size': 10}).status_code == 400
+    response = client.post('/api/uploads', data={'filename': 'speech.wav', 'size': len(data)})
+    assert response.status_code == 201
+    upload_id = response.get_json()['upload_id']
+    
+    def patch(offset, chunk):
+        return client.patch(f"/api/uploads/{upload_id}?offset={offset}", data=chunk,
+                            content_type='application/octet-stream')
+    
+    chunk_size = 100_000
+    for offset in range(0, len(data), chunk_size):
+        assert patch(offset, data[offset:offset + chunk_size]).status_code == 200
+        if offset == 0:
+            # Retried chunk, then a gap: the server answers with the offset to resume from
+            assert patch(0, data[:chunk_size]).get_json()['offset'] == chunk_size
+            response = patch(chunk_size + 1, data[chunk_size + 1:chunk_size + 10])
+            assert response.status_code == 409 and response.get_json()['offset'] == chunk_size
+            assert client.post(f"/api/uploads/{upload_id}/finalize").status_code == 409
+    assert client.get(f"/api/uploads/{upload_id}").get_json()['offset'] == len(data)
+    
+    response = client.post(f"/api/uploads/{upload_id}/finalize")
+    assert response.status_code == 200
+    result = response.get_json()
+    assert result['status'] == 'done'
+    
+    # The same verdict as scoring the whole file at once
+    windowed = api.audio_detector.with_settings(max_windows=None)
+    expected = windowed.detect(audio_path, windowed=True)
+    assert result['result'] == ('fake' if expected['is_fake'] else 'real')
+    assert np.isclose(result['confidence'], expected['confidence'], atol=1e-4)
+    # Retried finalize returns the recorded result
+    assert client.post(f"/api/uploads/{upload_id}/finalize").get_json()['confidence'] == result['confidence']
+    assert client.get('/api/uploads/missing').status_code == 404
@@ -1 +1,36 @@
-ECHO is off.
+import numpy as np
+
+from utils.memory_files import memory_file
+
+def test_iter_batches_streams_every_sampled_frame(video_detector, video_path):
+    expected = video_detector._sampler().expected_frames(video_path)
+    batches = list(video_detector.iter_batches(video_path))
+    
+    assert expected == 4
+    assert sum(len(batch) for batch in batches) == expected
+    assert all(len(batch) <= video_detector.batch_size for batch in batches)
+    assert batches[0].shape[1:] == video_detector.image_detector.img_size + (3,)
+
+def test_detect_aggregates_frame_scores(video_detector, video_path):
+    result = video_detector.detect(video_path)
+    frames = np.concatenate(list(video_detector.iter_batches(video_path)))
+    scores = video_detector.image_detector.detect_batch(frames)
+    
+    assert result['frames_analyzed'] == len(scores) == len(result['frame_analysis'])
+    assert np.isclose(result['confidence'], np.mean([s['confidence'] for s in scores]), atol=1e-5)
+    assert result['fake_frame_ratio'] == np.mean([s['is_fake'] for s in scores])
+
+def test_detect_bytes_matches_detect(video_detector, video_path):
+    with open(video_path, 'rb') as f:
+        result = video_detector.detect_bytes(f.read(), suffix='.mp4')
+    expected = video_detector.detect(video_path)
+    
+    assert result['frames_analyzed'] == expected['frames_analyzed']
+    assert np.isclose(result['confidence'], expected['confidence'], atol=1e-6)
+    for name, frame in expected['frame_analysis'].items():
+        assert np.isclose(result['frame_analysis'][name]['confidence'], frame['confidence'], atol=1e-6)
+
+def test_memory_file_is_a_readable_path():
+    with memory_file(b'frame data', suffix='.mp4') as path:
+        with open(path, 'rb') as f:
+            assert f.read() == b'frame data'
@@ -0,0 +1,153 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+class QueueFullError(Exception):
+    """Raised when the batching queue is at capacity and the request must be rejected"""
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5, max_queue_size=256, on_batch=None):
+        """
+        Coalesce concurrent inference requests into batched forward passes
+        
+        Requests are queued and flushed as one batch once max_batch_size rows are
+        waiting or the oldest request has waited max_wait_ms, whichever comes first.
+        
+        Args:
+            predict_fn (callable): Runs the model on a stacked batch and returns one output row per input row
+            max_batch_size (int): Number of rows that triggers an immediate flush
+            max_wait_ms (float): Longest time the first queued request waits for company
+            max_queue_size (int): Pending requests allowed before submit() rejects new ones
+            on_batch (callable, optional): Called with the row count after every forward pass
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_queue_size = max_queue_size
+        self.on_batch = on_batch
+        
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        
+        self.batches_run = 0
+        self.rows_run = 0
+    
+    def submit(self, batch):
+        """
+        Queue a batch of rows for inference
+        
+        Args:
+            batch (numpy.ndarray): Model input with a leading batch dimension
+            
+        Returns:
+            concurrent.futures.Future: Resolves to the output rows for this batch
+            
+        Raises:
+            QueueFullError: If max_queue_size requests are already waiting
+        """
+        self._ensure_worker()
+        future = Future()
+        try:
+            self._queue.put_nowait((batch, future))
+        except queue.Full:
+            raise QueueFullError("Server is busy, inference queue is full")
+        return future
+    
+    def predict(self, batch, timeout=None):
+        """
+        Queue a batch and block until its outputs are ready
+        
+        Args:
+            batch (numpy.ndarray): Model input with a leading batch dimension
+            timeout (float, optional): Seconds to wait for the result
+            
+        Returns:
+            numpy.ndarray: Output rows for this batch
+        """
+        return self.submit(batch).result(timeout)
+    
+    def stats(self):
+        """
+        Report queue depth and achieved batch sizes
+        
+        Returns:
+            dict: Scheduler counters
+        """
+        return {
+            'queue_depth': self._queue.qsize(),
+            'batches_run': self.batches_run,
+            'rows_run': self.rows_run,
+            'mean_batch_size': self.rows_run / self.batches_run if self.batches_run else 0.0
+        }
+    
+    def _ensure_worker(self):
+        """
+        Start the scheduler thread, once per process (it does not survive a fork)
+        """
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+    
+    def _run(self):
+        """
+        Scheduler loop: gather requests until the batch is full or the wait expires
+        """
+        while True:
+            items = [self._queue.get()]
+            rows = len(items[0][0])
+            deadline = time.monotonic() + self.max_wait_ms / 1000.0
+            
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                items.append(item)
+                rows += len(item[0])
+            
+            self._run_batch(items, rows)
+    
+    def _run_batch(self, items, rows):
+        """
+        Run one forward pass and fan the outputs back to the waiting requests
+        
+        Args:
+            items (list): (batch, future) pairs in arrival order
+            rows (int): Total rows across all items
+        """
+        try:
+            if len(items) == 1:
+                batch = items[0][0]
+            else:
+                batch = np.concatenate([batch for batch, _ in items])
+            outputs = self.predict_fn(batch)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        
+        self.batches_run += 1
+        self.rows_run += rows
+        
+        offset = 0
+        for batch, future in items:
+            future.set_result(outputs[offset:offset + len(batch)])
+            offset += len(batch)
+        
+        if self.on_batch is not None:
+            self.on_batch(rows)
@@ -0,0 +1,156 @@
+import fcntl
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+class EmbeddingStore:
+    def __init__(self, folder, dim=1280):
+        """
+        Append-only store of float16 embeddings, indexed by content hash and frame timestamp
+        
+        Rows live in one raw float16 file that is read through a memory map, so
+        scanning the whole store streams it from disk without loading it; a SQLite
+        index maps (content hash, timestamp) to a row. Any number of processes may
+        write: appends are serialized with a file lock. Storing a file again appends
+        new rows and repoints its index entries; the old rows are left unused.
+        
+        Args:
+            folder (str): Directory holding embeddings.f16 and index.sqlite3
+            dim (int): Embedding size
+        """
+        self.folder = folder
+        self.dim = dim
+        self.row_bytes = dim * np.dtype(np.float16).itemsize
+        self.data_path = os.path.join(folder, 'embeddings.f16')
+        self.index_path = os.path.join(folder, 'index.sqlite3')
+        os.makedirs(folder, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        # The SQLite connection and memory map are opened lazily so they are never shared across a fork
+        self._conn = None
+        self._pid = None
+        self._map = None
+    
+    def put(self, content_hash, timestamps, embeddings, kind='image'):
+        """
+        Store the embeddings of one media file
+        
+        Args:
+            content_hash (str): SHA-256 of the file, e.g. from utils.result_cache.hash_stream
+            timestamps (list): Frame timestamps in seconds (one 0.0 for an image)
+            embeddings (numpy.ndarray): Shape (len(timestamps), dim); stored as float16
+            kind (str): 'image' or 'video', so re-scoring knows how to aggregate the rows
+        """
+        rows = np.ascontiguousarray(embeddings, dtype=np.float16).reshape(-1, self.dim)
+        if len(rows) != len(timestamps):
+            raise ValueError(f"Got {len(timestamps)} timestamps for {len(rows)} embeddings")
+        
+        with self._lock:
+            conn = self._connection()
+            with open(self.data_path, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    # Rows written by a crashed writer may leave a partial row at the end; skip past it
+                    f.seek(0, os.SEEK_END)
+                    size = f.tell()
+                    first = -(-size // self.row_bytes)
+                    f.write(b'\0' * (first * self.row_bytes - size) + rows.tobytes())
+                    f.flush()
+                    with conn:
+                        conn.execute('DELETE FROM embeddings WHERE content_hash = ?', (content_hash,))
+                        conn.executemany(
+                            'INSERT INTO embeddings (content_hash, timestamp, kind, row) VALUES (?, ?, ?, ?)',
+                            [(content_hash, float(t), kind, first + i) for i, t in enumerate(timestamps)]
+                        )
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    
+    def get(self, content_hash):
+        """
+        Embeddings of one media file, in timestamp order
+        
+        Returns:
+            tuple: (kind or None, timestamps of shape (n,), float16 embeddings of shape (n, dim)); n is 0 if unknown
+        """
+        with self._lock:
+            entries = self._connection().execute(
+                'SELECT kind, timestamp, row FROM embeddings WHERE content_hash = ? ORDER BY timestamp',
+                (content_hash,)
+            ).fetchall()
+            if not entries:
+                return None, np.zeros(0), np.zeros((0, self.dim), dtype=np.float16)
+            rows = np.array([row for _, _, row in entries])
+            embeddings = np.array(self._rows(rows.max() + 1)[rows])
+        return entries[0][0], np.array([t for _, t, _ in entries]), embeddings
+    
+    def __contains__(self, content_hash):
+        with self._lock:
+            return self._connection().execute(
+                'SELECT 1 FROM embeddings WHERE content_hash = ? LIMIT 1', (content_hash,)
+            ).fetchone() is not None
+    
+    def stats(self):
+        """
+        Report stored media, rows and file size
+        """
+        with self._lock:
+            media, rows = self._connection().execute(
+                'SELECT COUNT(DISTINCT content_hash), COUNT(*) FROM embeddings'
+            ).fetchone()
+        size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        return {'media': media, 'embeddings': rows, 'dim': self.dim, 'bytes': size}
+    
+    def iter_batches(self, batch_rows=65536):
+        """
+        Stream every indexed embedding in file order, for re-scoring the whole store
+        
+        Each batch is one sequential read of the memory map.
+        
+        Args:
+            batch_rows (int): Embeddings per batch
+            
+        Yields:
+            tuple: (list of (content_hash, timestamp, kind), float16 embeddings of shape (n, dim))
+        """
+        with self._lock:
+            cursor = self._connection().cursor()
+            cursor.execute('SELECT content_hash, timestamp, kind, row FROM embeddings ORDER BY row')
+        while True:
+            with self._lock:
+                entries = cursor.fetchmany(batch_rows)
+            if not entries:
+                return
+            rows = np.array([entry[3] for entry in entries])
+            with self._lock:
+                chunk = np.array(self._rows(rows[-1] + 1)[rows[0]:rows[-1] + 1])
+            yield [entry[:3] for entry in entries], chunk[rows - rows[0]]
+    
+    def _rows(self, needed):
+        """
+        Memory map over the data file, reopened when it has grown past needed rows (lock held)
+        """
+        if self._map is None or len(self._map) < needed:
+            n = os.path.getsize(self.data_path) // self.row_bytes
+            self._map = np.memmap(self.data_path, dtype=np.float16, mode='r', shape=(n, self.dim))
+        return self._map
+    
+    def _connection(self):
+        """
+        This process's connection to the index (lock held)
+        """
+        if self._pid != os.getpid():
+            self._conn = None
+            self._map = None
+            self._pid = os.getpid()
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS embeddings ('
+                ' content_hash TEXT NOT NULL, timestamp REAL NOT NULL, kind TEXT NOT NULL, row INTEGER NOT NULL,'
+                ' PRIMARY KEY (content_hash, timestamp))'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS embeddings_row ON embeddings (row)')
+        return self._conn
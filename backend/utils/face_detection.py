@@ -0,0 +1,245 @@
+import os
+import threading
+
+import numpy as np
+import cv2
+
+# Face detectors bundled with opencv-python (cv2.data.haarcascades); no downloads needed
+CASCADES = (
+    'haarcascade_frontalface_default.xml',
+    'haarcascade_frontalface_alt.xml',
+    'haarcascade_frontalface_alt2.xml',
+    'haarcascade_profileface.xml',
+)
+
+class FaceLocator:
+    def __init__(self, cascade='haarcascade_frontalface_default.xml', detect_width=640, scale_factor=1.1,
+                 min_neighbors=5, min_face_size=40, margin=0.3, max_faces=4):
+        """
+        Find faces with one of OpenCV's bundled Haar cascades
+        
+        Detection runs on a grayscale copy downscaled to detect_width, so its
+        cost does not grow with the source resolution. Boxes are reported in
+        source pixel coordinates.
+        
+        Args:
+            cascade (str): One of CASCADES
+            detect_width (int): Width frames are downscaled to before detection
+            scale_factor (float): Cascade image pyramid step
+            min_neighbors (int): Overlapping hits needed to keep a detection
+            min_face_size (int): Smallest face, in source pixels
+            margin (float): Fraction of the face size added on every side when cropping
+            max_faces (int): Largest faces kept per frame
+        """
+        if cascade not in CASCADES:
+            raise ValueError(f"Unknown face cascade: {cascade}")
+        
+        self.cascade_name = cascade
+        self.detect_width = detect_width
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_face_size = min_face_size
+        self.margin = margin
+        self.max_faces = max_faces
+        
+        # CascadeClassifier is not safe to share between threads
+        self._local = threading.local()
+    
+    @property
+    def cascade(self):
+        """
+        This thread's cascade classifier, loaded on first use
+        """
+        cascade = getattr(self._local, 'cascade', None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, self.cascade_name))
+            if cascade.empty():
+                raise ValueError(f"Could not load face cascade: {self.cascade_name}")
+            self._local.cascade = cascade
+        return cascade
+    
+    def prepare(self, img, rgb=False):
+        """
+        Downscaled, equalized grayscale copy used for detection and tracking
+        
+        Args:
+            img (numpy.ndarray): Colour image of shape (height, width, 3), uint8
+            rgb (bool): img is RGB rather than OpenCV's BGR
+            
+        Returns:
+            tuple: (grayscale image, scale from source to grayscale coordinates)
+        """
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+        scale = min(1.0, self.detect_width / gray.shape[1])
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return cv2.equalizeHist(gray), scale
+    
+    def detect_prepared(self, gray, scale):
+        """
+        Detect faces in an image from prepare()
+        
+        Returns:
+            list: (x, y, w, h) boxes in grayscale coordinates, largest first
+        """
+        min_size = max(8, int(self.min_face_size * scale))
+        boxes = self.cascade.detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors, minSize=(min_size, min_size)
+        )
+        boxes = sorted((tuple(int(v) for v in box) for box in boxes), key=lambda b: b[2] * b[3], reverse=True)
+        return boxes[:self.max_faces]
+    
+    def locate(self, img, rgb=False):
+        """
+        Detect faces in a full-resolution image
+        
+        Args:
+            img (numpy.ndarray): Colour image of shape (height, width, 3), uint8
+            rgb (bool): img is RGB rather than OpenCV's BGR
+            
+        Returns:
+            list: (x, y, w, h) boxes in source pixels, largest first
+        """
+        gray, scale = self.prepare(img, rgb=rgb)
+        return [to_source(box, scale) for box in self.detect_prepared(gray, scale)]
+    
+    def crop(self, img, box):
+        """
+        Square crop around a face, widened by margin and clipped to the image
+        
+        Args:
+            img (numpy.ndarray): Image of shape (height, width, 3)
+            box (tuple): (x, y, w, h) in source pixels
+            
+        Returns:
+            numpy.ndarray: Crop view into img
+        """
+        x, y, w, h = box
+        size = int(max(w, h) * (1 + 2 * self.margin))
+        cx, cy = x + w // 2, y + h // 2
+        height, width = img.shape[:2]
+        x0 = max(0, cx - size // 2)
+        y0 = max(0, cy - size // 2)
+        x1 = min(width, x0 + size)
+        y1 = min(height, y0 + size)
+        return img[y0:y1, x0:x1]
+
+class FaceTracker:
+    def __init__(self, locator, redetect_every=5, min_match=0.5, search_scale=1.0):
+        """
+        Follow faces across sampled video frames, running the cascade only every few frames
+        
+        Between detections each face is re-found by template matching in a
+        window around its last position. When a face's match drops below
+        min_match, the cascade runs again on that frame. Frames without any
+        tracked face are always re-detected.
+        
+        Args:
+            locator (FaceLocator): Detector and cropping settings
+            redetect_every (int): Sampled frames between full detections
+            min_match (float): Lowest normalized correlation to keep a track
+            search_scale (float): Search margin around the last box, as a fraction of its size
+        """
+        self.locator = locator
+        self.redetect_every = redetect_every
+        self.min_match = min_match
+        self.search_scale = search_scale
+        
+        self.tracks = []  # dicts with id, box (grayscale coordinates) and template
+        self.next_id = 0
+        self.frames_since_detection = None
+        self.detections = 0
+    
+    def update(self, frame):
+        """
+        Locate faces in the next sampled frame
+        
+        Args:
+            frame (numpy.ndarray): BGR frame, uint8
+            
+        Returns:
+            list: (track_id, (x, y, w, h) in source pixels) per face
+        """
+        gray, scale = self.locator.prepare(frame)
+        
+        if (not self.tracks or self.frames_since_detection is None
+                or self.frames_since_detection + 1 >= self.redetect_every):
+            self._detect(gray, scale)
+        else:
+            followed = self._follow(gray)
+            if len(followed) < len(self.tracks):
+                # A face was lost; detect again now rather than scoring the frame without it
+                self._detect(gray, scale)
+            else:
+                self.tracks = followed
+                self.frames_since_detection += 1
+        
+        return [(track['id'], to_source(track['box'], scale)) for track in self.tracks]
+    
+    def _detect(self, gray, scale):
+        """
+        Run the cascade and match its detections to existing tracks by overlap, keeping track ids stable
+        """
+        self.detections += 1
+        self.frames_since_detection = 0
+        boxes = self.locator.detect_prepared(gray, scale)
+        
+        tracks = []
+        unmatched = list(self.tracks)
+        for box in boxes:
+            best = max(unmatched, key=lambda track: iou(track['box'], box), default=None)
+            if best is not None and iou(best['box'], box) >= 0.3:
+                unmatched.remove(best)
+                track_id = best['id']
+            else:
+                track_id = self.next_id
+                self.next_id += 1
+            tracks.append({'id': track_id, 'box': box, 'template': template(gray, box)})
+        self.tracks = tracks
+    
+    def _follow(self, gray):
+        """
+        Move every track to its best template match near its last position
+        
+        Returns:
+            list: Tracks that were found again
+        """
+        height, width = gray.shape
+        tracks = []
+        for track in self.tracks:
+            x, y, w, h = track['box']
+            pad_x, pad_y = int(w * self.search_scale), int(h * self.search_scale)
+            x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+            x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+            window = gray[y0:y1, x0:x1]
+            if window.shape[0] < h or window.shape[1] < w:
+                continue
+            
+            scores = cv2.matchTemplate(window, track['template'], cv2.TM_CCOEFF_NORMED)
+            _, best, _, (dx, dy) = cv2.minMaxLoc(scores)
+            if best < self.min_match:
+                continue
+            
+            box = (x0 + dx, y0 + dy, w, h)
+            tracks.append({'id': track['id'], 'box': box, 'template': template(gray, box)})
+        return tracks
+
+def to_source(box, scale):
+    """
+    Map an (x, y, w, h) box from detection coordinates back to source pixels
+    """
+    return tuple(int(round(v / scale)) for v in box)
+
+def template(gray, box):
+    x, y, w, h = box
+    return np.ascontiguousarray(gray[y:y + h, x:x + w])
+
+def iou(a, b):
+    """
+    Intersection over union of two (x, y, w, h) boxes
+    """
+    ix = max(0, min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1]))
+    intersection = ix * iy
+    union = a[2] * a[3] + b[2] * b[3] - intersection
+    return intersection / union if union else 0.0
@@ -0,0 +1,48 @@
+import numpy as np
+import cv2
+
+# Per-frame batch entry for a frame that reuses the previous scored frame's result
+REUSED = 'reused'
+
+class FrameDeduplicator:
+    def __init__(self, threshold=0.02, size=16):
+        """
+        Skip sampled frames that are near-identical to the last scored frame
+        
+        Each frame is reduced to a size x size grayscale thumbnail; a frame is a
+        duplicate when the mean absolute difference between its thumbnail and
+        the last scored frame's (scaled to 0-1) is at most threshold. Frames are
+        always compared with the last *scored* frame, never the last duplicate,
+        so a slow drift is eventually scored again.
+        
+        Args:
+            threshold (float): Largest mean thumbnail difference still treated as the same frame
+            size (int): Thumbnail width and height in pixels
+        """
+        self.threshold = threshold
+        self.size = size
+        self.reference = None
+    
+    def signature(self, frame):
+        """
+        Downscaled grayscale thumbnail of a BGR frame, as float32 in [0, 1]
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (self.size, self.size), interpolation=cv2.INTER_AREA)
+        return small.astype(np.float32) / 255.0
+    
+    def is_duplicate(self, frame):
+        """
+        Check the next sampled frame; frames that are not duplicates become the new reference
+        
+        Args:
+            frame (numpy.ndarray): BGR frame, uint8
+            
+        Returns:
+            bool: True if the frame can reuse the last scored frame's result
+        """
+        signature = self.signature(frame)
+        if self.reference is not None and float(np.mean(np.abs(signature - self.reference))) <= self.threshold:
+            return True
+        self.reference = signature
+        return False
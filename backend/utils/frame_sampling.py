@@ -0,0 +1,283 @@
+import numpy as np
+import cv2
+
+# Available sampling strategies
+#   read:     decode every frame and keep the sampled ones (original behaviour)
+#   grab:     grab every frame but only decode (retrieve) the sampled ones
+#   seek:     jump straight to each sample timestamp via CAP_PROP_POS_MSEC
+#   keyframe: only decode keyframes, found by scanning packets without decoding
+STRATEGIES = ('read', 'grab', 'seek', 'keyframe')
+
+class FrameSampler:
+    def __init__(self, frames_per_second=1, max_frames=None, strategy='grab'):
+        """
+        Initialize the FrameSampler
+        
+        Args:
+            frames_per_second (float): Number of frames to sample per second of video
+            max_frames (int, optional): Cap on sampled frames per video. When the
+                video would yield more, frames are spread uniformly over the clip.
+            strategy (str): One of STRATEGIES
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown sampling strategy: {strategy}")
+        
+        self.frames_per_second = frames_per_second
+        self.max_frames = max_frames
+        self.strategy = strategy
+    
+    def frame_interval(self, fps):
+        """
+        Number of source frames between two sampled frames
+        
+        Args:
+            fps (float): Frame rate reported by the container
+            
+        Returns:
+            int: Sampling interval, at least 1
+        """
+        frame_interval = int(fps / self.frames_per_second)
+        if frame_interval < 1:
+            frame_interval = 1
+        return frame_interval
+    
+    def plan(self, fps, total_frames):
+        """
+        Choose which frame numbers to sample
+        
+        Args:
+            fps (float): Frame rate reported by the container
+            total_frames (int): Frame count reported by the container, <= 0 if unknown
+            
+        Returns:
+            list: Sorted frame numbers, or None if the frame count is unknown
+        """
+        if total_frames <= 0:
+            return None
+        
+        indices = list(range(0, total_frames, self.frame_interval(fps)))
+        if self.max_frames and len(indices) > self.max_frames:
+            spread = np.linspace(0, total_frames - 1, self.max_frames)
+            indices = sorted(set(int(round(i)) for i in spread))
+        
+        return indices
+    
+    def expected_frames(self, video_path):
+        """
+        Number of frames sample() is expected to yield, from container metadata only
+        
+        The keyframe strategy may yield fewer frames than planned.
+        
+        Args:
+            video_path (str): Path to the video file
+            
+        Returns:
+            int: Planned frame count, or None if the container does not report one
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None
+        try:
+            indices = self.plan(cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        finally:
+            cap.release()
+        return len(indices) if indices is not None else None
+    
+    def sample(self, video_path):
+        """
+        Decode the sampled frames of a video
+        
+        Args:
+            video_path (str): Path to the video file
+            
+        Yields:
+            tuple: (frame_number, BGR frame as numpy.ndarray)
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            indices = self.plan(fps, total_frames)
+            
+            if self.strategy == 'keyframe' and indices is not None:
+                keyframes = self._keyframe_plan(video_path, fps, total_frames)
+                if keyframes:
+                    yield from self._seek(cap, fps, keyframes)
+                    return
+                # No keyframe information available; fall back to grab
+                yield from self._sequential(cap, fps, indices, decode_all=False)
+            elif self.strategy == 'seek' and indices is not None and fps > 0:
+                yield from self._seek(cap, fps, indices)
+            else:
+                # Seeking needs a known frame count and rate; otherwise scan sequentially
+                decode_all = self.strategy == 'read'
+                yield from self._sequential(cap, fps, indices, decode_all=decode_all)
+        finally:
+            cap.release()
+    
+    def video_plan(self, video_path):
+        """
+        Frame numbers sample() would decode for this video, for splitting across workers
+        
+        Args:
+            video_path (str): Path to the video file
+            
+        Returns:
+            list: Sorted frame numbers, or None if they can only be found by scanning sequentially
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            cap.release()
+        
+        indices = self.plan(fps, total_frames)
+        if self.strategy == 'keyframe' and indices is not None:
+            indices = self._keyframe_plan(video_path, fps, total_frames) or indices
+        return indices
+    
+    def sample_indices(self, video_path, indices):
+        """
+        Decode a sorted run of planned frames, e.g. one chunk of plan() handled by a pool worker
+        
+        The seek and keyframe strategies seek to every frame; the others seek
+        once to the first frame and walk forward from there.
+        
+        Args:
+            video_path (str): Path to the video file
+            indices (list): Sorted frame numbers from plan()
+            
+        Yields:
+            tuple: (frame_number, BGR frame as numpy.ndarray)
+        """
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video file: {video_path}")
+        
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            if self.strategy in ('seek', 'keyframe') and fps > 0:
+                yield from self._seek(cap, fps, indices)
+                return
+            
+            first = indices[0]
+            if first > 0:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+            for frame_count, frame in self._sequential(cap, fps, [i - first for i in indices],
+                                                       decode_all=self.strategy == 'read'):
+                yield frame_count + first, frame
+        finally:
+            cap.release()
+    
+    def _sequential(self, cap, fps, indices, decode_all):
+        """
+        Walk the stream frame by frame, decoding only what is needed
+        
+        Args:
+            cap (cv2.VideoCapture): Open capture positioned at the first frame
+            fps (float): Frame rate reported by the container
+            indices (list): Planned frame numbers, or None to sample by interval
+            decode_all (bool): Decode every frame with read() instead of grab()
+            
+        Yields:
+            tuple: (frame_number, BGR frame)
+        """
+        frame_interval = self.frame_interval(fps)
+        targets = set(indices) if indices is not None else None
+        last_target = indices[-1] if indices else None
+        sampled = 0
+        frame_count = 0
+        
+        while True:
+            if decode_all:
+                ret, frame = cap.read()
+            else:
+                ret = cap.grab()
+            if not ret:
+                break
+            
+            if targets is not None:
+                wanted = frame_count in targets
+            else:
+                wanted = frame_count % frame_interval == 0
+            
+            if wanted:
+                if not decode_all:
+                    ret, frame = cap.retrieve()
+                if ret:
+                    yield frame_count, frame
+                    sampled += 1
+            
+            # Stop once nothing else is wanted from the rest of the stream
+            if last_target is not None and frame_count >= last_target:
+                break
+            if targets is None and self.max_frames and sampled >= self.max_frames:
+                break
+            
+            frame_count += 1
+    
+    def _seek(self, cap, fps, indices):
+        """
+        Seek to each planned frame by timestamp and decode only that frame
+        
+        Args:
+            cap (cv2.VideoCapture): Open capture
+            fps (float): Frame rate reported by the container
+            indices (list): Frame numbers to decode
+            
+        Yields:
+            tuple: (frame_number, BGR frame)
+        """
+        for index in indices:
+            cap.set(cv2.CAP_PROP_POS_MSEC, index * 1000.0 / fps)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield index, frame
+    
+    def _keyframe_plan(self, video_path, fps, total_frames):
+        """
+        Find keyframes by scanning compressed packets without decoding them
+        
+        Keyframes closer together than the sampling interval are skipped, and
+        the result respects max_frames.
+        
+        Args:
+            video_path (str): Path to the video file
+            fps (float): Frame rate reported by the container
+            total_frames (int): Frame count reported by the container
+            
+        Returns:
+            list: Keyframe numbers to decode, empty if they cannot be determined
+        """
+        # Needs the FFmpeg backend and OpenCV >= 4.7
+        if not hasattr(cv2, 'CAP_PROP_LRF_HAS_KEY_FRAME') or fps <= 0:
+            return []
+        
+        raw = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+        if not raw.isOpened():
+            return []
+        
+        keyframes = []
+        try:
+            frame_interval = self.frame_interval(fps)
+            frame_count = 0
+            while raw.grab():
+                if raw.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                    if not keyframes or frame_count - keyframes[-1] >= frame_interval:
+                        keyframes.append(frame_count)
+                frame_count += 1
+        finally:
+            raw.release()
+        
+        if self.max_frames and len(keyframes) > self.max_frames:
+            picks = np.linspace(0, len(keyframes) - 1, self.max_frames)
+            keyframes = [keyframes[i] for i in sorted(set(int(round(p)) for p in picks))]
+        
+        return keyframes
@@ -0,0 +1,321 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+# Job lifecycle: queued -> running -> done | failed
+# Running jobs whose heartbeat goes stale (e.g. the worker restarted) are queued again.
+# Every claim bumps the job's attempt number; progress and outcomes are only recorded while
+# the worker's attempt is still the current one, so a requeued job has a single owner.
+STATUSES = ('queued', 'running', 'done', 'failed')
+
+class JobStore:
+    def __init__(self, db_path):
+        """
+        Persistent job queue and progress store backed by SQLite
+        
+        Safe to share between threads and between worker processes on one host.
+        
+        Args:
+            db_path (str): SQLite database file
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+    
+    def create(self, kind, media_path, params=None):
+        """
+        Queue a new job
+        
+        Args:
+            kind (str): Job type, e.g. 'video'
+            media_path (str): Uploaded media, kept on disk until the job finishes
+            params (dict, optional): Extra parameters for the job handler
+            
+        Returns:
+            str: Job id
+        """
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self._execute(
+            'INSERT INTO jobs (id, kind, status, media_path, params, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, 'queued', media_path, json.dumps(params or {}), now, now)
+        )
+        return job_id
+    
+    def claim_next(self):
+        """
+        Atomically move the oldest queued job to running
+        
+        Returns:
+            dict or None: The claimed job, with the attempt number that identifies this claim
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', attempt = attempt + 1, updated_at = ? WHERE id = ?",
+                        (time.time(), row[0])
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return self.get(row[0]) if row is not None else None
+    
+    def requeue_stale(self, max_age):
+        """
+        Queue running jobs again if they have not reported progress for max_age seconds
+        
+        Frames already recorded are discarded, since the job restarts from the beginning.
+        
+        Args:
+            max_age (float): Heartbeat age in seconds after which a job counts as abandoned
+        """
+        cutoff = time.time() - max_age
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                stale = [row[0] for row in conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'running' AND updated_at < ?", (cutoff,)
+                )]
+                for job_id in stale:
+                    conn.execute('DELETE FROM job_frames WHERE job_id = ?', (job_id,))
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', frames_done = 0, updated_at = ? WHERE id = ?",
+                        (time.time(), job_id)
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+    
+    def heartbeat(self, job_id, attempt):
+        """
+        Mark a running job as alive
+        
+        Returns:
+            bool: False if the attempt no longer owns the job
+        """
+        return self._update_owned(job_id, attempt, 'updated_at = ?', (time.time(),))
+    
+    def set_total(self, job_id, attempt, frames_total):
+        return self._update_owned(
+            job_id, attempt, 'frames_total = ?, updated_at = ?', (frames_total, time.time())
+        )
+    
+    def add_frames(self, job_id, attempt, frame_results, frames_done):
+        """
+        Record newly scored frames and update progress (also the job's heartbeat)
+        
+        Args:
+            job_id (str): Job id
+            attempt (int): Attempt number of the claim doing the work
+            frame_results (dict): Frame name -> frame result, in scoring order
+            frames_done (int): Frames scored so far
+            
+        Returns:
+            bool: False (and nothing recorded) if the attempt no longer owns the job
+        """
+        with self._lock:
+            conn = self._connection()
+            # The ownership check and the inserts commit together
+            owned = conn.execute(
+                "UPDATE jobs SET frames_done = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND attempt = ?",
+                (frames_done, time.time(), job_id, attempt)
+            ).rowcount == 1
+            if owned:
+                conn.executemany(
+                    'INSERT INTO job_frames (job_id, name, data) VALUES (?, ?, ?)',
+                    [(job_id, name, json.dumps(data)) for name, data in frame_results.items()]
+                )
+            conn.commit()
+        return owned
+    
+    def finish(self, job_id, attempt, result):
+        return self._update_owned(
+            job_id, attempt, "status = 'done', result = ?, updated_at = ?", (json.dumps(result), time.time())
+        )
+    
+    def fail(self, job_id, attempt, error):
+        return self._update_owned(
+            job_id, attempt, "status = 'failed', error = ?, updated_at = ?", (error, time.time())
+        )
+    
+    def get(self, job_id):
+        """
+        Look up a job
+        
+        Returns:
+            dict or None: Job fields, with params and result decoded
+        """
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            job = dict(zip([column[0] for column in cursor.description], row))
+        
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+    
+    def frames(self, job_id, start=0):
+        """
+        Frames recorded for a job, in scoring order
+        
+        Args:
+            job_id (str): Job id
+            start (int): Number of frames to skip (for incremental reads)
+            
+        Returns:
+            list: (frame name, frame result) pairs
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT name, data FROM job_frames WHERE job_id = ? ORDER BY seq LIMIT -1 OFFSET ?',
+                (job_id, start)
+            ).fetchall()
+        return [(name, json.loads(data)) for name, data in rows]
+    
+    def _update_owned(self, job_id, attempt, assignments, params):
+        """
+        Update a job only while the given attempt is running it
+        
+        Returns:
+            bool: Whether the row was updated
+        """
+        return self._execute(
+            f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'running' AND attempt = ?",
+            (*params, job_id, attempt)
+        ) == 1
+    
+    def _execute(self, sql, params):
+        with self._lock:
+            conn = self._connection()
+            rowcount = conn.execute(sql, params).rowcount
+            conn.commit()
+        return rowcount
+    
+    def _connection(self):
+        """
+        This process's connection, opened lazily so it is never shared across a fork (lock held)
+        """
+        if self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,'
+                ' media_path TEXT, params TEXT, result TEXT, error TEXT,'
+                ' frames_done INTEGER DEFAULT 0, frames_total INTEGER, attempt INTEGER DEFAULT 0,'
+                ' created_at REAL NOT NULL, updated_at REAL NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);'
+                'CREATE TABLE IF NOT EXISTS job_frames ('
+                ' seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL,'
+                ' name TEXT NOT NULL, data TEXT NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS job_frames_job ON job_frames (job_id, seq);'
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+class JobRunner:
+    def __init__(self, store, handlers, workers=2, poll_interval=1.0, stale_after=300):
+        """
+        Bounded pool of background threads that execute queued jobs
+        
+        Args:
+            store (JobStore): Queue to pull jobs from
+            handlers (dict): Job kind -> callable(job, progress) returning the final result.
+                progress(frames_total=None, frame_results=None, frames_done=None) reports partial results.
+            workers (int): Threads per process
+            poll_interval (float): Seconds between queue checks when idle
+            stale_after (float): Seconds without a heartbeat after which a running job is requeued.
+                Running jobs send one every stale_after / 3 seconds.
+        """
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        
+        self._lock = threading.Lock()
+        self._pid = None
+    
+    def start(self):
+        """
+        Start the worker threads, once per process (threads do not survive a fork)
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            for i in range(self.workers):
+                threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True).start()
+    
+    def _run(self):
+        """
+        Worker loop: recover abandoned jobs, claim the next one and run it
+        """
+        while True:
+            try:
+                self.store.requeue_stale(self.stale_after)
+                job = self.store.claim_next()
+            except sqlite3.Error:
+                job = None
+            if job is None:
+                time.sleep(self.poll_interval)
+                continue
+            self._execute(job)
+    
+    def _execute(self, job):
+        """
+        Run one job and record its outcome
+        
+        A heartbeat thread keeps the job claimed while the handler runs, however long it goes
+        without reporting frames. If the job was requeued anyway (e.g. the process stalled),
+        this attempt's progress and outcome are dropped and its media is left to the new owner.
+        """
+        job_id, attempt = job['id'], job['attempt']
+        
+        def progress(frames_total=None, frame_results=None, frames_done=None):
+            if frames_total is not None:
+                self.store.set_total(job_id, attempt, frames_total)
+            if frame_results:
+                self.store.add_frames(job_id, attempt, frame_results, frames_done)
+        
+        stopped = threading.Event()
+        
+        def heartbeat():
+            while not stopped.wait(self.stale_after / 3):
+                try:
+                    if not self.store.heartbeat(job_id, attempt):
+                        return
+                except sqlite3.Error:
+                    pass
+        
+        threading.Thread(target=heartbeat, name=f"job-heartbeat-{job_id}", daemon=True).start()
+        owned = False
+        try:
+            result = self.handlers[job['kind']](job, progress)
+            owned = self.store.finish(job_id, attempt, result)
+        except Exception as e:
+            traceback.print_exc()
+            owned = self.store.fail(job_id, attempt, str(e))
+        finally:
+            stopped.set()
+            if owned and job['media_path'] and os.path.exists(job['media_path']):
+                os.remove(job['media_path'])
@@ -0,0 +1,206 @@
+import threading
+import time
+
+# Settings an effort level controls, in the order they are reported
+EFFORT_SETTINGS = ('frames_per_second', 'max_frames', 'audio_windows', 'resolution')
+
+def geometric(full, minimum, t):
+    """
+    Point t (0 to 1) of the way from full to minimum on a log scale, never above full
+    """
+    return min(full, full * (minimum / full) ** t)
+
+def effort_levels(count, full, minimum):
+    """
+    Effort settings from full (level 0) down to minimum (the last level), spaced geometrically
+    
+    Args:
+        count (int): Number of levels, at least 1
+        full (dict): Level 0 settings: frames_per_second, max_frames (None for no cap),
+            audio_windows and resolution (square image input in pixels)
+        minimum (dict): Settings of the last level, same keys
+        
+    Returns:
+        list: One settings dict per level. Without a frame cap at full effort, the cap
+            of the levels below halves from one level to the next down to minimum['max_frames'].
+    """
+    levels = [dict(full)]
+    frames_from = full['max_frames'] or minimum['max_frames'] * 2 ** (count - 1)
+    for level in range(1, count):
+        t = level / (count - 1)
+        resolution = geometric(full['resolution'], minimum['resolution'], t)
+        levels.append({
+            'frames_per_second': round(geometric(full['frames_per_second'], minimum['frames_per_second'], t), 3),
+            'max_frames': max(1, int(round(geometric(frames_from, minimum['max_frames'], t)))),
+            'audio_windows': max(1, int(round(geometric(full['audio_windows'], minimum['audio_windows'], t)))),
+            # EfficientNet downsamples by 32
+            'resolution': max(32, 32 * int(round(resolution / 32)))
+        })
+    return levels
+
+def relative_cost(kind, settings, full):
+    """
+    Inference work of a request at some effort settings, relative to full effort (1.0)
+    
+    Frame caps are ignored, since whether they bind depends on the clip's length, and so
+    is decoding, which LoadController learns per level instead.
+    
+    Args:
+        kind (str): 'image', 'video', 'audio_windowed', 'batch' (costed like video) or
+            'audio' (one window whatever the level)
+        settings (dict): Effort settings, as from effort_levels()
+        full (dict): Level 0 settings
+        
+    Returns:
+        float: Cost factor
+    """
+    pixels = (settings['resolution'] / full['resolution']) ** 2
+    if kind == 'image':
+        return pixels
+    if kind in ('video', 'batch'):
+        return pixels * settings['frames_per_second'] / full['frames_per_second']
+    if kind == 'audio_windowed':
+        return settings['audio_windows'] / full['audio_windows']
+    return 1.0
+
+class LoadController:
+    def __init__(self, levels, targets=None, headroom=0.5, smoothing=0.2):
+        """
+        Choose an effort level per request from queue depth, recent latency and a latency budget
+        
+        Each request kind keeps a smoothed rate per effort level: seconds per unit
+        of work, learned from finished requests. A finished request's latency is
+        divided by its work (e.g. upload megabytes) and the mean number of
+        requests in flight while it ran, since concurrent requests share the CPUs.
+        Levels a kind has not run at yet are estimated from the nearest level it
+        has, scaled by relative_cost(). A new request is predicted to take its
+        level's rate times its work and the requests now in flight (itself
+        included), times a correction: the smoothed ratio of observed to predicted
+        latency, which grows when requests arriving later slow the ones in flight,
+        i.e. when the server saturates. It runs at the highest effort whose
+        prediction fits in headroom times its budget. Requests without a budget or
+        kind target, and kinds with no finished request yet, run at full effort.
+        
+        Args:
+            levels (list): Effort settings per level, full effort first, see effort_levels()
+            targets (dict, optional): Default budget in seconds per request kind
+            headroom (float): Fraction of the budget a prediction may use; predictions are
+                means, so this leaves room for the tail
+            smoothing (float): Weight of the newest request in the smoothed rates
+        """
+        self.levels = levels
+        self.targets = targets or {}
+        self.headroom = headroom
+        self.smoothing = smoothing
+        
+        self._lock = threading.Lock()
+        self._rates = {}  # (kind, level) -> seconds per unit of work, alone on the server
+        self.correction = 1.0
+        self.in_flight = 0
+        # Integral of in_flight over time, for the mean concurrency seen by each request
+        self._area = 0.0
+        self._area_time = time.perf_counter()
+    
+    def begin(self, kind, work=1.0, budget=None):
+        """
+        Admit a request and choose its effort level
+        
+        Args:
+            kind (str): Request kind, see relative_cost()
+            work (float): Size of the request, in the unit its kind's rate is learned in
+            budget (float, optional): Latency budget in seconds. If None, uses the kind's target
+            
+        Returns:
+            dict: Ticket for end(), with the chosen 'level', the 'budget' applied (None if
+                unmanaged) and the 'predicted' seconds (None without a rate yet)
+        """
+        with self._lock:
+            self._advance()
+            self.in_flight += 1
+            budget = budget if budget is not None else self.targets.get(kind)
+            level, predicted = 0, None
+            rates = self._level_rates(kind)
+            if budget is not None and rates is not None:
+                predictions = [rate * work * self.in_flight * self.correction for rate in rates]
+                fits = [i for i, prediction in enumerate(predictions) if prediction <= budget * self.headroom]
+                level = fits[0] if fits else min(range(len(predictions)), key=predictions.__getitem__)
+                predicted = predictions[level]
+            return {'kind': kind, 'work': work, 'level': level, 'budget': budget, 'predicted': predicted,
+                    'correction': self.correction, 'start': time.perf_counter(), 'area': self._area}
+    
+    def end(self, ticket, record=True):
+        """
+        Release a request; with record, learn from its latency
+        
+        Args:
+            ticket (dict): Ticket from begin()
+            record (bool): False for requests whose latency says nothing about the
+                work, e.g. cache hits and failures
+        """
+        with self._lock:
+            self._advance()
+            self.in_flight -= 1
+            if not record:
+                return
+            seconds = time.perf_counter() - ticket['start']
+            concurrency = max(1.0, (self._area - ticket['area']) / max(seconds, 1e-9))
+            sample = seconds / (max(ticket['work'], 1e-9) * concurrency)
+            key = (ticket['kind'], ticket['level'])
+            rate = self._rates.get(key)
+            self._rates[key] = sample if rate is None else rate + self.smoothing * (sample - rate)
+            if ticket['predicted']:
+                # Ratio to the uncorrected prediction, bounded so one outlier cannot swamp it
+                ratio = min(max(seconds * ticket['correction'] / ticket['predicted'], 0.25), 4.0)
+                self.correction += self.smoothing * (ratio - self.correction)
+    
+    def effort(self, ticket):
+        """
+        Public description of a ticket's effort level, as reported in responses
+        
+        Returns:
+            dict: level, levels, the level's settings, budget_ms and predicted_ms
+        """
+        return {
+            'level': ticket['level'],
+            'levels': len(self.levels),
+            **self.levels[ticket['level']],
+            'budget_ms': ticket['budget'] * 1000 if ticket['budget'] is not None else None,
+            'predicted_ms': ticket['predicted'] * 1000 if ticket['predicted'] is not None else None
+        }
+    
+    def stats(self):
+        """
+        Report requests in flight, learned rates, targets and levels
+        """
+        with self._lock:
+            rates = {}
+            for (kind, level), rate in sorted(self._rates.items()):
+                rates.setdefault(kind, {})[level] = rate
+            return {'in_flight': self.in_flight, 'rates': rates, 'correction': self.correction,
+                    'targets': self.targets, 'headroom': self.headroom, 'levels': self.levels}
+    
+    def _level_rates(self, kind):
+        """
+        Seconds per unit of work at every level for a kind, or None before its first finished request (lock held)
+        """
+        observed = {level: rate for (name, level), rate in self._rates.items() if name == kind}
+        if not observed:
+            return None
+        rates = []
+        for level, settings in enumerate(self.levels):
+            if level in observed:
+                rates.append(observed[level])
+                continue
+            nearest = min(observed, key=lambda known: (abs(known - level), known))
+            scale = (relative_cost(kind, settings, self.levels[0])
+                     / relative_cost(kind, self.levels[nearest], self.levels[0]))
+            rates.append(observed[nearest] * scale)
+        return rates
+    
+    def _advance(self):
+        """
+        Accumulate in_flight over the time since the last call (lock held)
+        """
+        now = time.perf_counter()
+        self._area += self.in_flight * (now - self._area_time)
+        self._area_time = now
@@ -0,0 +1,49 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+@contextmanager
+def memory_file(data, suffix=''):
+    """
+    Expose in-memory bytes as a filesystem path, for decoders that only accept paths
+    
+    Uses an anonymous memfd where the OS supports it, otherwise a temp file on
+    tmpfs (/dev/shm) if available, and only then the default temp directory.
+    
+    Args:
+        data (bytes): File contents
+        suffix (str): File extension hint for the tmpfs/temp file fallback
+        
+    Yields:
+        str: Path readable for the duration of the context
+    """
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('fdpa-upload')
+        try:
+            _write_all(fd, data)
+            yield f"/proc/self/fd/{fd}"
+        finally:
+            os.close(fd)
+        return
+    
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    try:
+        _write_all(fd, data)
+        os.close(fd)
+        fd = None
+        yield path
+    finally:
+        if fd is not None:
+            os.close(fd)
+        if os.path.exists(path):
+            os.remove(path)
+
+def _write_all(fd, data):
+    """
+    Write every byte of data to a file descriptor
+    """
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
@@ -0,0 +1,312 @@
+import atexit
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+# Histogram buckets are geometric, each 20% wider than the last, from 0.1 ms (or 0.0001 of
+# any unit) up to about 8000; quantiles are interpolated within a bucket, so they are
+# accurate to within one bucket width
+BUCKET_MIN = 1e-4
+BUCKET_FACTOR = 1.2
+BUCKET_COUNT = 100
+QUANTILES = (0.5, 0.95, 0.99)
+
+def bucket_index(value):
+    """
+    Histogram bucket holding value; bucket i covers (upper bound of i - 1, BUCKET_MIN * BUCKET_FACTOR ** i]
+    """
+    if value <= BUCKET_MIN:
+        return 0
+    return min(BUCKET_COUNT, int(math.ceil(math.log(value / BUCKET_MIN) / math.log(BUCKET_FACTOR) - 1e-9)))
+
+def bucket_bound(index):
+    """
+    Upper bound of a histogram bucket
+    """
+    return BUCKET_MIN * BUCKET_FACTOR ** index
+
+def quantile(histogram, q):
+    """
+    Estimate a quantile from bucket counts, interpolating linearly within the bucket
+    
+    Args:
+        histogram (tuple): (sum, count, {bucket index: observations}, min, max)
+        q (float): Quantile in [0, 1]
+        
+    Returns:
+        float: Estimated value, clamped to the observed range, or NaN without observations
+    """
+    _, count, buckets, low, high = histogram
+    if not count:
+        return float('nan')
+    target = q * count
+    seen = 0
+    estimate = high
+    for index in sorted(buckets):
+        n = buckets[index]
+        if seen + n >= target:
+            lower = bucket_bound(index - 1) if index > 0 else 0.0
+            upper = bucket_bound(index)
+            estimate = lower + (upper - lower) * (target - seen) / n
+            break
+        seen += n
+    return min(max(estimate, low), high)
+
+class Metrics:
+    def __init__(self, db_path=None, flush_interval=1.0, namespace='fdpa'):
+        """
+        Counters and latency histograms, rendered in the Prometheus text format
+        
+        Updates are aggregated in memory. With db_path they are flushed at most
+        every flush_interval seconds into a SQLite file, so every worker process
+        on the host reports the same totals; without it each process only sees
+        its own.
+        
+        Args:
+            db_path (str, optional): SQLite database shared by all workers
+            flush_interval (float): Longest time updates stay in memory before they are flushed
+            namespace (str): Prefix for every metric name
+        """
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.namespace = namespace
+        self.descriptions = {}
+        
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels JSON) -> value
+        self._histograms = {}  # (name, labels JSON) -> [sum, count, {bucket: observations}, min, max]
+        self._last_flush = time.monotonic()
+        
+        # The SQLite connection is opened lazily so it is never shared across a fork
+        self._conn = None
+        self._pid = os.getpid()
+        atexit.register(self.flush)
+    
+    def describe(self, name, kind, text):
+        """
+        Set the TYPE and HELP lines of a metric
+        
+        Args:
+            name (str): Metric name, without namespace
+            kind (str): 'counter' or 'summary'
+            text (str): Help text
+        """
+        self.descriptions[name] = (kind, text)
+    
+    def inc(self, name, labels=None, amount=1):
+        """
+        Add amount to a counter
+        """
+        key = (name, json.dumps(labels or {}, sort_keys=True))
+        with self._lock:
+            self._forget_parent()
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self._maybe_flush()
+    
+    def observe(self, name, value, labels=None):
+        """
+        Record one observation in a histogram
+        """
+        self.observe_many(name, [(value, labels)])
+    
+    def observe_timings(self, name, timings, labels=None):
+        """
+        Record per-stage seconds, e.g. a detector's 'timings', with the stage as a label
+        
+        Args:
+            name (str): Histogram name
+            timings (dict): Stage -> seconds
+            labels (dict, optional): Labels shared by every stage
+        """
+        self.observe_many(name, [(seconds, {**(labels or {}), 'stage': stage}) for stage, seconds in timings.items()])
+    
+    def observe_many(self, name, observations):
+        """
+        Record (value, labels) observations in a histogram under one lock
+        """
+        with self._lock:
+            self._forget_parent()
+            for value, labels in observations:
+                key = (name, json.dumps(labels or {}, sort_keys=True))
+                self._merge_histogram(key, value, 1, {bucket_index(value): 1}, value, value)
+        self._maybe_flush()
+    
+    def flush(self):
+        """
+        Write pending updates to the shared database (no-op without one)
+        """
+        if not self.db_path:
+            return
+        with self._lock:
+            self._forget_parent()
+            counters, histograms = self._counters, self._histograms
+            self._counters, self._histograms = {}, {}
+            self._last_flush = time.monotonic()
+            if not counters and not histograms:
+                return
+            
+            try:
+                self._write(counters, histograms)
+            except sqlite3.Error as e:
+                # Keep the updates for the next flush rather than failing the request that triggered this one
+                print(f"Warning: could not flush metrics: {str(e)}")
+                for key, value in counters.items():
+                    self._counters[key] = self._counters.get(key, 0) + value
+                for key, histogram in histograms.items():
+                    self._merge_histogram(key, *histogram)
+    
+    def _merge_histogram(self, key, total, count, buckets, low, high):
+        """
+        Add observations to a pending histogram (lock held)
+        """
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            self._histograms[key] = [total, count, dict(buckets), low, high]
+            return
+        histogram[0] += total
+        histogram[1] += count
+        for index, n in buckets.items():
+            histogram[2][index] = histogram[2].get(index, 0) + n
+        histogram[3] = min(histogram[3], low)
+        histogram[4] = max(histogram[4], high)
+    
+    def _write(self, counters, histograms):
+        """
+        Add pending updates to the database totals in one transaction (lock held)
+        """
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO metric_counters (name, labels, value) VALUES (?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET value = value + excluded.value',
+                [(name, labels, value) for (name, labels), value in counters.items()]
+            )
+            conn.executemany(
+                'INSERT INTO metric_sums (name, labels, sum, count, min, max) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (name, labels) DO UPDATE SET '
+                'sum = sum + excluded.sum, count = count + excluded.count, '
+                'min = MIN(min, excluded.min), max = MAX(max, excluded.max)',
+                [(name, labels, total, count, low, high)
+                 for (name, labels), (total, count, _, low, high) in histograms.items()]
+            )
+            conn.executemany(
+                'INSERT INTO metric_buckets (name, labels, bucket, count) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (name, labels, bucket) DO UPDATE SET count = count + excluded.count',
+                [(name, labels, index, n) for (name, labels), (_, _, buckets, _, _) in histograms.items()
+                 for index, n in buckets.items()]
+            )
+    
+    def snapshot(self):
+        """
+        Current totals, across all workers when a database is configured
+        
+        Returns:
+            tuple: (counters {(name, labels JSON): value},
+                histograms {(name, labels JSON): (sum, count, {bucket: observations}, min, max)})
+        """
+        if not self.db_path:
+            with self._lock:
+                self._forget_parent()
+                return dict(self._counters), {
+                    key: (total, count, dict(buckets), low, high)
+                    for key, (total, count, buckets, low, high) in self._histograms.items()
+                }
+        
+        self.flush()
+        with self._lock:
+            conn = self._connection()
+            counters = {(name, labels): value for name, labels, value in
+                        conn.execute('SELECT name, labels, value FROM metric_counters')}
+            histograms = {(name, labels): (total, count, {}, low, high) for name, labels, total, count, low, high in
+                          conn.execute('SELECT name, labels, sum, count, min, max FROM metric_sums')}
+            for name, labels, index, n in conn.execute('SELECT name, labels, bucket, count FROM metric_buckets'):
+                histograms[(name, labels)][2][index] = n
+        return counters, histograms
+    
+    def render(self):
+        """
+        All metrics in the Prometheus text exposition format (histograms as summaries with QUANTILES)
+        
+        Returns:
+            str: Exposition text
+        """
+        counters, histograms = self.snapshot()
+        series = {}
+        for (name, labels), value in counters.items():
+            series.setdefault(name, []).append(('counter', json.loads(labels), value))
+        for (name, labels), histogram in histograms.items():
+            series.setdefault(name, []).append(('summary', json.loads(labels), histogram))
+        
+        lines = []
+        for name in sorted(series):
+            full_name = f"{self.namespace}_{name}"
+            kind, text = self.descriptions.get(name, (series[name][0][0], ''))
+            if text:
+                lines.append(f"# HELP {full_name} {text}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for kind, labels, value in sorted(series[name], key=lambda entry: sorted(entry[1].items())):
+                if kind == 'counter':
+                    lines.append(f"{full_name}{format_labels(labels)} {format_value(value)}")
+                    continue
+                total, count = value[:2]
+                for q in QUANTILES:
+                    lines.append(f"{full_name}{format_labels({**labels, 'quantile': str(q)})} "
+                                 f"{format_value(quantile(value, q))}")
+                lines.append(f"{full_name}_sum{format_labels(labels)} {format_value(total)}")
+                lines.append(f"{full_name}_count{format_labels(labels)} {format_value(count)}")
+        return '\n'.join(lines) + '\n'
+    
+    def _maybe_flush(self):
+        if self.db_path and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+    
+    def _forget_parent(self):
+        """
+        Drop updates inherited from the parent across a fork; the parent flushes them itself (lock held)
+        """
+        if self._pid != os.getpid():
+            self._counters, self._histograms = {}, {}
+            self._conn = None
+            self._pid = os.getpid()
+    
+    def _connection(self):
+        """
+        This process's connection to the shared database (lock held)
+        """
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS metric_counters ('
+                ' name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL,'
+                ' PRIMARY KEY (name, labels));'
+                'CREATE TABLE IF NOT EXISTS metric_sums ('
+                ' name TEXT NOT NULL, labels TEXT NOT NULL, sum REAL NOT NULL, count INTEGER NOT NULL,'
+                ' min REAL NOT NULL, max REAL NOT NULL, PRIMARY KEY (name, labels));'
+                'CREATE TABLE IF NOT EXISTS metric_buckets ('
+                ' name TEXT NOT NULL, labels TEXT NOT NULL, bucket INTEGER NOT NULL, count INTEGER NOT NULL,'
+                ' PRIMARY KEY (name, labels, bucket));'
+            )
+        return self._conn
+
+def format_labels(labels):
+    """
+    Prometheus label set, e.g. {stage="decode"}; empty string without labels
+    """
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in sorted(labels.items())
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+def format_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return 'NaN'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
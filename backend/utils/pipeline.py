@@ -0,0 +1,231 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Where decode/preprocess tasks run
+#   thread:  worker threads; OpenCV, PIL, libsndfile, soxr and numpy FFTs release the GIL
+#   process: worker processes writing into shared-memory buffers, started from a forkserver
+EXECUTORS = ('thread', 'process')
+
+class StageTimer:
+    def __init__(self):
+        """
+        Accumulates wall-clock seconds per pipeline stage
+        """
+        self.seconds = {}
+    
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the enclosed block as stage name
+        """
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time)
+    
+    def add(self, name, seconds):
+        """
+        Add seconds measured elsewhere to stage name
+        """
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+    
+    def merge(self, seconds):
+        """
+        Add every stage of a {stage: seconds} dict, e.g. one returned by a pool worker
+        """
+        for name, value in seconds.items():
+            self.add(name, value)
+    
+    def as_dict(self):
+        """
+        Seconds per stage, rounded to microseconds
+        """
+        return {name: round(value, 6) for name, value in self.seconds.items()}
+
+class DecodePool:
+    def __init__(self, workers=4, executor='thread', prefetch=2):
+        """
+        Bounded pool that decodes and preprocesses ahead of inference
+        
+        Args:
+            workers (int): Worker threads or processes
+            executor (str): One of EXECUTORS
+            prefetch (int): Tasks in flight per worker; with the output buffers this bounds memory
+        """
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown pipeline executor: {executor}")
+        
+        self.workers = workers
+        self.executor = executor
+        self.prefetch = prefetch
+        
+        # Executors are created lazily so they are never shared across a fork
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._pid = None
+    
+    def threads(self):
+        """
+        The thread executor, also used for in-process work when executor is 'process'
+        
+        Returns:
+            ThreadPoolExecutor: Shared executor with self.workers threads
+        """
+        return self._pool('thread')
+    
+    def map_into(self, fn, tasks, slot_shape, dtype=np.float32):
+        """
+        Run fn(task, out) for each task, writing into preallocated output buffers
+        
+        At most workers * prefetch tasks are in flight, each owning one buffer of
+        slot_shape. With the process executor the buffers live in shared memory,
+        so results never pass through pickling; fn must then be a picklable
+        module-level function.
+        
+        Args:
+            fn (callable): Task function; fills out and returns a small picklable result
+            tasks (iterable): Task arguments, consumed lazily
+            slot_shape (tuple): Shape of one output buffer
+            dtype: Output buffer dtype
+            
+        Yields:
+            tuple: (output buffer, fn's return value, seconds spent waiting), in task order.
+                The buffer is reused once the generator resumes, so copy anything kept.
+        """
+        pool = self._pool(self.executor)
+        n_slots = max(1, self.workers * self.prefetch)
+        nbytes = int(np.prod(slot_shape)) * np.dtype(dtype).itemsize
+        
+        blocks = []
+        if self.executor == 'process':
+            blocks = [shared_memory.SharedMemory(create=True, size=max(nbytes, 1)) for _ in range(n_slots)]
+            buffers = [np.ndarray(slot_shape, dtype=dtype, buffer=block.buf) for block in blocks]
+        else:
+            buffers = [np.empty(slot_shape, dtype=dtype) for _ in range(n_slots)]
+        
+        task_iter = iter(tasks)
+        in_flight = deque()
+        
+        def submit(slot):
+            task = next(task_iter, None)
+            if task is None:
+                return
+            if self.executor == 'process':
+                future = pool.submit(_run_shared, fn, task, blocks[slot].name, slot_shape, np.dtype(dtype).str)
+            else:
+                future = pool.submit(fn, task, buffers[slot])
+            in_flight.append((slot, future))
+        
+        try:
+            for slot in range(n_slots):
+                submit(slot)
+            
+            while in_flight:
+                slot, future = in_flight.popleft()
+                start_time = time.perf_counter()
+                result = future.result()
+                yield buffers[slot], result, time.perf_counter() - start_time
+                submit(slot)
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+            # Workers still writing into a buffer must finish before it is released
+            for _, future in in_flight:
+                if not future.cancelled():
+                    try:
+                        future.result()
+                    except Exception:
+                        pass
+            del buffers
+            for block in blocks:
+                try:
+                    block.close()
+                except BufferError:
+                    # The caller still holds the last buffer; the mapping goes when it does
+                    pass
+                block.unlink()
+    
+    def _pool(self, kind):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pools = {}
+                self._pid = os.getpid()
+            if kind not in self._pools:
+                if kind == 'process':
+                    # Not fork: a child forked while TensorFlow's thread pools run can deadlock
+                    self._pools[kind] = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('forkserver')
+                    )
+                else:
+                    self._pools[kind] = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='decode')
+            return self._pools[kind]
+
+def _run_shared(fn, task, shm_name, slot_shape, dtype):
+    """
+    Process-pool trampoline: attach to the output buffer by name and run the task
+    """
+    block = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(slot_shape, dtype=dtype, buffer=block.buf)
+        result = fn(task, out)
+        del out
+        return result
+    finally:
+        block.close()
+
+def prefetch(iterable, depth=2):
+    """
+    Produce items from iterable on a background thread, up to depth items ahead
+    
+    Args:
+        iterable: Source, e.g. a decoder generator
+        depth (int): Maximum items buffered
+        
+    Yields:
+        Items of iterable, in order; exceptions raised by the source are re-raised here
+    """
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item, error=None):
+        # Give up once the consumer has gone away, instead of blocking forever
+        while not stop.is_set():
+            try:
+                items.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(done)
+        except Exception as e:
+            put(done, e)
+    
+    thread = threading.Thread(target=produce, name='prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
@@ -1 +1,40 @@
-ECHO is off.
+import io
+
+import numpy as np
+from PIL import Image
+
+# Viridis anchor colours, interpolated into a 256-entry lookup table
+_VIRIDIS_ANCHORS = np.array([
+    [68, 1, 84],
+    [59, 82, 139],
+    [33, 145, 140],
+    [94, 201, 98],
+    [253, 231, 37],
+], dtype=np.float32)
+_COLORMAP = np.stack([
+    np.interp(np.linspace(0, 1, 256), np.linspace(0, 1, len(_VIRIDIS_ANCHORS)), _VIRIDIS_ANCHORS[:, c])
+    for c in range(3)
+], axis=1).astype(np.uint8)
+
+def spectrogram_to_png(mel_spectrogram_db, scale=2):
+    """
+    Render a dB spectrogram as a colour-mapped PNG without matplotlib
+    
+    Args:
+        mel_spectrogram_db (numpy.ndarray): Spectrogram of shape (n_mels, frames), in dB
+        scale (int): Integer upscaling factor for the output image
+        
+    Returns:
+        bytes: PNG image, low frequencies at the bottom
+    """
+    low, high = float(mel_spectrogram_db.min()), float(mel_spectrogram_db.max())
+    levels = (mel_spectrogram_db - low) / (high - low) if high > low else np.zeros_like(mel_spectrogram_db)
+    pixels = _COLORMAP[(levels * 255).astype(np.uint8)][::-1]
+    
+    img = Image.fromarray(np.ascontiguousarray(pixels))
+    if scale > 1:
+        img = img.resize((img.width * scale, img.height * scale), Image.NEAREST)
+    
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
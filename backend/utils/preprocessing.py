@@ -0,0 +1,235 @@
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+import librosa
+import soundfile as sf
+import soxr
+from scipy.signal import resample_poly
+
+# Audio decoders
+#   librosa:   librosa.load (soundfile, falling back to audioread)
+#   soundfile: direct libsndfile read of only the requested frames, librosa.load for other formats
+DECODERS = ('librosa', 'soundfile')
+
+# Resamplers, from slowest/most accurate to fastest; soxr_hq is librosa.load's default
+RESAMPLERS = ('soxr_vhq', 'soxr_hq', 'soxr_mq', 'soxr_lq', 'soxr_qq', 'polyphase')
+
+# Spectrogram implementations
+#   librosa: librosa.stft + cached mel filterbank
+#   numpy:   strided framing + numpy rfft with cached window and filterbank
+FEATURE_BACKENDS = ('librosa', 'numpy')
+
+@lru_cache(maxsize=8)
+def hann_window(n_fft):
+    """
+    Periodic Hann window, as used by librosa.stft
+    
+    Args:
+        n_fft (int): Window length
+        
+    Returns:
+        numpy.ndarray: Window of shape (n_fft,), float32
+    """
+    return (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+
+@lru_cache(maxsize=8)
+def mel_filterbank(sample_rate, n_fft, n_mels, fmax):
+    """
+    Mel filterbank matrix, built once per parameter set
+    
+    Returns:
+        numpy.ndarray: Filterbank of shape (n_mels, 1 + n_fft // 2), float32
+    """
+    return librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels, fmax=fmax).astype(np.float32)
+
+class AudioLoader:
+    def __init__(self, sample_rate=22050, decoder='librosa', res_type='soxr_hq'):
+        """
+        Initialize the AudioLoader
+        
+        Args:
+            sample_rate (int): Target sample rate
+            decoder (str): One of DECODERS
+            res_type (str): One of RESAMPLERS
+        """
+        if decoder not in DECODERS:
+            raise ValueError(f"Unknown audio decoder: {decoder}")
+        if res_type not in RESAMPLERS:
+            raise ValueError(f"Unknown resampler: {res_type}")
+        
+        self.sample_rate = sample_rate
+        self.decoder = decoder
+        self.res_type = res_type
+    
+    def load(self, audio_path, offset=0.0, duration=None):
+        """
+        Decode an audio file to mono float32 at the target sample rate
+        
+        With the soundfile decoder only the frames between offset and
+        offset + duration are read from disk.
+        
+        Args:
+            audio_path (str or file-like): Audio file
+            offset (float): Start time in seconds
+            duration (float, optional): Length in seconds. If None, reads to the end.
+            
+        Returns:
+            numpy.ndarray: Mono samples
+        """
+        if self.decoder == 'soundfile':
+            try:
+                with sf.SoundFile(audio_path) as f:
+                    if offset:
+                        f.seek(int(offset * f.samplerate))
+                    frames = int(duration * f.samplerate) if duration is not None else -1
+                    block = f.read(frames, dtype='float32', always_2d=True)
+                    return self.resample(block.mean(axis=1), f.samplerate)
+            except RuntimeError:
+                # Formats libsndfile cannot read go through librosa/audioread
+                if hasattr(audio_path, 'seek'):
+                    audio_path.seek(0)
+        
+        y, _ = librosa.load(audio_path, sr=self.sample_rate, offset=offset, duration=duration,
+                            res_type=self.res_type)
+        return y.astype(np.float32)
+    
+    def stream(self, audio_path, block_seconds=30, offset=0.0):
+        """
+        Decode an audio file block by block as mono float32 at the target sample rate
+        
+        Args:
+            audio_path (str or file-like): Audio file
+            block_seconds (float): Length of each decoded block
+            offset (float): Start time in seconds
+            
+        Yields:
+            numpy.ndarray: Consecutive mono sample blocks
+        """
+        try:
+            f = sf.SoundFile(audio_path)
+        except RuntimeError:
+            # Formats libsndfile cannot read are decoded in one go
+            if hasattr(audio_path, 'seek'):
+                audio_path.seek(0)
+            yield self.load(audio_path, offset=offset)
+            return
+        
+        with f:
+            if offset:
+                f.seek(int(round(offset * f.samplerate)))
+            # Resample incrementally so block edges do not introduce artefacts
+            resampler = None
+            if f.samplerate != self.sample_rate:
+                quality = self.res_type.split('_')[-1].upper() if self.res_type.startswith('soxr') else 'HQ'
+                resampler = soxr.ResampleStream(f.samplerate, self.sample_rate, 1, dtype='float32', quality=quality)
+            
+            blocksize = int(block_seconds * f.samplerate)
+            while True:
+                block = f.read(blocksize, dtype='float32', always_2d=True)
+                last = len(block) < blocksize
+                y = block.mean(axis=1)
+                if resampler is not None:
+                    y = resampler.resample_chunk(y, last=last)
+                if len(y):
+                    yield y
+                if last:
+                    break
+    
+    def resample(self, y, orig_sr):
+        """
+        Resample mono samples to the target sample rate
+        
+        Args:
+            y (numpy.ndarray): Mono samples
+            orig_sr (int): Sample rate of y
+            
+        Returns:
+            numpy.ndarray: Resampled samples, float32
+        """
+        if orig_sr == self.sample_rate:
+            return y.astype(np.float32)
+        
+        if self.res_type == 'polyphase':
+            divisor = gcd(int(orig_sr), int(self.sample_rate))
+            y = resample_poly(y, self.sample_rate // divisor, int(orig_sr) // divisor)
+        else:
+            y = soxr.resample(y, orig_sr, self.sample_rate, quality=self.res_type.split('_')[-1].upper())
+        return y.astype(np.float32)
+
+class MelSpectrogram:
+    def __init__(self, sample_rate=22050, n_fft=2048, hop_length=512, n_mels=128, fmax=8000, backend='librosa',
+                 executor=None, workers=1):
+        """
+        Initialize the MelSpectrogram
+        
+        Args:
+            sample_rate (int): Sample rate of the input
+            n_fft (int): FFT window length
+            hop_length (int): Samples between frames
+            n_mels (int): Number of mel bands
+            fmax (float): Highest mel band frequency
+            backend (str): One of FEATURE_BACKENDS
+            executor (concurrent.futures.Executor, optional): Thread pool for the numpy backend;
+                frame chunks are transformed in parallel since numpy's FFT and matmul release the GIL
+            workers (int): Threads available in executor
+        """
+        if backend not in FEATURE_BACKENDS:
+            raise ValueError(f"Unknown spectrogram backend: {backend}")
+        
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.fmax = fmax
+        self.backend = backend
+        
+        # Frames per FFT call in the numpy path; keeps temporaries cache-sized
+        self.chunk_frames = 256
+        self.executor = executor
+        self.workers = workers
+    
+    def power(self, y, center=True):
+        """
+        Mel power spectrogram, matching librosa.feature.melspectrogram
+        
+        Args:
+            y (numpy.ndarray): Mono samples
+            center (bool): Zero-pad n_fft // 2 samples on both sides so frames are centred
+            
+        Returns:
+            numpy.ndarray: Mel power spectrogram of shape (n_mels, frames), float32
+        """
+        mel_basis = mel_filterbank(self.sample_rate, self.n_fft, self.n_mels, self.fmax)
+        
+        if self.backend == 'librosa':
+            stft = librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length, center=center)
+            return (mel_basis @ (np.abs(stft) ** 2)).astype(np.float32)
+        
+        if center:
+            y = np.pad(y, self.n_fft // 2)
+        if len(y) < self.n_fft:
+            return np.zeros((self.n_mels, 0), dtype=np.float32)
+        
+        # Strided (frames, n_fft) view; frames are only copied chunk by chunk when windowed
+        frames = np.lib.stride_tricks.sliding_window_view(y, self.n_fft)[::self.hop_length]
+        window = hann_window(self.n_fft)
+        
+        mel = np.empty((self.n_mels, len(frames)), dtype=np.float32)
+        chunk_frames = self.chunk_frames
+        if self.executor is not None and self.workers > 1:
+            # Smaller chunks so short clips are still spread over every worker
+            chunk_frames = min(chunk_frames, max(32, -(-len(frames) // self.workers)))
+        
+        def transform(i):
+            spectrum = np.fft.rfft(frames[i:i + chunk_frames] * window, axis=1)
+            power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+            mel[:, i:i + chunk_frames] = mel_basis @ power.T
+        
+        starts = range(0, len(frames), chunk_frames)
+        if self.executor is not None and len(starts) > 1:
+            list(self.executor.map(transform, starts))
+        else:
+            for i in starts:
+                transform(i)
+        return mel
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+def hash_stream(stream, chunk_size=1024 * 1024):
+    """
+    SHA-256 of a file-like object, read in chunks and rewound afterwards
+    
+    Args:
+        stream: Seekable binary file-like object (e.g. an upload's stream)
+        chunk_size (int): Bytes read per chunk
+        
+    Returns:
+        tuple: (hex digest, size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+class ResultCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=24 * 3600,
+                 sqlite_path=None, model_version=''):
+        """
+        Detection result cache keyed by upload content, model version and parameters
+        
+        Results live in an in-process LRU bounded by entry count, total size and
+        age. An optional SQLite file adds a second tier shared by every worker
+        on the host.
+        
+        Args:
+            max_entries (int): Maximum results kept in memory
+            max_bytes (int): Maximum total size of in-memory results (serialized JSON)
+            ttl (float): Seconds a result stays valid
+            sqlite_path (str, optional): SQLite database for the shared tier
+            model_version (str): Mixed into every key so new models never see stale results
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.model_version = model_version
+        
+        self._entries = OrderedDict()  # key -> (expires_at, serialized result)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        # The SQLite connection is opened lazily so it is never shared across a fork
+        self.sqlite_path = sqlite_path
+        self._db_conn = None
+        self._db_pid = None
+        
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+    
+    def make_key(self, kind, stream, params=None):
+        """
+        Build the cache key for an upload
+        
+        Args:
+            kind (str): Detector kind, e.g. 'image'
+            stream: Upload stream; hashed in chunks and rewound
+            params (dict, optional): Detector parameters that affect the result
+            
+        Returns:
+            tuple: (key, upload size in bytes)
+        """
+        digest, size = hash_stream(stream)
+        params_json = json.dumps(params or {}, sort_keys=True)
+        return f"{kind}:{self.model_version}:{params_json}:{digest}", size
+    
+    def get(self, key, nbytes=0):
+        """
+        Look up a result, checking memory first and then the shared tier
+        
+        Args:
+            key (str): Key from make_key()
+            nbytes (int): Upload size, added to bytes_saved on a hit
+            
+        Returns:
+            dict or None: The cached result
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.bytes_saved += nbytes
+                    return json.loads(entry[1])
+                self._remove(key)
+            
+            db = self._db()
+            if db is not None:
+                row = db.execute(
+                    'SELECT value, expires_at FROM results WHERE key = ? AND expires_at > ?', (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self.bytes_saved += nbytes
+                    return json.loads(row[0])
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key, result):
+        """
+        Store a JSON-serializable result in both tiers
+        
+        Args:
+            key (str): Key from make_key()
+            result (dict): Detection result
+        """
+        value = json.dumps(result)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            
+            db = self._db()
+            if db is not None:
+                db.execute(
+                    'INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, value, expires_at)
+                )
+                db.execute('DELETE FROM results WHERE expires_at <= ?', (time.time(),))
+                db.commit()
+    
+    def stats(self):
+        """
+        Report hit rate and savings
+        
+        Returns:
+            dict: Cache counters
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'bytes_saved': self.bytes_saved
+        }
+    
+    def _db(self):
+        """
+        This process's connection to the shared SQLite tier, or None if disabled (lock held)
+        """
+        if not self.sqlite_path:
+            return None
+        if self._db_pid != os.getpid():
+            self._db_conn = sqlite3.connect(self.sqlite_path, timeout=5, check_same_thread=False)
+            self._db_conn.execute('PRAGMA journal_mode=WAL')
+            self._db_conn.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+            )
+            self._db_conn.commit()
+            self._db_pid = os.getpid()
+        return self._db_conn
+    
+    def _store(self, key, value, expires_at):
+        """
+        Insert into the in-memory LRU and evict down to the size limits (lock held)
+        """
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, value)
+        self._bytes += len(value)
+        
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+    
+    def _remove(self, key):
+        """
+        Drop one in-memory entry (lock held)
+        """
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
@@ -0,0 +1,215 @@
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from PIL import Image
+
+from utils.batching import QueueFullError
+
+# Scalar result fields copied into every record when a detector reports them
+SUMMARY_FIELDS = ('fake_frame_ratio', 'frames_analyzed', 'frames_scored', 'frames_available', 'stop_reason',
+                  'frames_reused', 'windows_analyzed', 'windows_available', 'face_fallback')
+# Per-frame, per-window and per-face results, only kept with details=True
+DETAIL_FIELDS = ('frame_analysis', 'window_analysis', 'faces')
+
+def summarize(result, details=False):
+    """
+    Compact, JSON-serializable view of a detector result, in the shape of the API responses
+    
+    Args:
+        result (dict): Result of ImageDetector, VideoDetector or AudioDetector
+        details (bool): Keep per-frame, per-window and per-face results
+        
+    Returns:
+        dict: 'result', 'confidence' and whichever SUMMARY_FIELDS the detector reported
+    """
+    summary = {
+        'result': 'fake' if result['is_fake'] else 'real',
+        'confidence': float(result['confidence'])
+    }
+    fields = SUMMARY_FIELDS + DETAIL_FIELDS if details else SUMMARY_FIELDS
+    for key in fields:
+        if key in result:
+            summary[key] = result[key]
+    return summary
+
+class BatchScanner:
+    def __init__(self, image_detector, video_detector, audio_detector, extensions, workers=4, batch_size=32,
+                 max_in_flight=None, video_options=None, audio_options=None, details=False):
+        """
+        Score many media files on a bounded worker pool
+        
+        Images from different files are decoded on the workers and scored
+        batch_size at a time in one forward pass. Videos and audio files are
+        scored one per worker; when the detectors have batching enabled, their
+        forward passes are coalesced across files by the MicroBatcher.
+        
+        Args:
+            image_detector (ImageDetector): Scores images
+            video_detector (VideoDetector): Scores videos
+            audio_detector (AudioDetector): Scores audio files
+            extensions (dict): Kind ('image', 'video', 'audio') -> allowed extensions, without the dot
+            workers (int): Tasks run concurrently
+            batch_size (int): Images per cross-file forward pass
+            max_in_flight (int, optional): Tasks submitted ahead of the results, bounding the
+                inputs held in memory (default: 2 * workers)
+            video_options (dict, optional): Keyword arguments for the video detector, e.g. {'adaptive': True}
+            audio_options (dict, optional): Keyword arguments for the audio detector, e.g. {'windowed': True}
+            details (bool): Keep per-frame, per-window and per-face results in the records
+        """
+        self.detectors = {'image': image_detector, 'video': video_detector, 'audio': audio_detector}
+        self.extensions = {kind: {ext.lower() for ext in exts} for kind, exts in extensions.items()}
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.video_options = video_options or {}
+        self.audio_options = audio_options or {}
+        self.details = details
+    
+    def kind_of(self, name):
+        """
+        Detector kind for a file name, from its extension, or None if no detector accepts it
+        """
+        if '.' not in name:
+            return None
+        ext = name.rsplit('.', 1)[1].lower()
+        for kind, exts in self.extensions.items():
+            if ext in exts:
+                return kind
+        return None
+    
+    def scan(self, items):
+        """
+        Score items, yielding one record per item as results complete
+        
+        Args:
+            items: Iterable of (name, source) pairs; source is a file path or the file's bytes.
+                The name picks the detector by extension and identifies the record.
+                
+        Yields:
+            dict: {'name', 'kind', **summary} or {'name', 'kind', 'error'}, in completion order
+            
+        Raises:
+            QueueFullError: If a detector's batcher rejects work; nothing is retried
+        """
+        for _, record in self._scan(items):
+            yield record
+    
+    def scan_all(self, items):
+        """
+        Score items and return their records in input order, see scan()
+        """
+        return [record for _, record in sorted(self._scan(items), key=lambda entry: entry[0])]
+    
+    def _scan(self, items):
+        """
+        Generator behind scan(), yielding (input position, record) pairs
+        """
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scan') as executor:
+            pending = set()
+            images = []
+            try:
+                for position, (name, source) in enumerate(items):
+                    kind = self.kind_of(name)
+                    if kind is None:
+                        yield position, {'name': name, 'kind': None, 'error': 'File type not allowed'}
+                        continue
+                    if kind == 'image':
+                        images.append((position, name, source))
+                        if len(images) < self.batch_size:
+                            continue
+                        pending.add(executor.submit(self._score_images, images))
+                        images = []
+                    else:
+                        pending.add(executor.submit(self._score_file, position, kind, name, source))
+                    
+                    while len(pending) >= self.max_in_flight:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield from future.result()
+                
+                if images:
+                    pending.add(executor.submit(self._score_images, images))
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+            finally:
+                # Stopped early (error or closed generator): drop work that has not started
+                for future in pending:
+                    future.cancel()
+    
+    def _score_file(self, position, kind, name, source):
+        """
+        Score one video or audio file (worker thread)
+        
+        Returns:
+            list: The file's (position, record)
+        """
+        detector = self.detectors[kind]
+        options = self.video_options if kind == 'video' else self.audio_options
+        try:
+            start_time = time.perf_counter()
+            if isinstance(source, bytes):
+                if kind == 'video':
+                    result = detector.detect_bytes(source, suffix='.' + name.rsplit('.', 1)[1].lower(), **options)
+                else:
+                    result = detector.detect_bytes(source, **options)
+            else:
+                result = detector.detect(source, **options)
+            record = {'name': name, 'kind': kind, **summarize(result, self.details),
+                      'processing_time': time.perf_counter() - start_time}
+        except QueueFullError:
+            raise
+        except Exception as e:
+            record = {'name': name, 'kind': kind, 'error': str(e)}
+        return [(position, record)]
+    
+    def _score_images(self, group):
+        """
+        Decode a group of images and score them in one forward pass (worker thread)
+        
+        With a face locator every image is scored on its own face crops instead.
+        
+        Args:
+            group (list): (position, name, source) triples
+            
+        Returns:
+            list: One (position, record) per image, in group order
+        """
+        detector = self.detectors['image']
+        start_time = time.perf_counter()
+        records = [None] * len(group)
+        scored, rows = [], []
+        for i, (_, name, source) in enumerate(group):
+            try:
+                img_array = np.asarray(Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+                                       .convert('RGB'))
+                if detector.face_locator is not None:
+                    records[i] = {'name': name, 'kind': 'image',
+                                  **summarize(detector.detect_faces(img_array), self.details)}
+                    continue
+                rows.append(detector.preprocess_array(img_array))
+                scored.append(i)
+            except QueueFullError:
+                raise
+            except Exception as e:
+                records[i] = {'name': name, 'kind': 'image', 'error': f"Error in image detection: {str(e)}"}
+        
+        if rows:
+            try:
+                for i, result in zip(scored, detector.detect_batch(np.stack(rows), batch_size=self.batch_size)):
+                    records[i] = {'name': group[i][1], 'kind': 'image', **summarize(result, self.details)}
+            except QueueFullError:
+                raise
+            except Exception as e:
+                for i in scored:
+                    records[i] = {'name': group[i][1], 'kind': 'image', 'error': str(e)}
+        
+        # Images share the group's time: one forward pass scored them all
+        share = (time.perf_counter() - start_time) / len(group)
+        for record in records:
+            if 'error' not in record:
+                record['processing_time'] = share
+        return [(position, record) for (position, _, _), record in zip(group, records)]
@@ -0,0 +1,93 @@
+import math
+
+def coarse_to_fine(n):
+    """
+    Visit order for n timeline positions that covers the whole clip early
+    
+    Starts with the widest spacing and halves it each round, so any prefix
+    of the order is spread roughly uniformly over the clip.
+    
+    Args:
+        n (int): Number of positions
+        
+    Returns:
+        list: Every position in range(n) exactly once
+    """
+    order, seen = [], set()
+    step = 1 << max(0, (n - 1).bit_length())
+    while step >= 1:
+        for position in range(0, n, step):
+            if position not in seen:
+                seen.add(position)
+                order.append(position)
+        step //= 2
+    return order
+
+class FakeRatioTest:
+    def __init__(self, threshold=0.5, total=None, min_frames=8, delta=0.1, alpha=0.01, beta=0.01):
+        """
+        Sequential test of whether the share of fake frames reaches threshold
+        
+        Combines Wald's sequential probability ratio test on per-frame verdicts
+        (H0: ratio = threshold - delta, H1: ratio = threshold + delta) with an
+        exact bound: once enough frames are in that scoring the rest could not
+        change the verdict over all total frames, the test stops.
+        
+        Args:
+            threshold (float): Fake frame ratio at which a video is fake
+            total (int, optional): Frames that would be scored without early exit
+            min_frames (int): Frames scored before the SPRT may stop
+            delta (float): Half-width of the indifference region around threshold
+            alpha (float): Tolerated rate of calling a real video fake
+            beta (float): Tolerated rate of calling a fake video real
+        """
+        self.threshold = threshold
+        self.total = total
+        self.min_frames = min_frames
+        
+        p0 = min(max(threshold - delta, 1e-3), 1 - 1e-3)
+        p1 = min(max(threshold + delta, 1e-3), 1 - 1e-3)
+        self._fake_step = math.log(p1 / p0)
+        self._real_step = math.log((1 - p1) / (1 - p0))
+        self._upper = math.log((1 - beta) / alpha)
+        self._lower = math.log(beta / (1 - alpha))
+        
+        self.scored = 0
+        self.fakes = 0
+        self.llr = 0.0
+    
+    def update(self, is_fake):
+        """
+        Add one frame verdict
+        
+        Args:
+            is_fake (bool): Whether the frame was classified fake
+        """
+        self.scored += 1
+        if is_fake:
+            self.fakes += 1
+            self.llr += self._fake_step
+        else:
+            self.llr += self._real_step
+    
+    def decision(self):
+        """
+        Current verdict, if it is settled
+        
+        Returns:
+            tuple: (is_fake, reason) with reason 'bound' or 'sprt', or (None, None) to keep scoring
+        """
+        if self.total is not None:
+            needed = self.threshold * self.total
+            if self.fakes >= needed:
+                return True, 'bound'
+            if self.fakes + (self.total - self.scored) < needed:
+                return False, 'bound'
+        
+        if self.scored >= self.min_frames:
+            if self.llr >= self._upper:
+                return True, 'sprt'
+            if self.llr <= self._lower:
+                return False, 'sprt'
+        
+        return None, None
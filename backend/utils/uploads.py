@@ -0,0 +1,414 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.batching import QueueFullError
+
+# Upload lifecycle: receiving -> done | failed (finalize), or deleted on abort and expiry
+STATUSES = ('receiving', 'done', 'failed')
+# Handler errors that say nothing about the upload (a full batch queue, a locked database);
+# finalize() gives the claim back and re-raises them, so the client can retry
+TRANSIENT_ERRORS = (QueueFullError, sqlite3.OperationalError)
+
+class UploadError(Exception):
+    """A request that does not fit the upload's state, e.g. a chunk at the wrong offset (HTTP 409)"""
+
+class UploadLimitError(Exception):
+    """An upload that would exceed the size, quota or free-space limits (HTTP 413 or 507)"""
+
+class UploadStore:
+    def __init__(self, db_path, folder, max_size, quota, ttl):
+        """
+        Chunked, resumable uploads on local disk, with their state in SQLite
+        
+        Each upload declares its size up front and reserves it against the quota;
+        chunks are appended at the offset the server has received so far, so a
+        client that lost a connection asks for the offset and carries on from there.
+        Safe to share between threads and between worker processes on one host.
+        
+        Args:
+            db_path (str): SQLite database file
+            folder (str): Directory holding the partial files
+            max_size (int): Largest upload in bytes
+            quota (int): Bytes all unfinished uploads may reserve together
+            ttl (float): Seconds without a chunk after which an unfinished upload is deleted;
+                finished ones keep their result this long after finalizing
+        """
+        self.db_path = db_path
+        self.folder = folder
+        self.max_size = max_size
+        self.quota = quota
+        self.ttl = ttl
+        os.makedirs(folder, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+    
+    def create(self, kind, filename, size, params=None):
+        """
+        Start an upload, reserving its size on disk
+        
+        Args:
+            kind (str): Media type, e.g. 'video'
+            filename (str): Original (sanitized) file name, whose extension decoders may rely on
+            size (int): Total size in bytes
+            params (dict, optional): Analysis options
+            
+        Returns:
+            dict: The new upload
+            
+        Raises:
+            UploadLimitError: If the upload is too large for max_size, the quota or the free disk space
+        """
+        if size > self.max_size:
+            raise UploadLimitError(f"Upload too large, at most {self.max_size} bytes")
+        self.expire()
+        
+        upload_id = str(uuid.uuid4())
+        path = os.path.join(self.folder, f"{upload_id}_{filename}")
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                reserved = conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM uploads WHERE status = 'receiving'"
+                ).fetchone()[0]
+                if reserved + size > self.quota:
+                    raise UploadLimitError("Too many uploads in progress, try again later")
+                # Space reserved but not yet written is still free on disk
+                written = conn.execute(
+                    "SELECT COALESCE(SUM(received), 0) FROM uploads WHERE status = 'receiving'"
+                ).fetchone()[0]
+                if shutil.disk_usage(self.folder).free - (reserved - written) < size:
+                    raise UploadLimitError("Not enough disk space for the upload")
+                conn.execute(
+                    'INSERT INTO uploads (id, kind, filename, path, size, status, params, state, '
+                    'created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (upload_id, kind, filename, path, size, 'receiving', json.dumps(params or {}), '{}', now, now)
+                )
+                open(path, 'wb').close()
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return self.get(upload_id)
+    
+    def append(self, upload_id, offset, data):
+        """
+        Write a chunk at offset
+        
+        A chunk that starts before the received offset is a retry whose response
+        was lost; only its bytes past that offset are written.
+        
+        Args:
+            upload_id (str): Upload id
+            offset (int): Position of the chunk's first byte in the file
+            data (bytes): Chunk contents
+            
+        Returns:
+            dict: The upload after the write, or None if it does not exist
+            
+        Raises:
+            UploadError: If the upload is finalized, offset is past the received bytes,
+                or the chunk runs past the declared size
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(
+                    'SELECT path, size, received, status FROM uploads WHERE id = ?', (upload_id,)
+                ).fetchone()
+                if row is None:
+                    conn.execute('ROLLBACK')
+                    return None
+                path, size, received, status = row
+                if status != 'receiving':
+                    raise UploadError("Upload already finalized")
+                if offset > received:
+                    raise UploadError(f"Expected offset {received}")
+                if offset + len(data) > size:
+                    raise UploadError(f"Chunk runs past the declared size of {size} bytes")
+                
+                new_bytes = data[received - offset:]
+                if new_bytes:
+                    fd = os.open(path, os.O_WRONLY)
+                    try:
+                        view = memoryview(new_bytes)
+                        position = received
+                        while view:
+                            written = os.pwrite(fd, view, position)
+                            view = view[written:]
+                            position += written
+                    finally:
+                        os.close(fd)
+                    received += len(new_bytes)
+                conn.execute(
+                    'UPDATE uploads SET received = ?, updated_at = ? WHERE id = ?',
+                    (received, time.time(), upload_id)
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return self.get(upload_id)
+    
+    def claim(self, upload_id, lease):
+        """
+        Take the right to analyze an upload for up to lease seconds
+        
+        Returns:
+            dict or None: The upload, or None if it is missing, finished, or claimed by someone else.
+                Its lease_until identifies the claim to release(), finish() and fail().
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(
+                "UPDATE uploads SET lease_until = ? WHERE id = ? AND status = 'receiving' "
+                "AND (lease_until IS NULL OR lease_until < ?)",
+                (now + lease, upload_id, now)
+            )
+            conn.commit()
+            claimed = cursor.rowcount == 1
+        return self.get(upload_id) if claimed else None
+    
+    def release(self, upload_id, lease_until, state):
+        """
+        Save analysis progress and give up the claim
+        
+        Nothing is written if the lease ran out and the upload was claimed again since.
+        
+        Returns:
+            bool: Whether the claim was still held
+        """
+        return self._execute(
+            "UPDATE uploads SET state = ?, lease_until = NULL WHERE id = ? AND status = 'receiving' "
+            "AND lease_until = ?",
+            (json.dumps(state), upload_id, lease_until)
+        ) == 1
+    
+    def finish(self, upload_id, lease_until, result):
+        """
+        Record the verdict and delete the file, freeing its reservation
+        
+        Returns:
+            bool: Whether the claim was still held (otherwise nothing is recorded)
+        """
+        return self._finalize(upload_id, lease_until, "status = 'done', result = ?", (json.dumps(result),))
+    
+    def fail(self, upload_id, lease_until, error):
+        return self._finalize(upload_id, lease_until, "status = 'failed', error = ?", (error,))
+    
+    def delete(self, upload_id):
+        """
+        Abort an upload: delete its file and record
+        
+        Returns:
+            bool: Whether it existed
+        """
+        upload = self.get(upload_id)
+        if upload is None:
+            return False
+        self._remove_file(upload['path'])
+        self._execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+        return True
+    
+    def expire(self):
+        """
+        Delete uploads (and their files) not touched for ttl seconds
+        """
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                'SELECT id, path FROM uploads WHERE updated_at < ? AND (lease_until IS NULL OR lease_until < ?)',
+                (cutoff, time.time())
+            ).fetchall()
+            for upload_id, path in rows:
+                self._remove_file(path)
+                conn.execute('DELETE FROM uploads WHERE id = ?', (upload_id,))
+            conn.commit()
+    
+    def get(self, upload_id):
+        """
+        Look up an upload
+        
+        Returns:
+            dict or None: Upload fields, with params, state and result decoded
+        """
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute('SELECT * FROM uploads WHERE id = ?', (upload_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            upload = dict(zip([column[0] for column in cursor.description], row))
+        
+        upload['params'] = json.loads(upload['params'])
+        upload['state'] = json.loads(upload['state']) if upload['state'] else {}
+        upload['result'] = json.loads(upload['result']) if upload['result'] else None
+        return upload
+    
+    def stats(self):
+        """
+        Unfinished uploads and the bytes they reserve and have received
+        """
+        with self._lock:
+            uploads, reserved, received = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(received), 0) "
+                "FROM uploads WHERE status = 'receiving'"
+            ).fetchone()
+        return {'uploads': uploads, 'reserved_bytes': reserved, 'received_bytes': received,
+                'quota_bytes': self.quota, 'max_size': self.max_size}
+    
+    def _finalize(self, upload_id, lease_until, assignments, params):
+        # The partial results are no longer needed once the verdict is in
+        finalized = self._execute(
+            f"UPDATE uploads SET {assignments}, state = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND status = 'receiving' AND lease_until = ?",
+            params + (time.time(), upload_id, lease_until)
+        ) == 1
+        if finalized:
+            self._remove_file(self.get(upload_id)['path'])
+        return finalized
+    
+    def _remove_file(self, path):
+        if path and os.path.exists(path):
+            os.remove(path)
+    
+    def _execute(self, sql, params):
+        with self._lock:
+            conn = self._connection()
+            rowcount = conn.execute(sql, params).rowcount
+            conn.commit()
+        return rowcount
+    
+    def _connection(self):
+        """
+        This process's connection, opened lazily so it is never shared across a fork (lock held)
+        """
+        if self._pid != os.getpid():
+            # Explicit BEGIN IMMEDIATE in create() and append() needs manual transaction control
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                         isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(
+                'CREATE TABLE IF NOT EXISTS uploads ('
+                ' id TEXT PRIMARY KEY, kind TEXT NOT NULL, filename TEXT NOT NULL, path TEXT,'
+                ' size INTEGER NOT NULL, received INTEGER DEFAULT 0, status TEXT NOT NULL,'
+                ' params TEXT, state TEXT, result TEXT, error TEXT, lease_until REAL,'
+                ' created_at REAL NOT NULL, updated_at REAL NOT NULL);'
+                'CREATE INDEX IF NOT EXISTS uploads_status ON uploads (status, updated_at);'
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+class UploadAnalyzer:
+    def __init__(self, store, handlers, workers=1, lease=300):
+        """
+        Analyze uploads while they arrive, on a bounded pool of background threads
+        
+        After each chunk, notify() schedules a pass over the data received so far;
+        passes for one upload never overlap (also across worker processes, through
+        a lease in the store) and notifications during a pass schedule one more.
+        Progress is saved in the store, so finalize() in any worker continues from it.
+        
+        Args:
+            store (UploadStore): Uploads to analyze
+            handlers (dict): Upload kind -> callable(upload, state, complete) that scores what
+                has arrived, updating state in place; with complete=True it returns the verdict
+            workers (int): Threads per process
+            lease (float): Seconds a pass may hold an upload before others may take it over
+        """
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.lease = lease
+        
+        self._lock = threading.Lock()
+        self._queued = set()
+        self._executor = None
+        self._pid = None
+    
+    def notify(self, upload_id):
+        """
+        Schedule a pass over an upload, unless one is already waiting
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive a fork
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='upload-analyzer')
+                self._queued = set()
+                self._pid = os.getpid()
+            if upload_id in self._queued:
+                return
+            self._queued.add(upload_id)
+            self._executor.submit(self._run, upload_id)
+    
+    def finalize(self, upload_id):
+        """
+        Wait for any pass in progress, then score the rest and record the verdict
+        
+        Returns:
+            dict: The finished upload
+            
+        Raises:
+            UploadError: If the upload is incomplete or its analysis is held elsewhere for too long
+            QueueFullError, sqlite3.OperationalError: Transient failures (TRANSIENT_ERRORS);
+                the upload stays unfinished with its progress saved
+        """
+        deadline = time.time() + self.lease
+        while True:
+            upload = self.store.get(upload_id)
+            if upload is None or upload['status'] != 'receiving':
+                # Already finalized, e.g. a retried request
+                return upload
+            if upload['received'] < upload['size']:
+                raise UploadError(f"Upload incomplete: {upload['received']} of {upload['size']} bytes received")
+            upload = self.store.claim(upload_id, self.lease)
+            if upload is not None:
+                break
+            if time.time() > deadline:
+                raise UploadError("Upload is being analyzed elsewhere, try again later")
+            time.sleep(0.05)
+        
+        state = upload['state']
+        try:
+            result = self.handlers[upload['kind']](upload, state, True)
+        except TRANSIENT_ERRORS:
+            self.store.release(upload_id, upload['lease_until'], state)
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            self.store.fail(upload_id, upload['lease_until'], str(e))
+        else:
+            self.store.finish(upload_id, upload['lease_until'], result)
+        return self.store.get(upload_id)
+    
+    def _run(self, upload_id):
+        """
+        One pass over the data received so far
+        """
+        with self._lock:
+            self._queued.discard(upload_id)
+        upload = self.store.claim(upload_id, self.lease)
+        if upload is None:
+            return
+        
+        state = upload['state']
+        try:
+            self.handlers[upload['kind']](upload, state, False)
+        except Exception:
+            # The tail of a partial file may not decode yet; finalize reports real failures
+            traceback.print_exc()
+        finally:
+            self.store.release(upload_id, upload['lease_until'], state)